@@ -0,0 +1,52 @@
+# bench_ch.py
+# Compara Dijkstra contra Contraction Hierarchies en todos los pares de ciudades
+#
+# Uso: python -m benchmarks.bench_ch [--no-cache]
+import argparse
+import time
+
+from routing import RoutingEngine
+from routing.loader import CH_FILE
+
+
+def time_queries(engine, pairs, algorithm):
+    """Devuelve (ms por consulta, nodos asentados promedio, distancias)"""
+    distances = {}
+    settled = 0
+    start = time.perf_counter()
+    for s, e in pairs:
+        distances[s, e] = engine.distance(s, e, algorithm)
+        settled += engine.last_search["settled"]
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / len(pairs), settled / len(pairs), distances
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Dijkstra vs Contraction Hierarchies")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="construir la jerarquía en memoria sin leer ni escribir utils/")
+    args = parser.parse_args()
+
+    # Sin caché de rutas ni árboles: se mide cada consulta completa
+    engine = RoutingEngine.from_files(route_cache=0, tree_cache=0)
+    cities = sorted(engine.cities)
+    pairs = [(s, e) for s in cities for e in cities if s != e]
+
+    start = time.perf_counter()
+    ch = engine.prepare_ch(path=None if args.no_cache else CH_FILE)
+    prep = time.perf_counter() - start
+
+    dij_ms, dij_settled, dij_dist = time_queries(engine, pairs, "dijkstra")
+    ch_ms, ch_settled, ch_dist = time_queries(engine, pairs, "ch")
+    mismatches = sum(1 for p in pairs if abs(dij_dist[p] - ch_dist[p]) > 1e-6)
+
+    print(f"Red: {len(engine.nodes)} nodos, {engine.graph.edge_count()} carreteras, {len(pairs)} pares de ciudades")
+    print(f"Preprocesamiento CH: {prep * 1000:.1f} ms ({ch.shortcut_count()} atajos)")
+    print(f"{'algoritmo':<10} {'ms/consulta':>12} {'nodos asentados':>16}")
+    print(f"{'dijkstra':<10} {dij_ms:>12.3f} {dij_settled:>16.1f}")
+    print(f"{'ch':<10} {ch_ms:>12.3f} {ch_settled:>16.1f}")
+    print(f"Aceleración: {dij_ms / ch_ms:.1f}x | Distancias distintas: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench_startup.py
+# Mide el arranque sin pantalla: importaciones de main.py y la carga en segundo plano
+#
+# Uso: python -m benchmarks.bench_startup [--repeat 5]
+#
+# Cada repetición corre en un intérprete nuevo (importaciones en frío de Python; la
+# caché de disco del sistema sí queda caliente). La aplicación imprime además su
+# propia medición al arrancar: "Arranque: ventana en X ms, red lista en Y ms".
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Módulos que main.py importa antes de mostrar la ventana
+MAIN_IMPORTS = (
+    "tkinter", "tkinter.ttk", "data.ciudades", "routing", "routing.autoconnect", "routing.history",
+    "routing.metrics", "routing.shapes", "gui.scene", "gui.tiles", "gui.worker",
+    "gui.animation", "gui.startup",
+)
+# No deben cargarse antes de la ventana (networkx solo con ese backend, PIL con el mapa)
+HEAVY = ("networkx", "PIL", "numpy")
+# Zoom con el que arranca main.py (se genera su nivel de la pirámide)
+INITIAL_ZOOM = 0.41
+
+CHILD = r"""
+import importlib, json, sys, time
+start = time.perf_counter()
+for name in MODULES:
+    importlib.import_module(name)
+imported = time.perf_counter()
+heavy_before = [m for m in HEAVY if m in sys.modules]
+
+from data.ciudades import original_cities, waypoints, all_nodes
+from routing import NetworkStore, RoadStore, RoutingEngine
+from routing.loader import resource_path
+from gui.startup import load_resources
+network = NetworkStore(RoutingEngine(), original_cities, waypoints, all_nodes, RoadStore())
+loaded = load_resources(network, resource_path("utils/mapa_venezuela.png"), zoom=INITIAL_ZOOM)
+done = time.perf_counter()
+print(json.dumps({
+    "imports_ms": round((imported - start) * 1000, 1),
+    "load_ms": round((done - imported) * 1000, 1),
+    "steps_ms": loaded["timings"],
+    "errors": loaded["errors"],
+    "heavy_before_window": heavy_before,
+    "heavy_after_load": [m for m in HEAVY if m in sys.modules],
+}))
+"""
+
+
+def run_once():
+    code = f"MODULES = {MAIN_IMPORTS!r}\nHEAVY = {HEAVY!r}\nINITIAL_ZOOM = {INITIAL_ZOOM!r}\n" + CHILD
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque (importaciones y carga inicial)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.repeat)]
+    last = runs[-1]
+
+    def median(key):
+        values = sorted(r[key] for r in runs)
+        return values[len(values) // 2]
+
+    print(f"{'fase':<28} {'mediana ms':>10} {'mejor ms':>10}")
+    print(f"{'importaciones (ventana)':<28} {median('imports_ms'):>10.1f} {min(r['imports_ms'] for r in runs):>10.1f}")
+    print(f"{'carga en segundo plano':<28} {median('load_ms'):>10.1f} {min(r['load_ms'] for r in runs):>10.1f}")
+    for step in last["steps_ms"]:
+        values = sorted(r["steps_ms"][step] for r in runs)
+        print(f"{'  ' + step:<28} {values[len(values) // 2]:>10.1f} {values[0]:>10.1f}")
+    print(f"Módulos pesados antes de la ventana: {', '.join(last['heavy_before_window']) or 'ninguno'}")
+    print(f"Módulos pesados tras la carga: {', '.join(last['heavy_after_load']) or 'ninguno'}")
+    for step, error in last["errors"].items():
+        print(f"Aviso ({step}): {error}")
+
+
+if __name__ == "__main__":
+    main()
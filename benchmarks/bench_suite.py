@@ -0,0 +1,411 @@
+# bench_suite.py
+# Suite reproducible: carga, pesos, rutas, generación de carreteras, selección y
+# redibujado sobre la red real y sobre versiones sintéticas más grandes
+#
+# Uso: python -m benchmarks.bench_suite [--scales 1,10,100] [--backend csr,networkx]
+#                                       [--repeat 3] [--max-pairs 552] [--only texto]
+#                                       [--skip texto,...] [--generation] [-o resultados.json]
+#
+# La red sintética subdivide las carreteras: las etapas de generación automática
+# (vecinos y MST) crecen más que linealmente con la densidad de waypoints, así que
+# por encima de 1x solo se ejecutan con --generation o si --only las nombra.
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from routing import autoconnect
+from routing.engine import BACKENDS, RoutingEngine
+from routing.loader import NODES_FILE, ROADS_FILE, load_network
+from routing.roads import RoadStore
+from routing.store import NetworkStore
+
+SEED = 1234
+HIT_TESTS = 2000
+# Vista usada en el redibujado: el lienzo de la aplicación (CANVAS_WIDTH x CANVAS_HEIGHT)
+VIEW_SIZE = (900, 650)
+# Etapas superlineales en la densidad de waypoints
+GENERATION_STAGES = ("smart_road_generation", "minimum_spanning_tree")
+PICK_RADIUS = 15
+
+
+# ------------------ RED SINTÉTICA ------------------
+def scaled_network(cities, waypoints, roads, scale):
+    """Red con unas scale veces más waypoints: cada carretera se subdivide en tramos
+
+    Los waypoints nuevos se reparten según la longitud de cada carretera, así la
+    geometría y las rutas entre ciudades no cambian (solo crece el grafo).
+    """
+    if scale <= 1:
+        return dict(cities), dict(waypoints), list(roads)
+    nodes = {**cities, **waypoints}
+    edges = sorted({tuple(sorted(r)) for r in roads if r[0] != r[1] and r[0] in nodes and r[1] in nodes})
+    lengths = [math.dist(nodes[a], nodes[b]) for a, b in edges]
+    total = sum(lengths) or 1.0
+    extra = (scale - 1) * len(waypoints)
+
+    waypoints = dict(waypoints)
+    new_roads = []
+    count = 0
+    for (a, b), length in zip(edges, lengths):
+        pieces = round(extra * length / total)
+        (ax, ay), (bx, by) = nodes[a], nodes[b]
+        prev = a
+        for k in range(1, pieces + 1):
+            t = k / (pieces + 1)
+            name = f"syn_{count:07d}"
+            count += 1
+            waypoints[name] = [ax + (bx - ax) * t, ay + (by - ay) * t]
+            new_roads.append((prev, name))
+            prev = name
+        new_roads.append((prev, b))
+    return dict(cities), waypoints, new_roads
+
+
+def write_network(directory, cities, waypoints, roads):
+    """Escribe la red en el formato de utils/ (node_positions.json y roads_config.json)"""
+    nodes_file = os.path.join(directory, "node_positions.json")
+    roads_file = os.path.join(directory, "roads_config.json")
+    data = {name: {"x": x, "y": y, "type": "city"} for name, (x, y) in cities.items()}
+    data.update({name: {"x": x, "y": y, "type": "waypoint"} for name, (x, y) in waypoints.items()})
+    with open(nodes_file, "w") as f:
+        json.dump(data, f)
+    with open(roads_file, "w") as f:
+        json.dump({"roads": [list(r) for r in roads]}, f)
+    return nodes_file, roads_file
+
+
+def compile_backend(engine):
+    """Fuerza la compilación perezosa de la estructura de búsqueda del backend"""
+    if engine.backend == "csr":
+        engine.csr()
+    else:
+        engine._networkx()
+
+
+def new_network(cities, waypoints, roads, backend="csr", **options):
+    """NetworkStore sin historial sobre copias de la red (cada medición parte de cero)"""
+    network = NetworkStore(RoutingEngine(backend=backend, **options), {}, {}, {}, RoadStore())
+    network.load({c: list(p) for c, p in cities.items()},
+                 {w: list(p) for w, p in waypoints.items()}, roads)
+    return network
+
+
+# ------------------ LIENZO VIRTUAL ------------------
+class VirtualCanvas:
+    """Sustituto de tkinter.Canvas que solo cuenta las llamadas (para medir MapScene sin pantalla)"""
+
+    def __init__(self):
+        self.calls = {}
+        self._next = 0
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _create(self, name):
+        self._count(name)
+        self._next += 1
+        return self._next
+
+    def create_line(self, *args, **kw):
+        return self._create("create_line")
+
+    def create_oval(self, *args, **kw):
+        return self._create("create_oval")
+
+    def create_text(self, *args, **kw):
+        return self._create("create_text")
+
+    def create_image(self, *args, **kw):
+        return self._create("create_image")
+
+    def coords(self, *args):
+        self._count("coords")
+
+    def itemconfigure(self, *args, **kw):
+        self._count("itemconfigure")
+
+    def move(self, *args):
+        self._count("move")
+
+    def delete(self, *args):
+        self._count("delete")
+
+    def tag_raise(self, *args):
+        self._count("tag_raise")
+
+    def tag_lower(self, *args):
+        self._count("tag_lower")
+
+
+# ------------------ ETAPAS ------------------
+# Cada etapa es (nombre, setup, run): setup prepara el estado fuera del tiempo medido
+# y run devuelve un diccionario opcional con datos extra del resultado.
+def stage_load(ctx):
+    def setup():
+        return None
+
+    def run(_):
+        cities, waypoints, roads = load_network(ctx["nodes_file"], ctx["roads_file"])
+        network = new_network(cities, waypoints, roads, ctx["backend"])
+        return {"nodes": len(network.nodes), "roads": network.engine.graph.edge_count()}
+    return setup, run
+
+
+def stage_update_weights(ctx):
+    """Sincronización sin cambios (lo que hacía la interfaz tras cada edición)"""
+    def setup():
+        return new_network(ctx["cities"], ctx["waypoints"], ctx["roads"], ctx["backend"])
+
+    def run(network):
+        network.engine.sync(network.nodes, network.roads, network.cities)
+    return setup, run
+
+
+def stage_rebuild_weights(ctx):
+    def setup():
+        return new_network(ctx["cities"], ctx["waypoints"], ctx["roads"], ctx["backend"])
+
+    def run(network):
+        network.engine.load(network.nodes, network.roads, network.cities)
+        compile_backend(network.engine)
+    return setup, run
+
+
+def city_pairs(cities, max_pairs):
+    pairs = [(s, e) for s in sorted(cities) for e in sorted(cities) if s != e]
+    if max_pairs and len(pairs) > max_pairs:
+        step = len(pairs) / max_pairs
+        pairs = [pairs[int(i * step)] for i in range(max_pairs)]
+    return pairs
+
+
+def stage_routes(ctx, algorithm, caches):
+    """Consultas entre pares de ciudades; caches=False mide cada búsqueda completa"""
+    def setup():
+        options = {} if caches else {"route_cache": 0, "tree_cache": 0}
+        network = new_network(ctx["cities"], ctx["waypoints"], ctx["roads"], ctx["backend"], **options)
+        engine = network.engine
+        if algorithm == "ch":
+            engine.prepare_ch(path=None)
+        elif algorithm == "chains":
+            engine.chain_graph()
+        else:
+            compile_backend(engine)
+        return engine
+
+    def run(engine):
+        settled = []
+        for s, e in ctx["pairs"]:
+            _, _, stats = engine.route_with_stats(s, e, algorithm)
+            settled.append(stats["settled"])
+        # networkx no informa los nodos asentados
+        average = None if None in settled else round(sum(settled) / len(settled), 1)
+        return {"queries": len(ctx["pairs"]), "settled_avg": average}
+    return setup, run
+
+
+def stage_autoconnect(ctx, function):
+    def setup():
+        return new_network(ctx["cities"], ctx["waypoints"], ctx["roads"], ctx["backend"])
+
+    def run(network):
+        before = len(network.roads)
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(network)
+        return {"roads_added": len(network.roads) - before}
+    return setup, run
+
+
+def stage_hit_test(ctx):
+    """Selección de nodos con el ratón: el nodo más cercano a puntos aleatorios"""
+    def setup():
+        network = new_network(ctx["cities"], ctx["waypoints"], ctx["roads"], ctx["backend"])
+        index = network.engine.spatial_index()
+        xs = [p[0] for p in network.nodes.values()]
+        ys = [p[1] for p in network.nodes.values()]
+        rng = random.Random(SEED)
+        points = [(rng.uniform(min(xs), max(xs)), rng.uniform(min(ys), max(ys))) for _ in range(HIT_TESTS)]
+        return index, points
+
+    def run(state):
+        index, points = state
+        hits = sum(1 for x, y in points if index.nearest(x, y, max_distance=PICK_RADIUS) is not None)
+        return {"queries": len(points), "hits": hits}
+    return setup, run
+
+
+def stage_redraw(ctx, step):
+    """Escena retenida sobre un lienzo virtual: construcción, desplazamiento, zoom o
+    arrastre de un waypoint (cada movimiento actualiza solo sus ítems)
+
+    Como en main.py, los trazados de utils/road_drawings.json se enlazan al grafo; en
+    las redes escaladas las carreteras subdivididas ya no coinciden con los dibujos y
+    se trazan como rectas (shapes_linked lo refleja).
+    """
+    from gui.scene import MapScene
+    from routing.shapes import RoadShapes
+
+    def setup():
+        network = new_network(ctx["cities"], ctx["waypoints"], ctx["roads"], ctx["backend"])
+        shapes = None
+        if ctx["drawings"] is not None:
+            shapes = RoadShapes(ctx["drawings"])
+            shapes.link(network.engine.graph)
+        scene = MapScene(VirtualCanvas(), shapes=shapes)
+        if step != "build":
+            scene.sync(network.engine.graph, network.cities, network)
+            scene.set_view(0.6, (0, 0), VIEW_SIZE)
+            if step == "edit":
+                # Solo cuentan las llamadas de las ediciones, no las de la construcción
+                scene.canvas.calls.clear()
+        return network, scene
+
+    def run(state):
+        network, scene = state
+        if step == "build":
+            scene.sync(network.engine.graph, network.cities, network)
+            scene.set_view(0.6, (0, 0), VIEW_SIZE)
+        elif step == "edit":
+            # El waypoint más conectado, movido en 20 pasos como al arrastrarlo
+            graph = network.engine.graph
+            name = max(network.waypoints, key=lambda n: (len(graph.adj.get(n, ())), n))
+            x, y = network.nodes[name]
+            for i in range(1, 21):
+                network.move_node(name, [x + i, y + i / 2])
+                scene.sync(graph, network.cities, network)
+            for i in range(1, 21):
+                scene.set_view(0.6, (-15 * i, -10 * i), VIEW_SIZE)
+        else:
+            for i in range(1, 21):
+                scene.set_view(0.6 * 1.1 ** i, (-20 * i, -12 * i), VIEW_SIZE)
+        calls = scene.canvas.calls
+        linked = len(scene.shapes) if scene.shapes is not None else 0
+        return {"canvas_calls": sum(calls.values()), "items": scene.canvas._next, "shapes_linked": linked}
+    return setup, run
+
+
+def stages(ctx):
+    yield "load_configuration", stage_load(ctx)
+    yield "update_weights_noop", stage_update_weights(ctx)
+    yield "rebuild_weights", stage_rebuild_weights(ctx)
+    yield "routes_dijkstra", stage_routes(ctx, "dijkstra", caches=False)
+    yield "routes_astar", stage_routes(ctx, "astar", caches=False)
+    yield "routes_tree_reuse", stage_routes(ctx, "dijkstra", caches=True)
+    if ctx["backend"] == "csr":
+        yield "routes_ch", stage_routes(ctx, "ch", caches=False)
+    yield "routes_chains", stage_routes(ctx, "chains", caches=False)
+    yield "smart_road_generation", stage_autoconnect(ctx, autoconnect.smart_road_generation)
+    yield "minimum_spanning_tree", stage_autoconnect(ctx, autoconnect.build_minimum_spanning_tree)
+    yield "hit_testing", stage_hit_test(ctx)
+    yield "redraw_build", stage_redraw(ctx, "build")
+    yield "redraw_pan_x20", stage_redraw(ctx, "pan")
+    yield "redraw_zoom_x20", stage_redraw(ctx, "zoom")
+    yield "redraw_edit_x20", stage_redraw(ctx, "edit")
+
+
+# ------------------ MEDICIÓN ------------------
+def measure(setup, run, repeat):
+    """Mejor y media de repeat ejecuciones (perf_counter), luego una pasada con tracemalloc"""
+    times = []
+    extra = None
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        extra = run(state)
+        times.append(time.perf_counter() - start)
+    # La memoria se mide aparte: tracemalloc enlentece y no debe afectar los tiempos
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        "best_ms": round(min(times) * 1000, 3),
+        "mean_ms": round(sum(times) / len(times) * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+    result.update(extra or {})
+    return result
+
+
+def environment():
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "seed": SEED,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de carga, rutas, edición y redibujado")
+    parser.add_argument("--scales", default="1", help="factores de tamaño de la red (ej. 1,10,100)")
+    parser.add_argument("--backend", default="csr", help=f"backends separados por coma ({', '.join(BACKENDS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="ejecuciones por etapa (se reporta la mejor)")
+    parser.add_argument("--max-pairs", type=int, default=0,
+                        help="limitar las consultas a una muestra de pares de ciudades (0 = todos)")
+    parser.add_argument("--only", default="", help="ejecutar solo las etapas cuyo nombre contenga este texto")
+    parser.add_argument("--skip", default="", help="omitir las etapas cuyo nombre contenga alguno "
+                        "de estos textos (separados por coma)")
+    parser.add_argument("--generation", action="store_true",
+                        help="ejecutar también la generación automática en escalas mayores que 1x")
+    parser.add_argument("-o", "--output", help="guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    from routing.shapes import RoadShapes
+    try:
+        drawings = RoadShapes.from_file().polylines
+    except OSError:
+        drawings = None
+        print("Aviso: sin trazados de carreteras; el redibujado se mide con rectas")
+
+    base = load_network(NODES_FILE, ROADS_FILE)
+    report = {"environment": environment(), "repeat": args.repeat, "results": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in [int(s) for s in args.scales.split(",") if s]:
+            cities, waypoints, roads = scaled_network(*base, scale)
+            nodes_file, roads_file = write_network(tmp, cities, waypoints, roads)
+            for backend in args.backend.split(","):
+                ctx = {
+                    "cities": cities, "waypoints": waypoints, "roads": roads, "backend": backend,
+                    "nodes_file": nodes_file, "roads_file": roads_file,
+                    "pairs": city_pairs(cities, args.max_pairs), "drawings": drawings,
+                }
+                print(f"\nEscala {scale}x ({len(cities) + len(waypoints)} nodos, {len(roads)} carreteras), "
+                      f"backend {backend}")
+                print(f"{'etapa':<24} {'mejor ms':>10} {'media ms':>10} {'pico KB':>10}")
+                for name, (setup, run) in stages(ctx):
+                    if args.only and args.only not in name:
+                        continue
+                    if any(skip in name for skip in args.skip.split(",") if skip):
+                        continue
+                    if name in GENERATION_STAGES and scale > 1 and not (args.generation or args.only):
+                        continue
+                    result = measure(setup, run, args.repeat)
+                    print(f"{name:<24} {result['best_ms']:>10.2f} {result['mean_ms']:>10.2f} "
+                          f"{result['peak_kb']:>10.0f}")
+                    sys.stdout.flush()
+                    report["results"].append({"scale": scale, "backend": backend, "stage": name,
+                                              "nodes": len(cities) + len(waypoints), **result})
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,557 @@
+# check_equivalence.py
+# Comprobaciones de equivalencia: los algoritmos acelerados contra Dijkstra, el árbol
+# de expansión mínimo contra la fuerza bruta, el historial (deshacer/rehacer) contra
+# el estado que dejó cada edición y la escena incremental contra la red
+#
+# Uso: python -m benchmarks.check_equivalence [--pairs 3000] [--networks 10] [--point-sets 20]
+#                                             [--edits 300] [--scale 1] [--seed 1234]
+#                                             [--only routes|synthetic|mst|history|scene]
+#
+# Termina con código 1 si alguna comprobación falla, así puede correr en CI.
+import argparse
+import contextlib
+import io
+import math
+import random
+import sys
+from collections import Counter
+
+from benchmarks.bench_suite import VIEW_SIZE, VirtualCanvas, new_network, scaled_network
+from routing import RoutingEngine, autoconnect
+from routing.errors import NoPathError
+from routing.graph import RoadGraph, edge_key
+from routing.history import CHANGE_BYTES, History
+from routing.loader import NODES_FILE, ROADS_FILE, load_network
+from routing.mst import minimum_spanning_forest
+from routing.roads import RoadStore
+from routing.store import NetworkStore
+
+SEED = 1234
+# Algoritmos que deben dar la misma distancia que Dijkstra
+ALTERNATIVES = ("astar", "ch", "chains")
+# Tolerancia relativa en km (los atajos de CH suman en otro orden)
+TOLERANCE = 1e-9
+
+
+class Report:
+    """Acumula fallos por comprobación y los imprime al final"""
+
+    def __init__(self):
+        self.checks = Counter()
+        self.failures = {}
+
+    def check(self, name, ok, detail=""):
+        self.checks[name] += 1
+        if not ok:
+            self.failures.setdefault(name, []).append(detail)
+
+    def print(self):
+        for name, total in self.checks.items():
+            failed = self.failures.get(name, [])
+            print(f"{name:<50} {total - len(failed):>7}/{total:<7} {'ok' if not failed else 'FALLA'}")
+            for detail in failed[:5]:
+                print(f"    {detail}")
+        return not self.failures
+
+
+# ------------------ RUTAS ------------------
+def _route(engine, s, e, algorithm):
+    try:
+        return engine.route(s, e, algorithm)
+    except NoPathError:
+        return None
+
+
+def _same_length(a, b):
+    return abs(a - b) <= TOLERANCE * max(1.0, abs(a), abs(b))
+
+
+def _path_length(graph, path):
+    """Suma de pesos del camino, o None si dos nodos seguidos no están conectados"""
+    total = 0.0
+    for a, b in zip(path, path[1:]):
+        w = graph.adj.get(a, {}).get(b)
+        if w is None:
+            return None
+        total += w
+    return total
+
+
+def compare_routes(report, label, engine, pairs, algorithms=ALTERNATIVES):
+    """Misma distancia que Dijkstra (o ambos sin camino) y caminos válidos en el grafo"""
+    graph = engine.graph
+    for s, e in pairs:
+        expected = _route(engine, s, e, "dijkstra")
+        for algorithm in algorithms:
+            got = _route(engine, s, e, algorithm)
+            name = f"{label}: {algorithm} = dijkstra"
+            if expected is None or got is None:
+                report.check(name, expected is None and got is None, f"{s} -> {e}: conexión distinta")
+                continue
+            path, km = got
+            length = _path_length(graph, path)
+            report.check(name, _same_length(km, expected[1]), f"{s} -> {e}: {km!r} != {expected[1]!r}")
+            report.check(f"{label}: {algorithm} camino válido",
+                         path[0] == s and path[-1] == e and length is not None and _same_length(length, km),
+                         f"{s} -> {e}")
+
+
+def random_pairs(nodes, count, rng):
+    nodes = sorted(nodes)
+    return [tuple(rng.sample(nodes, 2)) for _ in range(count)]
+
+
+def check_routes(report, args, rng):
+    """Red real (o escalada): todos los pares de ciudades y pares aleatorios de nodos"""
+    cities, waypoints, roads = scaled_network(*load_network(NODES_FILE, ROADS_FILE), args.scale)
+    engine = new_network(cities, waypoints, roads, route_cache=0, tree_cache=0).engine
+    engine.ch_file = None
+    city_list = sorted(cities)
+    pairs = [(s, e) for s in city_list for e in city_list if s != e]
+    compare_routes(report, "ciudades", engine, pairs)
+    compare_routes(report, "nodos aleatorios", engine, random_pairs(engine.graph.adj, args.pairs, rng))
+
+
+def synthetic_network(rng, junctions=12, chain_nodes=40, extra_edges=4):
+    """Red pequeña con casos límite de las cadenas: árbol de cruces subdividido en cadenas,
+    algunas aristas extra (ciclos), un callejón sin salida y un ciclo aislado de grado 2"""
+    nodes, roads = {}, []
+    for j in range(junctions):
+        nodes[f"j{j}"] = [rng.uniform(0, 500), rng.uniform(0, 500)]
+    links = [(f"j{j}", f"j{rng.randrange(j)}") for j in range(1, junctions)]
+    links += [tuple(rng.sample(sorted(nodes), 2)) for _ in range(extra_edges)]
+    count = 0
+    for a, b in links:
+        (ax, ay), (bx, by) = nodes[a], nodes[b]
+        pieces = rng.randint(0, chain_nodes // len(links) * 2)
+        prev = a
+        for k in range(1, pieces + 1):
+            t = k / (pieces + 1)
+            name = f"w{count}"
+            count += 1
+            # Un poco de ruido para que los caminos alternativos no empaten
+            nodes[name] = [ax + (bx - ax) * t + rng.uniform(-3, 3), ay + (by - ay) * t + rng.uniform(-3, 3)]
+            roads.append((prev, name))
+            prev = name
+        roads.append((prev, b))
+    # Callejón: cadena que termina en un nodo de grado 1
+    prev = "j0"
+    for k in range(4):
+        name = f"dead{k}"
+        nodes[name] = [nodes["j0"][0] - 10 * (k + 1), nodes["j0"][1] + 7 * (k + 1)]
+        roads.append((prev, name))
+        prev = name
+    # Ciclo aislado: todos sus nodos tienen grado 2 (no hay cruces)
+    for k in range(6):
+        angle = 2 * math.pi * k / 6
+        nodes[f"ring{k}"] = [800 + 40 * math.cos(angle), 800 + 40 * math.sin(angle)]
+    roads += [(f"ring{k}", f"ring{(k + 1) % 6}") for k in range(6)]
+    return nodes, roads
+
+
+def check_synthetic(report, args, rng):
+    """Todos los pares de varias redes pequeñas generadas al azar"""
+    for _ in range(args.networks):
+        nodes, roads = synthetic_network(rng)
+        engine = new_network({}, nodes, roads, route_cache=0, tree_cache=0).engine
+        engine.ch_file = None
+        names = sorted(nodes)
+        pairs = [(s, e) for s in names for e in names if s != e]
+        compare_routes(report, "redes sintéticas", engine, pairs)
+
+
+# ------------------ ÁRBOL DE EXPANSIÓN MÍNIMO ------------------
+# Distribuciones de puntos: al azar, alineados sobre carreteras (conos laterales vacíos,
+# búsquedas cortadas) y grupos separados (fase entre grupos y bosques de varios árboles)
+POINT_KINDS = ("uniforme", "carreteras", "grupos")
+
+
+def random_points(rng, kind, count=300):
+    points = {}
+    if kind == "uniforme":
+        for i in range(count):
+            points[f"p{i}"] = (rng.uniform(0, 600), rng.uniform(0, 600))
+    elif kind == "carreteras":
+        while len(points) < count:
+            x0, y0, x1, y1 = (rng.uniform(0, 600) for _ in range(4))
+            for k in range(rng.randint(5, 40)):
+                t = rng.random()
+                points[f"p{len(points)}"] = (x0 + (x1 - x0) * t + rng.uniform(-0.5, 0.5),
+                                             y0 + (y1 - y0) * t + rng.uniform(-0.5, 0.5))
+    else:
+        centers = [(rng.uniform(0, 1500), rng.uniform(0, 1500)) for _ in range(8)]
+        for i in range(count):
+            cx, cy = rng.choice(centers)
+            points[f"p{i}"] = (cx + rng.gauss(0, 15), cy + rng.gauss(0, 15))
+    return points
+
+
+def brute_force_mst(points, max_distance):
+    """Peso total y componentes del MST de networkx sobre todos los pares a menos de max_distance"""
+    import networkx as nx
+    g = nx.Graph()
+    g.add_nodes_from(points)
+    names = sorted(points)
+    for i, a in enumerate(names):
+        ax, ay = points[a]
+        for b in names[i + 1:]:
+            d = math.hypot(points[b][0] - ax, points[b][1] - ay)
+            if d < max_distance:
+                g.add_edge(a, b, weight=d)
+    forest = nx.minimum_spanning_tree(g)
+    return forest.size(weight="weight"), nx.number_connected_components(forest)
+
+
+def check_mst(report, args, rng):
+    """minimum_spanning_forest (candidatas de Yao) contra el MST de todos los pares"""
+    for i in range(args.point_sets):
+        kind = POINT_KINDS[i % len(POINT_KINDS)]
+        points = random_points(rng, kind)
+        for max_distance in (math.inf, rng.uniform(40, 200)):
+            tree, components = minimum_spanning_forest(points, max_distance)
+            weight, expected_components = brute_force_mst(points, max_distance)
+            label = f"{kind}, max_distance={max_distance:.0f}"
+            report.check("mst: componentes", components == expected_components,
+                         f"{label}: {components} != {expected_components}")
+            report.check("mst: es un bosque", len(tree) == len(points) - components, label)
+            report.check("mst: aristas válidas", all(
+                d < max_distance and _same_length(d, math.dist(points[a], points[b])) for a, b, d in tree), label)
+            total = sum(d for _, _, d in tree)
+            report.check("mst: peso = fuerza bruta", abs(total - weight) <= 1e-6 * max(1.0, weight),
+                         f"{label}: {total!r} != {weight!r}")
+
+
+# ------------------ HISTORIAL ------------------
+def network_state(network):
+    """Estado comparable: nodos, carreteras (con dirección y repeticiones) y grafo del motor"""
+    graph = network.engine.graph
+    return {
+        "cities": {name: tuple(pos) for name, pos in network.cities.items()},
+        "waypoints": {name: tuple(pos) for name, pos in network.waypoints.items()},
+        "roads": Counter(tuple(road) for road in network.roads),
+        "pos": {name: tuple(pos) for name, pos in graph.pos.items()},
+        "adj": {name: {nbr: round(w, 9) for nbr, w in nbrs.items()} for name, nbrs in graph.adj.items()},
+    }
+
+
+def _fresh_adj(network):
+    """Grafo reconstruido desde cero con los nodos y carreteras actuales"""
+    graph = RoadGraph()
+    graph.load(network.nodes, list(network.roads))
+    return {name: {nbr: round(w, 9) for nbr, w in nbrs.items()} for name, nbrs in graph.adj.items()}
+
+
+def _random_edit(network, history, rng, step):
+    """Una acción al azar; devuelve su nombre"""
+    waypoints = sorted(network.waypoints)
+    nodes = sorted(network.nodes)
+    op = rng.choice(("add_waypoint", "move_node", "move_node", "remove_node",
+                     "add_edge", "remove_edge", "connect_neighbors"))
+    if op == "add_waypoint":
+        x, y = network.nodes[rng.choice(nodes)]
+        name = f"check_wp_{step}"
+        with history.action(op):
+            network.add_node(name, [x + rng.uniform(-20, 20), y + rng.uniform(-20, 20)])
+            for _, other in network.engine.spatial_index().k_nearest(*network.nodes[name], 3):
+                if other != name:
+                    network.add_edge(name, other)
+    elif op == "move_node":
+        # Movimientos seguidos del mismo nodo se combinan como al arrastrar con el ratón
+        name = rng.choice(waypoints)
+        for _ in range(rng.randint(1, 3)):
+            x, y = network.nodes[name]
+            with history.action(op, coalesce_key=name):
+                network.move_node(name, [x + rng.uniform(-5, 5), y + rng.uniform(-5, 5)])
+        history.seal()
+    elif op == "remove_node":
+        with history.action(op):
+            network.remove_node(rng.choice(waypoints))
+    elif op == "add_edge":
+        a = rng.choice(nodes)
+        near = [other for _, other in network.engine.spatial_index().k_nearest(*network.nodes[a], 6) if other != a]
+        with history.action(op):
+            network.add_edge(a, rng.choice(near))
+    elif op == "remove_edge":
+        road = network.roads[rng.randrange(len(network.roads))]
+        with history.action(op):
+            network.remove_edge(*road)
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):
+            autoconnect.connect_waypoints_to_neighbors(network, k=2, max_distance=rng.uniform(10, 40))
+    return op
+
+
+class ChangeMirror:
+    """Copia de nodos y carreteras mantenida solo con NetworkStore.changes_since,
+    como la mantiene una vista incremental"""
+
+    def __init__(self, network):
+        self.network = network
+        self.revision = network.revision
+        self.pos, self.edges = self._current()
+
+    def _current(self):
+        graph = self.network.engine.graph
+        return ({name: tuple(pos) for name, pos in graph.pos.items()},
+                {edge_key(a, b) for a, nbrs in graph.adj.items() for b in nbrs})
+
+    def update(self):
+        """Aplica los cambios desde la última llamada; False si el registro pidió reconstruir"""
+        self.revision, changes = self.network.changes_since(self.revision)
+        if changes is None:
+            self.pos, self.edges = self._current()
+            return False
+        graph = self.network.engine.graph
+        nodes, roads = changes
+        for name in nodes:
+            if name in graph.pos:
+                self.pos[name] = tuple(graph.pos[name])
+            else:
+                self.pos.pop(name, None)
+        for a, b in roads:
+            if b in graph.adj.get(a, {}):
+                self.edges.add((a, b))
+            else:
+                self.edges.discard((a, b))
+        return True
+
+    def check(self, report, detail):
+        incremental = self.update()
+        report.check("historial: registro de cambios", incremental and (self.pos, self.edges) == self._current(),
+                     detail)
+
+
+def small_network(history):
+    """Ciudad A y waypoints w1..w3 en fila, con las carreteras A-w1-w2-w3"""
+    network = NetworkStore(RoutingEngine(), {}, {}, {}, RoadStore(), history)
+    network.load({"A": [0, 0]}, {f"w{i}": [10 * i, 0] for i in range(1, 4)},
+                 [("A", "w1"), ("w1", "w2"), ("w2", "w3")])
+    return network
+
+
+def _moves(network, history, name, count, coalesce=True):
+    for i in range(count):
+        x, y = network.nodes[name]
+        with history.action("move_node", coalesce_key=name if coalesce else None):
+            network.move_node(name, [x + 1, y + i])
+
+
+def check_history_cases(report):
+    """Casos puntuales del historial: delta, compensación, combinación, sellado y topes"""
+    # Delta: una acción con todos los tipos de cambio se deshace y rehace entera
+    history = History()
+    network = small_network(history)
+    before = network_state(network)
+    with history.action("mixta"):
+        network.add_node("w4", [40, 5])
+        network.add_edge("w3", "w4")
+        network.move_node("w1", [12, 3])
+        network.remove_edge("A", "w1")
+        network.remove_node("w2")
+    after = network_state(network)
+    history.undo(network)
+    report.check("historial (casos): delta deshacer", network_state(network) == before)
+    history.redo(network)
+    report.check("historial (casos): delta rehacer", network_state(network) == after)
+
+    # Cambios que se compensan dentro de una acción no dejan entrada
+    count = len(history.history)
+    with history.action("nula"):
+        network.add_node("tmp", [1, 1])
+        network.add_edge("tmp", "A")
+        network.remove_node("tmp")
+        x, y = network.nodes["w1"]
+        network.move_node("w1", [x + 5, y])
+        network.move_node("w1", [x, y])
+    report.check("historial (casos): cambios compensados", len(history.history) == count
+                 and network_state(network) == after)
+
+    # Movimientos con la misma clave se combinan; deshacer vuelve a antes del primero
+    history = History()
+    network = small_network(history)
+    before = network_state(network)
+    _moves(network, history, "w1", 5)
+    report.check("historial (casos): combinación", len(history.history) == 1
+                 and len(history.history[0]["delta"]) == 1)
+    history.undo(network)
+    report.check("historial (casos): deshacer combinación", network_state(network) == before)
+
+    # seal(), otra clave, otro tipo o sin clave: entradas separadas
+    history = History()
+    network = small_network(history)
+    _moves(network, history, "w1", 2)
+    history.seal()
+    _moves(network, history, "w1", 2)
+    report.check("historial (casos): sellado", len(history.history) == 2)
+    _moves(network, history, "w2", 2)
+    report.check("historial (casos): otra clave", len(history.history) == 3)
+    with history.action("otro", coalesce_key="w2"):
+        network.move_node("w2", [0, 9])
+    _moves(network, history, "w3", 2, coalesce=False)
+    report.check("historial (casos): otro tipo o sin clave", len(history.history) == 6)
+    _moves(network, history, "w3", 2)
+    history.undo(network)
+    history.redo(network)
+    _moves(network, history, "w3", 1)
+    report.check("historial (casos): deshacer/rehacer sella", len(history.history) == 8)
+
+    # Topes: se descartan las acciones más antiguas y los bytes cuadran
+    for label, kwargs in (("acciones", {"max_actions": 3}), ("memoria", {"max_bytes": 3 * CHANGE_BYTES})):
+        history = History(**kwargs)
+        network = small_network(history)
+        states = []
+        for i in range(5):
+            states.append(network_state(network))
+            _moves(network, history, f"w{i % 3 + 1}", 1, coalesce=False)
+        report.check(f"historial (casos): tope de {label}", len(history.history) == 3
+                     and history.position == 3
+                     and history.bytes == sum(a["delta"].size_bytes() for a in history.history))
+        while history.can_undo():
+            history.undo(network)
+        report.check(f"historial (casos): deshacer tras tope de {label}", network_state(network) == states[2])
+
+    # Una acción más grande que el tope se conserva (siempre queda la última)
+    history = History(max_bytes=CHANGE_BYTES)
+    network = small_network(history)
+    with history.action("grande"):
+        for name in ("w1", "w2", "w3"):
+            network.move_node(name, [0, 7])
+    report.check("historial (casos): acción mayor que el tope", len(history.history) == 1
+                 and history.bytes == 3 * CHANGE_BYTES)
+
+
+def check_history(report, args, rng):
+    """Ediciones al azar; deshacer y rehacer paso a paso deben reproducir cada estado"""
+    check_history_cases(report)
+    cities, waypoints, roads = load_network(NODES_FILE, ROADS_FILE)
+    history = History(max_actions=args.edits + 1, max_bytes=math.inf)
+    network = NetworkStore(RoutingEngine(), {}, {}, {}, RoadStore(), history)
+    network.load(cities, waypoints, roads)
+    city_list = sorted(cities)
+    probe = random_pairs(city_list, 20, rng)
+    original_routes = {pair: _route(network.engine, *pair, "dijkstra") for pair in probe}
+    mirror = ChangeMirror(network)
+
+    # states[i] es el estado con las primeras i acciones del historial aplicadas
+    states = [network_state(network)]
+    for step in range(args.edits):
+        op = _random_edit(network, history, rng, step)
+        del states[history.position:]
+        states.append(network_state(network))
+        report.check("historial: grafo = reconstrucción", states[-1]["adj"] == _fresh_adj(network), op)
+        mirror.check(report, op)
+
+    final = history.position
+    while history.can_undo():
+        action = history.undo(network)
+        report.check("historial: deshacer", network_state(network) == states[history.position],
+                     f"{action['type']} (posición {history.position})")
+        mirror.check(report, f"deshacer {action['type']}")
+    routes = {pair: _route(network.engine, *pair, "dijkstra") for pair in probe}
+    report.check("historial: rutas tras deshacer todo", all(
+        (routes[p] is None) == (original_routes[p] is None)
+        and (routes[p] is None or _same_length(routes[p][1], original_routes[p][1])) for p in probe))
+
+    while history.can_redo():
+        action = history.redo(network)
+        report.check("historial: rehacer", network_state(network) == states[history.position],
+                     f"{action['type']} (posición {history.position})")
+        mirror.check(report, f"rehacer {action['type']}")
+    report.check("historial: rehacer todo", history.position == final)
+
+    # Paseo al azar por el historial
+    for _ in range(args.edits):
+        if history.can_undo() and (not history.can_redo() or rng.random() < 0.5):
+            history.undo(network)
+        else:
+            history.redo(network)
+        report.check("historial: paseo deshacer/rehacer", network_state(network) == states[history.position],
+                     f"posición {history.position}")
+        mirror.check(report, f"paseo (posición {history.position})")
+
+
+# ------------------ ESCENA ------------------
+def scene_problems(scene):
+    """Diferencias entre la escena y la red: trazos que no cubren cada carretera una
+    sola vez, ítems de más o de menos e ítems a la vista sin colocar"""
+    graph, layer = scene.graph, scene.layer
+    problems = []
+    segments = [edge_key(a, b) for stroke in layer.strokes.values() for a, b in zip(stroke, stroke[1:])]
+    edges = {edge_key(a, b) for a, nbrs in graph.adj.items() for b in nbrs}
+    if len(segments) != len(edges) or set(segments) != edges:
+        problems.append("trazos != carreteras")
+    if any(layer.points[i] != [tuple(graph.pos[n]) for n in stroke] for i, stroke in layer.strokes.items()):
+        problems.append("trazo con posiciones viejas")
+    if set(scene.road_items) != set(layer.strokes):
+        problems.append("ítems de carretera != trazos")
+    if set(scene.node_items) != {n for n in graph.pos if n not in scene.cities}:
+        problems.append("ítems de waypoint != waypoints")
+    if set(scene.city_items) != {c for c in scene.cities if c in graph.pos}:
+        problems.append("ítems de ciudad != ciudades")
+    rect = scene.viewport()
+    if not set(layer.index.query_rect(*rect)) <= scene._fresh["road"]:
+        problems.append("carretera a la vista sin colocar")
+    if not set(graph.spatial_index().in_rect(*rect)) & set(scene.node_items) <= scene._fresh["waypoint"]:
+        problems.append("waypoint a la vista sin colocar")
+    return problems
+
+
+def check_scene(report, args, rng):
+    """Ediciones, deshacer y rehacer al azar; la escena se actualiza solo con el registro
+    de cambios de la red y debe quedar igual que recién construida"""
+    from gui.scene import MapScene
+
+    cities, waypoints, roads = load_network(NODES_FILE, ROADS_FILE)
+    history = History(max_actions=args.edits + 1, max_bytes=math.inf)
+    network = NetworkStore(RoutingEngine(), {}, {}, {}, RoadStore(), history)
+    network.load(cities, waypoints, roads)
+    graph = network.engine.graph
+    scene = MapScene(VirtualCanvas())
+    scene.sync(graph, network.cities, network)
+    scene.set_view(0.6, (0, 0), VIEW_SIZE)
+    items = scene.road_items
+    for step in range(args.edits):
+        roll = rng.random()
+        if roll < 0.15 and history.can_undo():
+            op = "deshacer " + history.undo(network)["type"]
+        elif roll < 0.25 and history.can_redo():
+            op = "rehacer " + history.redo(network)["type"]
+        else:
+            op = _random_edit(network, history, rng, step)
+        scene.sync(graph, network.cities, network)
+        report.check("escena: actualización incremental", scene.road_items is items, op)
+        problems = scene_problems(scene)
+        report.check("escena: igual a la red", not problems, f"{op}: {', '.join(problems)}")
+
+    # Una carga completa sí recrea la escena
+    network.load(cities, waypoints, roads)
+    scene.sync(graph, network.cities, network)
+    report.check("escena: carga completa recrea", scene.road_items is not items and not scene_problems(scene))
+
+
+CHECKS = {"routes": check_routes, "synthetic": check_synthetic, "mst": check_mst, "history": check_history,
+          "scene": check_scene}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Equivalencia de algoritmos de ruta y del historial")
+    parser.add_argument("--pairs", type=int, default=3000, help="pares aleatorios de nodos en la red real")
+    parser.add_argument("--networks", type=int, default=10, help="redes sintéticas pequeñas")
+    parser.add_argument("--point-sets", type=int, default=20, help="conjuntos de puntos al azar para el MST")
+    parser.add_argument("--edits", type=int, default=300, help="ediciones al azar para el historial")
+    parser.add_argument("--scale", type=int, default=1, help="factor de tamaño de la red (ver bench_suite)")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--only", choices=tuple(CHECKS), help="ejecutar solo una comprobación")
+    args = parser.parse_args()
+
+    report = Report()
+    for name, check in CHECKS.items():
+        if args.only and args.only != name:
+            continue
+        check(report, args, random.Random(args.seed))
+    ok = report.print()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 # ciudades.py
-import math
+from data.geometry import point_distance
 
 # ------------------ 1. DEFINICIÓN DE DATOS ------------------
 
@@ -213,11 +213,10 @@ waypoints = {
 all_nodes = {**original_cities, **waypoints}
 
 # ------------------ 3. FUNCIONES AUXILIARES ------------------
+# Envoltorios escalares; los cálculos por lotes están en data/geometry.py
 def distance(a, b): 
-    # Calculamos la distancia en píxeles
-    dist_pixeles = math.hypot(a[0] - b[0], a[1] - b[1])
-    
-    return dist_pixeles * 0.81
+    # Distancia en píxeles convertida a km (ESCALA_KM en data/geometry.py)
+    return point_distance(a, b)
 
 def distance_between_nodes(node1, node2):
     """Calcula la distancia entre dos nodos usando sus coordenadas reales"""
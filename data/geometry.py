@@ -0,0 +1,93 @@
+# geometry.py
+# Núcleos de geometría: versión escalar (math) y versión vectorizada (NumPy) por lotes
+import math
+
+# Kilómetros reales por píxel del mapa original (sin zoom ni desplazamiento)
+ESCALA_KM = 0.81
+
+# NumPy se importa al primer cálculo por lotes; el motor de rutas no lo necesita
+np = None
+
+
+def _numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+# ------------------ ESCALAR ------------------
+def point_distance(a, b):
+    """Distancia en km entre dos puntos (x, y) del mapa"""
+    return math.hypot(a[0] - b[0], a[1] - b[1]) * ESCALA_KM
+
+
+# ------------------ POR LOTES ------------------
+def pairwise_distances(a, b):
+    """Bloque (len(a), len(b)) de distancias en km entre dos conjuntos de puntos"""
+    _numpy()
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    dx = a[:, 0, None] - b[None, :, 0]
+    dy = a[:, 1, None] - b[None, :, 1]
+    return np.hypot(dx, dy) * ESCALA_KM
+
+
+class Coordinates:
+    """Coordenadas de nodos en un arreglo contiguo (N, 2) con índice por nombre"""
+
+    def __init__(self, nodes):
+        _numpy()
+        self.names = list(nodes)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.xy = np.ascontiguousarray(
+            np.array([nodes[name] for name in self.names], dtype=np.float64).reshape(-1, 2))
+
+    def __len__(self):
+        return len(self.names)
+
+    def rows(self, names):
+        """Filas del arreglo correspondientes a names"""
+        return np.fromiter((self.index[name] for name in names), dtype=np.intp)
+
+    def pairwise(self, rows_a, rows_b):
+        return pairwise_distances(self.xy[rows_a], self.xy[rows_b])
+
+    def nearest(self, source_rows, target_rows, max_distance=math.inf, block=1024):
+        """Para cada fila de origen, la fila destino más cercana a menos de max_distance
+
+        Devuelve (filas, km) con -1 / inf donde no hay ninguna. Se procesa por bloques
+        de filas para acotar la memoria en redes grandes.
+        """
+        source_rows = np.asarray(source_rows)
+        target_rows = np.asarray(target_rows)
+        best = np.full(len(source_rows), -1, dtype=np.intp)
+        best_d = np.full(len(source_rows), np.inf)
+        if len(target_rows) == 0:
+            return best, best_d
+        for start in range(0, len(source_rows), block):
+            d = self.pairwise(source_rows[start:start + block], target_rows)
+            # Un nodo nunca es su propio vecino
+            d[source_rows[start:start + block, None] == target_rows[None, :]] = np.inf
+            arg = np.argmin(d, axis=1)
+            dmin = d[np.arange(len(arg)), arg]
+            ok = dmin < max_distance
+            best[start:start + block][ok] = target_rows[arg[ok]]
+            best_d[start:start + block][ok] = dmin[ok]
+        return best, best_d
+
+    def pairs_within(self, radius, rows=None, block=1024):
+        """Todos los pares i < j a menos de radius km como arreglos (i, j, km)"""
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        out_i, out_j, out_d = [], [], []
+        for start in range(0, len(rows), block):
+            d = self.pairwise(rows[start:start + block], rows)
+            i, j = np.nonzero(d < radius)
+            keep = j > i + start
+            out_i.append(rows[i[keep] + start])
+            out_j.append(rows[j[keep]])
+            out_d.append(d[i[keep], j[keep]])
+        if not out_i:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0)
+        return np.concatenate(out_i), np.concatenate(out_j), np.concatenate(out_d)
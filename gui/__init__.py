@@ -0,0 +1 @@
+# Capas de dibujo del mapa; no importan tkinter para poder usarse sin ventana
@@ -0,0 +1,72 @@
+# animation.py
+# Trazado animado de rutas repartido en cuadros, sin time.sleep ni root.update()
+import math
+import time
+
+from routing.metrics import metrics
+
+FRAME_MS = 16
+DURATION_MS = 600
+# Fracción del cuadro que puede ocupar el dibujo; el resto queda para eventos de Tk
+FRAME_BUDGET = 0.5
+
+
+class PathAnimator:
+    """Dibuja los tramos de una ruta en DURATION_MS repartidos en cuadros de FRAME_MS
+
+    schedule/cancel son root.after/root.after_cancel. Cada cuadro dibuja su cuota de
+    tramos, pero se corta antes si supera FRAME_BUDGET del cuadro.
+    """
+
+    def __init__(self, schedule, cancel, frame_ms=FRAME_MS, duration_ms=DURATION_MS):
+        self.schedule = schedule
+        self.cancel = cancel
+        self.frame_ms = frame_ms
+        self.duration_ms = duration_ms
+        self._job = None
+        self._finish = None
+
+    @property
+    def running(self):
+        return self._job is not None
+
+    def start(self, count, draw, on_finish=None):
+        """Anima count tramos llamando draw(i) para cada uno y on_finish() al terminar"""
+        self.stop()
+        per_frame = max(1, math.ceil(count * self.frame_ms / self.duration_ms))
+        budget = self.frame_ms * FRAME_BUDGET / 1000
+        state = {"next": 0, "start": time.perf_counter()}
+        self._finish = on_finish
+
+        def frame():
+            started = time.perf_counter()
+            deadline = started + budget
+            i = state["next"]
+            end = min(count, i + per_frame)
+            while i < end:
+                draw(i)
+                i += 1
+                if time.perf_counter() > deadline:
+                    break
+            state["next"] = i
+            metrics.record("animation_frame", time.perf_counter() - started)
+            if i < count:
+                self._job = self.schedule(self.frame_ms, frame)
+            else:
+                self._job = None
+                metrics.record("animation", time.perf_counter() - state["start"])
+                self._done()
+
+        self._job = self.schedule(0, frame)
+
+    def _done(self):
+        finish, self._finish = self._finish, None
+        if finish:
+            finish()
+
+    def stop(self):
+        """Detiene la animación sin llamar a on_finish"""
+        if self._job is not None:
+            self.cancel(self._job)
+            self._job = None
+        self._finish = None
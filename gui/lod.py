@@ -0,0 +1,149 @@
+# lod.py
+# Capa de carreteras con recorte por ventana visible y nivel de detalle según el zoom
+import math
+
+from routing.graph import edge_key
+from routing.shapes import douglas_peucker
+from routing.spatial import SegmentIndex
+
+# Segmentos máximos por trazo: trazos cortos recortan mejor contra la ventana
+MAX_STROKE_SEGMENTS = 48
+# Tolerancia de simplificación en píxeles de pantalla
+LOD_TOLERANCE_PX = 3.0
+
+
+def build_strokes(adj, pos, max_segments=MAX_STROKE_SEGMENTS):
+    """Cubre todas las carreteras con trazos continuos (polilíneas de nodos)
+
+    Cada trazo sigue aristas no usadas y en cada cruce continúa por la más recta,
+    así miles de segmentos sueltos quedan en unos cientos de polilíneas.
+    """
+    used = set()
+    strokes = []
+
+    def key(a, b):
+        return (a, b) if a <= b else (b, a)
+
+    def free(node):
+        return [n for n in adj[node] if key(node, n) not in used]
+
+    def extend(stroke):
+        while len(stroke) <= max_segments:
+            prev, cur = stroke[-2], stroke[-1]
+            options = free(cur)
+            if not options:
+                return
+            px, py = pos[prev]
+            cx, cy = pos[cur]
+            heading = math.atan2(cy - py, cx - px)
+
+            def turn(n):
+                nx_, ny_ = pos[n]
+                diff = abs(math.atan2(ny_ - cy, nx_ - cx) - heading)
+                return min(diff, 2 * math.pi - diff)
+
+            nxt = min(options, key=turn)
+            used.add(key(cur, nxt))
+            stroke.append(nxt)
+
+    # Se empieza por los extremos (grado impar) para minimizar el número de trazos
+    starts = sorted(adj, key=lambda n: len(adj[n]) % 2 == 0)
+    for node in starts:
+        while True:
+            options = free(node)
+            if not options:
+                break
+            first = options[0]
+            used.add(key(node, first))
+            stroke = [node, first]
+            extend(stroke)
+            strokes.append(stroke)
+    return strokes
+
+
+class RoadLayer:
+    """Trazos de carreteras indexados espacialmente, con id estable por trazo
+
+    Con shapes (routing.shapes.RoadShapes) cada tramo sigue el dibujo real de la
+    carretera; la simplificación por nivel de zoom es Douglas–Peucker. Una edición
+    rehace solo los trazos que pasan por las carreteras afectadas (ver update).
+    """
+
+    def __init__(self, shapes=None):
+        self.shapes = shapes
+        self.strokes = {}
+        self.points = {}
+        self.index = SegmentIndex()
+        # Clave no dirigida de cada carretera -> id del trazo que la cubre
+        self._edge_stroke = {}
+        self._next = 0
+        self._lod = {}
+
+    def rebuild(self, graph):
+        """Rehace todos los trazos; devuelve sus ids"""
+        self.strokes.clear()
+        self.points.clear()
+        self.index.clear()
+        self._edge_stroke.clear()
+        self._lod = {}
+        return self._add(build_strokes(graph.adj, graph.pos), graph.pos)
+
+    def update(self, graph, nodes=(), roads=()):
+        """Rehace los trazos que pasan por las carreteras roads o por los nodos nodes
+        (movidos); devuelve (ids quitados, ids nuevos)"""
+        adj = graph.adj
+        keys = set(roads)
+        for name in nodes:
+            keys.update(edge_key(name, nbr) for nbr in adj.get(name, ()))
+        removed = {self._edge_stroke[key] for key in keys if key in self._edge_stroke}
+        for i in removed:
+            stroke = self.strokes.pop(i)
+            del self.points[i]
+            self.index.remove(i)
+            for cache in self._lod.values():
+                cache.pop(i, None)
+            for a, b in zip(stroke, stroke[1:]):
+                key = edge_key(a, b)
+                del self._edge_stroke[key]
+                keys.add(key)
+        # Las carreteras sueltas que siguen en el grafo se vuelven a trazar juntas
+        free = {}
+        for a, b in keys:
+            if b in adj.get(a, ()):
+                free.setdefault(a, set()).add(b)
+                free.setdefault(b, set()).add(a)
+        return removed, self._add(build_strokes(free, graph.pos), graph.pos)
+
+    def _add(self, strokes, pos):
+        ids = []
+        for stroke in strokes:
+            i = self._next
+            self._next += 1
+            self.strokes[i] = stroke
+            self.points[i] = pts = self._stroke_points(stroke, pos)
+            self.index.insert(i, pts)
+            for a, b in zip(stroke, stroke[1:]):
+                self._edge_stroke[edge_key(a, b)] = i
+            ids.append(i)
+        return ids
+
+    def _stroke_points(self, stroke, pos):
+        if self.shapes is None:
+            return [tuple(pos[n]) for n in stroke]
+        return self.shapes.path_points(stroke, pos)
+
+    def _level(self, zoom):
+        """Nivel de detalle discreto: cada nivel duplica la tolerancia en el mapa"""
+        return int(math.floor(math.log2(LOD_TOLERANCE_PX / zoom)))
+
+    def simplified(self, i, zoom):
+        level = self._level(zoom)
+        cache = self._lod.setdefault(level, {})
+        pts = cache.get(i)
+        if pts is None:
+            pts = cache[i] = douglas_peucker(self.points[i], 2.0 ** level)
+        return pts
+
+    def visible(self, rect, zoom):
+        """Polilíneas (en coordenadas del mapa) que tocan rect = (x0, y0, x1, y1)"""
+        return [self.simplified(i, zoom) for i in sorted(self.index.query_rect(*rect))]
@@ -0,0 +1,366 @@
+# scene.py
+# Escena retenida del mapa: los ítems del canvas se crean una vez y luego solo se
+# mueven (pan), se recolocan (zoom), se reconfiguran (selección) o se reemplazan uno
+# a uno (edición)
+from gui.lod import RoadLayer
+from routing.metrics import metrics
+
+NODE_RADIUS = 7
+DEFAULT_COLORS = {
+    "road": "#393E46",
+    "path": "#3498db",
+    "waypoint": "#2ecc71",
+    "city": "#E21717",
+    "selected": "#f39c12",
+    "start": "#2ecc71",
+    "end": "#e74c3c",
+}
+
+
+def _flatten(points):
+    coords = []
+    for x, y in points:
+        coords.append(x)
+        coords.append(y)
+    return coords
+
+
+class MapScene:
+    """Capas de carreteras, waypoints, ciudades, selección y ruta sobre un canvas
+
+    Todas las capas llevan la etiqueta "scene", así un desplazamiento es un único
+    canvas.move. Carreteras y waypoints se recortan a la vista: solo se recolocan los
+    ítems que entran en ella (self._fresh guarda los que ya están al día). Las
+    ediciones llegan por el registro de cambios de la red y tocan solo sus ítems.
+    """
+
+    def __init__(self, canvas, colors=None, margin=20, shapes=None):
+        self.canvas = canvas
+        self.colors = {**DEFAULT_COLORS, **(colors or {})}
+        self.margin = margin
+        self.shapes = shapes
+        self.layer = RoadLayer(shapes)
+        self.graph = None
+        self.cities = {}
+        self.zoom = None
+        self.offset = (0, 0)
+        self.size = (0, 0)
+        self.show = {"road": True, "waypoint": True}
+        self.road_items = {}
+        self.node_items = {}
+        self.city_items = {}
+        self._fresh = {"road": set(), "waypoint": set()}
+        # Grafo y ciudades de la última reconstrucción, versión y revisión del registro
+        self._identity = None
+        self._version = None
+        self._revision = 0
+        self.tiles = None
+        self.selected = None
+        self._path = (None, None, None)
+
+    # ------------------ TRANSFORMACIÓN ------------------
+    def screen(self, x, y):
+        """Coordenadas del mapa a pantalla para la vista actual"""
+        return x * self.zoom + self.offset[0], y * self.zoom + self.offset[1]
+
+    def viewport(self):
+        """Rectángulo visible (más el margen) en coordenadas del mapa"""
+        z, (ox, oy), (w, h), m = self.zoom, self.offset, self.size, self.margin
+        return (-m - ox) / z, (-m - oy) / z, (w + m - ox) / z, (h + m - oy) / z
+
+    def _waypoint_radius(self):
+        return max(3, min(NODE_RADIUS * self.zoom * 0.7, 8))
+
+    def _city_radius(self):
+        return max(5, min(NODE_RADIUS * self.zoom, 12))
+
+    # ------------------ CONTENIDO ------------------
+    def sync(self, graph, cities, store=None):
+        """Pone los ítems al día con la red; devuelve True si cambió algo
+
+        Con store (routing.store.NetworkStore) solo se tocan los ítems de los nodos y
+        carreteras editados desde la última sincronización; todo se recrea si cambian
+        el grafo o las ciudades, o si el registro de cambios pide reconstruir. Sin
+        store cualquier cambio de versión recrea todo.
+        """
+        if (id(graph), tuple(cities)) == self._identity:
+            if store is None:
+                if graph.version == self._version:
+                    return False
+            else:
+                self._revision, changes = store.changes_since(self._revision)
+                if changes is not None:
+                    self._version = graph.version
+                    return self._apply(*changes)
+        self._rebuild(graph, cities, store)
+        return True
+
+    def _rebuild(self, graph, cities, store):
+        self._identity = (id(graph), tuple(cities))
+        self._version = graph.version
+        self._revision = store.revision if store is not None else 0
+        self.graph, self.cities = graph, cities
+        c = self.canvas
+        c.delete("content")
+        self.road_items, self.node_items, self.city_items = {}, {}, {}
+        with metrics.timer("road_strokes"):
+            roads = self.layer.rebuild(graph)
+
+        # En orden de apilado: carreteras, waypoints y ciudades
+        self.road_items.update((i, self._new_road()) for i in roads)
+        self.node_items.update((name, self._new_waypoint()) for name in graph.pos if name not in cities)
+        self.city_items.update((city, self._new_city(city)) for city in cities if city in graph.pos)
+        c.tag_raise("selection")
+        c.tag_raise("path")
+        metrics.count("canvas_items", len(self.road_items) + len(self.node_items) + 3 * len(self.city_items))
+
+        for fresh in self._fresh.values():
+            fresh.clear()
+        if self.zoom is not None:
+            self._place_cities(restyle=True)
+            self._reveal()
+            self._place_selection()
+            self._place_path()
+
+    def _apply(self, nodes, roads):
+        """Reemplaza los trazos afectados y crea, borra u oculta los nodos cambiados;
+        _reveal coloca lo nuevo que quede a la vista"""
+        if not nodes and not roads:
+            return False
+        c = self.canvas
+        graph = self.graph
+        with metrics.timer("road_strokes"):
+            removed, added = self.layer.update(graph, nodes, roads)
+        for i in removed:
+            c.delete(self.road_items.pop(i))
+            self._fresh["road"].discard(i)
+        for i in added:
+            self.road_items[i] = self._new_road()
+        created = len(added)
+
+        cities = False
+        for name in nodes:
+            if name in self.cities:
+                # Pocas ciudades: se recolocan todas (_place_cities)
+                cities = True
+                if name not in graph.pos:
+                    c.delete(*self.city_items.pop(name, ()))
+                elif name not in self.city_items:
+                    self.city_items[name] = self._new_city(name)
+                    created += 3
+                continue
+            item = self.node_items.get(name)
+            self._fresh["waypoint"].discard(name)
+            if name not in graph.pos:
+                if item is not None:
+                    c.delete(self.node_items.pop(name))
+            elif item is None:
+                self.node_items[name] = self._new_waypoint()
+                created += 1
+            else:
+                c.itemconfigure(item, state="hidden")
+        metrics.count("canvas_items", created)
+
+        if self.zoom is not None:
+            if cities:
+                self._place_cities(restyle=True)
+            self._reveal(added, [name for name in nodes if name in self.node_items])
+            self._place_selection()
+            self._place_path()
+        return True
+
+    def _new_road(self):
+        c = self.canvas
+        item = c.create_line(0, 0, 0, 0, fill=self.colors["road"], width=4, capstyle="round",
+                             joinstyle="round", tags=("scene", "content", "road"), state="hidden")
+        # Debajo de los nodos aunque se cree después (tag_lower usa el más bajo de la etiqueta)
+        if self.node_items:
+            c.tag_lower(item, "waypoint")
+        elif self.city_items:
+            c.tag_lower(item, "city")
+        return item
+
+    def _new_waypoint(self):
+        c = self.canvas
+        item = c.create_oval(0, 0, 0, 0, fill=self.colors["waypoint"], outline="white", width=1,
+                             tags=("scene", "content", "waypoint"), state="hidden")
+        if self.city_items:
+            c.tag_lower(item, "city")
+        return item
+
+    def _new_city(self, city):
+        c = self.canvas
+        tags = ("scene", "content", "city")
+        oval = c.create_oval(0, 0, 0, 0, fill=self.colors["city"], outline="white", width=2, tags=tags)
+        shadow = c.create_text(0, 0, text=city, fill="white", tags=tags)
+        label = c.create_text(0, 0, text=city, fill="black", tags=tags)
+        return oval, shadow, label
+
+    def set_layers(self, roads=True, waypoints=True):
+        """Muestra u oculta capas completas sin recrear sus ítems"""
+        changed = False
+        for tag, visible in (("road", roads), ("waypoint", waypoints)):
+            if self.show[tag] == visible:
+                continue
+            self.show[tag] = visible
+            changed = True
+            if not visible:
+                self.canvas.itemconfigure(tag, state="hidden")
+                self._fresh[tag].clear()
+        if changed and self.zoom is not None:
+            self._reveal()
+
+    # ------------------ VISTA ------------------
+    def set_view(self, zoom, offset, size):
+        """Desplazar es un canvas.move; cambiar el zoom recoloca solo lo visible"""
+        if zoom == self.zoom:
+            dx, dy = offset[0] - self.offset[0], offset[1] - self.offset[1]
+            if not dx and not dy and size == self.size:
+                return
+            self.offset, self.size = offset, size
+            if dx or dy:
+                self.canvas.move("scene", dx, dy)
+            self._place_background()
+            self._place_cities()
+            self._reveal()
+            return
+
+        self.zoom, self.offset, self.size = zoom, offset, size
+        for tag, fresh in self._fresh.items():
+            self.canvas.itemconfigure(tag, state="hidden")
+            fresh.clear()
+        self._place_background()
+        self._place_cities(restyle=True)
+        self._reveal()
+        self._place_selection()
+        self._place_path()
+
+    def _reveal(self, roads=None, waypoints=None):
+        """Recoloca y muestra los ítems de la vista que no están al día; con roads o
+        waypoints solo se revisan esos (los que tocó una edición)"""
+        if self.graph is None:
+            return
+        c = self.canvas
+        rect = self.viewport()
+        if self.show["road"]:
+            fresh = self._fresh["road"]
+            index = self.layer.index
+            ids = index.query_rect(*rect) if roads is None else [i for i in roads if index.touches(i, *rect)]
+            for i in ids:
+                if i in fresh:
+                    continue
+                item = self.road_items[i]
+                c.coords(item, *_flatten(self.screen(x, y) for x, y in self.layer.simplified(i, self.zoom)))
+                c.itemconfigure(item, state="normal")
+                fresh.add(i)
+        if self.show["waypoint"]:
+            fresh = self._fresh["waypoint"]
+            r = self._waypoint_radius()
+            pos = self.graph.pos
+            if waypoints is None:
+                names = self.graph.spatial_index().in_rect(*rect)
+            else:
+                x0, y0, x1, y1 = rect
+                names = [n for n in waypoints if n in pos and x0 <= pos[n][0] <= x1 and y0 <= pos[n][1] <= y1]
+            for name in names:
+                item = self.node_items.get(name)
+                if item is None or name in fresh:
+                    continue
+                x, y = self.screen(*pos[name])
+                c.coords(item, x - r, y - r, x + r, y + r)
+                c.itemconfigure(item, state="normal")
+                fresh.add(name)
+
+    def _place_cities(self, restyle=False):
+        c = self.canvas
+        r = self._city_radius()
+        font = ("Segoe UI", int(9 * self.zoom + 5), "bold")
+        for city, (oval, shadow, label) in self.city_items.items():
+            x, y = self.screen(*self.graph.pos[city])
+            c.coords(oval, x - r, y - r, x + r, y + r)
+            offset_y = y - r - 10
+            if city == "Maracaibo" and y < 50:
+                offset_y = y + r + 15
+            c.coords(shadow, x + 1, offset_y + 1)
+            c.coords(label, x, offset_y)
+            if restyle:
+                c.itemconfigure(shadow, font=font)
+                c.itemconfigure(label, font=font)
+
+    # ------------------ FONDO ------------------
+    def set_tiles(self, tiles):
+        """Capa de teselas del mapa (gui.tiles.TileLayer) que se dibuja bajo la escena"""
+        if self.tiles is not None:
+            self.tiles.clear()
+        self.tiles = tiles
+        self._place_background()
+
+    def _place_background(self, quality="fast"):
+        if self.tiles is not None and self.zoom is not None:
+            self.tiles.place(self.zoom, self.offset, self.size, quality)
+
+    def refine(self):
+        """Pasa el fondo a alta calidad cuando el zoom deja de cambiar"""
+        if self.tiles is not None:
+            self.tiles.refine()
+
+    # ------------------ SELECCIÓN Y RUTA ------------------
+    def select(self, node):
+        """Cambia la selección tocando solo los ítems del resaltado"""
+        if node == self.selected:
+            return
+        self.selected = node
+        self._place_selection()
+
+    def _place_selection(self):
+        c = self.canvas
+        c.delete("selection")
+        node = self.selected
+        if node is None or self.graph is None or node not in self.graph.pos or self.zoom is None:
+            return
+        x, y = self.screen(*self.graph.pos[node])
+        tags = ("scene", "selection")
+        if node in self.city_items:
+            r = self._city_radius()
+            c.create_oval(x - r - 3, y - r - 3, x + r + 3, y + r + 3, fill=self.colors["selected"],
+                          outline="white", width=3, tags=tags)
+            c.tag_raise(self.city_items[node][0])
+            metrics.count("canvas_items")
+        else:
+            # El waypoint seleccionado se ve aunque su capa esté oculta por el zoom
+            r = self._waypoint_radius()
+            c.create_oval(x - r - 2, y - r - 2, x + r + 2, y + r + 2, fill=self.colors["selected"],
+                          outline="white", width=2, tags=tags)
+            c.create_oval(x - r, y - r, x + r, y + r, fill=self.colors["waypoint"],
+                          outline="white", width=1, tags=tags)
+            metrics.count("canvas_items", 2)
+        c.tag_raise("path")
+
+    def set_path(self, path, start=None, end=None):
+        """Ruta resaltada; solo se redibuja si cambió la ruta o sus extremos"""
+        if self._path[0] is path and self._path[1:] == (start, end):
+            return
+        self._path = (path, start, end)
+        self._place_path()
+
+    def _place_path(self):
+        c = self.canvas
+        c.delete("path")
+        path, start, end = self._path
+        if not path or self.graph is None or self.zoom is None:
+            return
+        pos = self.graph.pos
+        nodes = [n for n in path if n in pos]
+        points = self.shapes.path_points(nodes, pos) if self.shapes else [pos[n] for n in nodes]
+        coords = _flatten(self.screen(x, y) for x, y in points)
+        tags = ("scene", "path")
+        if len(coords) >= 4:
+            c.create_line(*coords, fill="white", width=10, capstyle="round", joinstyle="round", tags=tags)
+            c.create_line(*coords, fill=self.colors["path"], width=8, capstyle="round",
+                          joinstyle="round", tags=tags)
+            metrics.count("canvas_items", 2)
+        for node, color in ((start, self.colors["start"]), (end, self.colors["end"])):
+            if node in pos:
+                x, y = self.screen(*pos[node])
+                c.create_oval(x - 15, y - 15, x + 15, y + 15, fill=color, outline="white", width=4, tags=tags)
+                metrics.count("canvas_items")
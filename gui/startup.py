@@ -0,0 +1,110 @@
+# startup.py
+# Arranque en dos fases: la ventana aparece primero y la red, los trazados y el mapa
+# se cargan en un hilo aparte informando el progreso
+import os
+import queue
+import threading
+import time
+
+from routing.loader import DRAWINGS_FILE, NODES_FILE, ROADS_FILE, load_network
+from routing.metrics import metrics
+from routing.shapes import RoadShapes
+
+POLL_MS = 30
+
+
+def load_resources(network, map_image, progress=None, nodes_file=NODES_FILE,
+                   roads_file=ROADS_FILE, drawings_file=DRAWINGS_FILE, zoom=None):
+    """Carga todo lo que la aplicación necesita al arrancar (sin tocar Tk)
+
+    Con zoom se deja generado el nivel de la pirámide que usará la primera vista.
+    Devuelve {"shapes", "pyramid", "timings", "errors"}: timings son los ms de cada
+    paso y errors los mensajes de los pasos que fallaron (la aplicación sigue sin ellos).
+    """
+    result = {"shapes": RoadShapes(), "pyramid": None, "timings": {}, "errors": {}}
+
+    def step(name, label, work):
+        if progress:
+            progress(label)
+        start = time.perf_counter()
+        try:
+            work()
+        except Exception as e:
+            result["errors"][name] = str(e)
+        elapsed = time.perf_counter() - start
+        result["timings"][name] = round(elapsed * 1000, 1)
+        metrics.record(f"startup_{name}", elapsed)
+
+    def read_network():
+        cities, waypoints, roads = load_network(nodes_file, roads_file)
+        # Solo se actualizan las ciudades conocidas; el motor se construye una sola vez
+        network.load({c: p for c, p in cities.items() if c in network.cities}, waypoints, roads)
+
+    def read_shapes():
+        shapes = RoadShapes.from_file(drawings_file)
+        shapes.link(network.engine.graph)
+        result["shapes"] = shapes
+
+    def read_map():
+        from gui.tiles import TilePyramid
+
+        if not os.path.exists(map_image):
+            raise FileNotFoundError(f"No existe {map_image}")
+        pyramid = TilePyramid(map_image)
+        if zoom is not None:
+            pyramid.build(pyramid.level_for(zoom))
+        result["pyramid"] = pyramid
+
+    step("network", "Cargando red vial...", read_network)
+    step("shapes", "Enlazando trazados de carreteras...", read_shapes)
+    step("map", "Preparando el mapa...", read_map)
+    return result
+
+
+class StartupLoader:
+    """Ejecuta load_resources (u otra tarea) en un hilo y devuelve el resultado al hilo de Tk
+
+    schedule(ms, callback) es root.after. task(progress) corre en segundo plano;
+    on_progress(texto), on_done(resultado) y on_error(excepción) se llaman en el hilo de Tk.
+    """
+
+    def __init__(self, schedule, poll_ms=POLL_MS):
+        self.schedule = schedule
+        self.poll_ms = poll_ms
+        self._events = queue.SimpleQueue()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, task, on_done, on_progress=None, on_error=None):
+        events = self._events
+
+        def run():
+            try:
+                events.put(("done", task(lambda text: events.put(("progress", text)))))
+            except Exception as e:
+                events.put(("error", e))
+
+        def poll():
+            while True:
+                try:
+                    kind, value = events.get_nowait()
+                except queue.Empty:
+                    self.schedule(self.poll_ms, poll)
+                    return
+                if kind == "progress":
+                    if on_progress:
+                        on_progress(value)
+                elif kind == "done":
+                    on_done(value)
+                    return
+                else:
+                    if on_error:
+                        on_error(value)
+                    return
+
+        self._thread = threading.Thread(target=run, name="startup", daemon=True)
+        self._thread.start()
+        self.schedule(self.poll_ms, poll)
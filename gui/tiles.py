@@ -0,0 +1,292 @@
+# tiles.py
+# Pirámide de teselas del mapa con caché en disco y LRU de PhotoImage
+import json
+import math
+import os
+import shutil
+import sys
+import threading
+
+from routing.cache import LRUCache
+from routing.loader import files_hash
+from routing.metrics import metrics
+
+TILE_SIZE = 256
+# Niveles de la pirámide (escala respecto a la imagen original); con zoom > 1 se
+# amplía el nivel 1.0
+LEVELS = (0.125, 0.25, 0.5, 1.0)
+MANIFEST = "manifest.json"
+# Teselas decodificadas (PIL) y teselas listas para Tk que se conservan en memoria
+SOURCE_CACHE_SIZE = 96
+PHOTO_CACHE_SIZE = 128
+# Espera entre comprobaciones de un nivel que se genera en segundo plano
+BUILD_POLL_MS = 50
+APP_CACHE = "gps_venezuela"
+
+
+def user_cache_dir():
+    """Carpeta de caché del usuario (persistente, también con el ejecutable de PyInstaller,
+    cuyos recursos se extraen a una carpeta temporal en cada arranque)"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(r"~\AppData\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, APP_CACHE)
+
+
+def tile_dir_for(image_path):
+    """Carpeta de teselas de una imagen: mapa_venezuela.png -> <caché del usuario>/mapa_venezuela_tiles"""
+    root, _ = os.path.splitext(os.path.basename(image_path))
+    return os.path.join(user_cache_dir(), root + "_tiles")
+
+
+class TilePyramid:
+    """Teselas de la imagen del mapa a escalas fijas, generadas una vez y guardadas en disco
+
+    Cada nivel se genera una sola vez (build, que puede correr en otro hilo); el
+    manifiesto guarda el hash de la imagen original y la caché se descarta si la
+    imagen cambia.
+    """
+
+    def __init__(self, image_path, cache_dir=None, tile_size=TILE_SIZE, levels=LEVELS):
+        from PIL import Image
+
+        self.image_path = image_path
+        self.cache_dir = cache_dir or tile_dir_for(image_path)
+        self.tile_size = tile_size
+        self.levels = tuple(sorted(levels))
+        self._source = None
+        self._tiles = LRUCache(SOURCE_CACHE_SIZE)
+        self._lock = threading.Lock()
+        # Image.open solo lee la cabecera: el tamaño se conoce sin decodificar el mapa
+        with Image.open(image_path) as img:
+            self.width, self.height = img.size
+        self._manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        digest = files_hash(self.image_path)
+        path = os.path.join(self.cache_dir, MANIFEST)
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("source") == digest and manifest.get("tile_size") == self.tile_size:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        return {"source": digest, "tile_size": self.tile_size, "levels": []}
+
+    def _write_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+
+    def level_for(self, zoom):
+        """Nivel más pequeño que no obliga a ampliar para este zoom"""
+        for level in self.levels:
+            if level >= zoom:
+                return level
+        return self.levels[-1]
+
+    def is_built(self, level):
+        return level in self._manifest["levels"]
+
+    def available_level(self, zoom):
+        """Mejor nivel ya generado para este zoom, o None si todavía no hay ninguno"""
+        built = [level for level in self.levels if self.is_built(level)]
+        for level in built:
+            if level >= zoom:
+                return level
+        return built[-1] if built else None
+
+    def build(self, level):
+        """Genera el nivel en disco si aún no existe (decodifica y remuestrea el mapa completo)"""
+        with self._lock:
+            if not self.is_built(level):
+                self._build_level(level)
+
+    def prepare(self, levels=None):
+        """Genera de antemano los niveles indicados (por defecto todos)"""
+        for level in levels or self.levels:
+            self.build(level)
+
+    def grid(self, level):
+        """(columnas, filas) de teselas del nivel"""
+        w = max(1, round(self.width * level))
+        h = max(1, round(self.height * level))
+        return math.ceil(w / self.tile_size), math.ceil(h / self.tile_size)
+
+    def _path(self, level, tx, ty):
+        return os.path.join(self.cache_dir, f"{level:g}", f"{tx}_{ty}.png")
+
+    def _build_level(self, level):
+        from PIL import Image
+
+        if self._source is None:
+            self._source = Image.open(self.image_path)
+            self._source.load()
+        w = max(1, round(self.width * level))
+        h = max(1, round(self.height * level))
+        img = self._source if level == 1.0 else self._source.resize((w, h), Image.Resampling.LANCZOS)
+        os.makedirs(os.path.join(self.cache_dir, f"{level:g}"), exist_ok=True)
+        size = self.tile_size
+        cols, rows = self.grid(level)
+        for tx in range(cols):
+            for ty in range(rows):
+                box = (tx * size, ty * size, min(w, (tx + 1) * size), min(h, (ty + 1) * size))
+                img.crop(box).save(self._path(level, tx, ty))
+        self._manifest["levels"].append(level)
+        self._write_manifest()
+        # La imagen completa solo hace falta mientras se construyen niveles
+        if set(self._manifest["levels"]) >= set(self.levels):
+            self._source = None
+
+    def tile(self, level, tx, ty):
+        """Tesela decodificada (PIL) del nivel; genera el nivel en disco si aún no existe"""
+        from PIL import Image
+
+        key = (level, tx, ty)
+        img = self._tiles.get(key)
+        if img is None:
+            self.build(level)
+            with Image.open(self._path(level, tx, ty)) as f:
+                img = f.convert("RGBA") if f.mode not in ("RGB", "RGBA") else f.copy()
+            self._tiles.put(key, img)
+        return img
+
+
+class TileLayer:
+    """Dibuja en el canvas solo las teselas de la pirámide que caen en la vista
+
+    quality="fast" remuestrea con vecino más cercano (zoom continuo) y "high" con
+    LANCZOS; refine() pasa las teselas visibles a alta calidad cuando el zoom se asienta.
+    Con schedule (root.after) un nivel que aún no está en disco se genera en otro hilo:
+    mientras tanto se usa el mejor nivel ya generado y luego se rehace la capa.
+    """
+
+    def __init__(self, canvas, pyramid, tags=("scene",), photo=None, capacity=PHOTO_CACHE_SIZE,
+                 schedule=None):
+        self.canvas = canvas
+        self.pyramid = pyramid
+        self.tags = tuple(tags) + ("tile",)
+        self._photo = photo
+        self.photos = LRUCache(capacity)
+        self.schedule = schedule
+        self.items = {}
+        self.zoom = None
+        self.level = None
+        self.quality = None
+        self._view = None
+        self._building = None
+        self._failed = set()
+
+    def _make_photo(self, img):
+        if self._photo is None:
+            from PIL import ImageTk
+
+            self._photo = ImageTk.PhotoImage
+        return self._photo(img)
+
+    def _image(self, level, tx, ty, zoom, quality):
+        key = (level, tx, ty, zoom, quality)
+        photo = self.photos.get(key)
+        if photo is None:
+            from PIL import Image
+
+            img = self.pyramid.tile(level, tx, ty)
+            x0, y0, x1, y1 = self._extent(level, tx, ty, zoom)
+            size = (max(1, x1 - x0), max(1, y1 - y0))
+            if img.size != size:
+                resample = Image.Resampling.LANCZOS if quality == "high" else Image.Resampling.NEAREST
+                img = img.resize(size, resample)
+            photo = self._make_photo(img)
+            self.photos.put(key, photo)
+        return photo
+
+    def _extent(self, level, tx, ty, zoom):
+        """Caja en píxeles de pantalla (relativa al origen del mapa) de una tesela"""
+        f = zoom / level
+        size = self.pyramid.tile_size * f
+        lw, lh = self.pyramid.width * level, self.pyramid.height * level
+        x0, y0 = round(tx * size), round(ty * size)
+        x1 = round(min((tx + 1) * self.pyramid.tile_size, lw) * f)
+        y1 = round(min((ty + 1) * self.pyramid.tile_size, lh) * f)
+        return x0, y0, x1, y1
+
+    def clear(self):
+        self.canvas.delete("tile")
+        self.items = {}
+
+    def place(self, zoom, offset, size, quality="fast"):
+        """Crea las teselas visibles que falten; si cambió el zoom o el nivel rehace la capa"""
+        self._view = (zoom, offset, size)
+        level = self.pyramid.level_for(zoom)
+        if self.schedule is not None and not self.pyramid.is_built(level):
+            self._build_later(level)
+            level = self.pyramid.available_level(zoom)
+            if level is None:
+                return
+        if zoom != self.zoom or level != self.level:
+            self.clear()
+            self.zoom, self.level, self.quality = zoom, level, quality
+        step = self.pyramid.tile_size * zoom / level
+        cols, rows = self.pyramid.grid(level)
+        ox, oy = offset
+        w, h = size
+        c0, r0 = max(0, int(-ox // step)), max(0, int(-oy // step))
+        c1, r1 = min(cols - 1, int((w - ox) // step)), min(rows - 1, int((h - oy) // step))
+        created = 0
+        for tx in range(c0, c1 + 1):
+            for ty in range(r0, r1 + 1):
+                if (tx, ty) in self.items:
+                    continue
+                photo = self._image(level, tx, ty, zoom, self.quality)
+                x0, y0, _, _ = self._extent(level, tx, ty, zoom)
+                item = self.canvas.create_image(ox + x0, oy + y0, image=photo, anchor="nw", tags=self.tags)
+                self.items[(tx, ty)] = (item, photo)
+                created += 1
+        if created:
+            metrics.count("canvas_items", created)
+            self.canvas.tag_lower("tile")
+
+    def refine(self):
+        """Pasa a alta calidad las teselas ya dibujadas (tras asentarse el zoom)"""
+        if self.zoom is None or self.quality == "high":
+            return
+        self.quality = "high"
+        level = self.level
+        for (tx, ty), (item, _) in list(self.items.items()):
+            photo = self._image(level, tx, ty, self.zoom, "high")
+            self.canvas.itemconfigure(item, image=photo)
+            self.items[(tx, ty)] = (item, photo)
+
+    def _build_later(self, level):
+        """Genera el nivel en un hilo y, al terminar, vuelve a colocar la vista actual"""
+        if self._building is not None or level in self._failed:
+            return
+        self._building = level
+
+        def build():
+            try:
+                self.pyramid.build(level)
+            except Exception as e:
+                print(f"No se pudo generar el nivel {level:g} del mapa: {e}")
+                self._failed.add(level)
+
+        thread = threading.Thread(target=build, name="tiles", daemon=True)
+        thread.start()
+
+        def poll():
+            if thread.is_alive():
+                self.schedule(BUILD_POLL_MS, poll)
+                return
+            self._building = None
+            if self._view is not None:
+                high = self.quality == "high"
+                self.place(*self._view)
+                if high:
+                    self.refine()
+
+        self.schedule(BUILD_POLL_MS, poll)
@@ -0,0 +1,71 @@
+# worker.py
+# Cálculo de rutas en un hilo aparte; los resultados vuelven al hilo de Tk con after()
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_MS = 15
+
+
+class RouteWorker:
+    """Resuelve consultas del motor fuera del bucle de eventos
+
+    schedule(ms, callback) es root.after. Solo cuenta la consulta más reciente: al
+    enviar otra (o llamar a cancel) la anterior se cancela si no empezó y su
+    resultado se descarta si ya estaba en curso. Si la red cambió mientras se
+    calculaba, la consulta se repite con la red nueva.
+    """
+
+    def __init__(self, engine, schedule, poll_ms=POLL_MS):
+        self.engine = engine
+        self.schedule = schedule
+        self.poll_ms = poll_ms
+        self.generation = 0
+        self._future = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="route")
+
+    @property
+    def busy(self):
+        return self._future is not None and not self._future.done()
+
+    def _solve(self, src, dst, algorithm):
+        # Las estadísticas viajan con el resultado: last_search es estado compartido
+        return self.engine.route_with_stats(src, dst, algorithm)
+
+    def submit(self, src, dst, algorithm, on_done, on_error):
+        """Encola la consulta; on_done((camino, km, estadísticas)) u on_error(excepción)"""
+        self.cancel()
+        generation = self.generation
+        version = self.engine.version
+        future = self._executor.submit(self._solve, src, dst, algorithm)
+        self._future = future
+
+        def poll():
+            if generation != self.generation:
+                return
+            if not future.done():
+                self.schedule(self.poll_ms, poll)
+                return
+            self._future = None
+            if self.engine.version != version:
+                self.submit(src, dst, algorithm, on_done, on_error)
+                return
+            error = future.exception()
+            if error is not None:
+                on_error(error)
+            else:
+                on_done(future.result())
+
+        self.schedule(self.poll_ms, poll)
+        return generation
+
+    def cancel(self):
+        """Descarta la consulta en curso; devuelve True si había una pendiente"""
+        pending = self.busy
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+        self.generation += 1
+        return pending
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,32 +1,25 @@
+import time
+STARTUP_START = time.perf_counter()  # referencia para medir el arranque (ver finish_startup)
 import tkinter as tk
-from tkinter import ttk, simpledialog, messagebox
-import networkx as nx
-import math
+from tkinter import ttk, messagebox
 import os
-import json
-from PIL import Image, ImageTk
-import sys
-import datetime
-import heapq
-import time
-from data.ciudades import original_cities, waypoints, all_nodes, distance, distance_between_nodes
+from data.ciudades import original_cities, waypoints, all_nodes, distance
+from routing import RoutingEngine, NoPathError, RoadStore, NetworkStore
+from routing.loader import resource_path
+from routing import autoconnect
+from routing.history import History
+from routing.metrics import metrics
+from routing.shapes import RoadShapes
+from gui.scene import MapScene
+from gui.tiles import TileLayer
+from gui.worker import RouteWorker
+from gui.animation import PathAnimator
+from gui.startup import StartupLoader, load_resources
 
 # ------------------ PATH ------------------
 
-def resource_path(relative_path):
-    """ Obtiene la ruta absoluta de los recursos, compatible con PyInstaller """
-    try:
-        # Carpeta temporal de PyInstaller
-        base_path = sys._MEIPASS
-    except Exception:
-        # Carpeta normal de desarrollo
-        base_path = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(base_path, relative_path)
-
 #rutas usando la función resource_path
 MAP_IMAGE = resource_path(os.path.join("utils", "mapa_venezuela.png"))
-NODES_FILE = resource_path(os.path.join("utils", "node_positions.json"))
-ROADS_FILE = resource_path(os.path.join("utils", "roads_config.json"))
 
 # ------------------ CONFIG ------------------
 NODE_RADIUS = 7
@@ -44,19 +37,42 @@ COLOR_CITY = "#E21717"
 COLOR_SELECTED = "#f39c12"
 COLOR_DRAWING = "#e74c3c"  
 COLOR_AUTO_ROAD = "#27ae60"
+ROUTING_BACKEND = "csr"     # "csr" (heapq sobre arreglos compactos) o "networkx"
+ALGORITHM_NAMES = {"Dijkstra": "dijkstra", "A*": "astar", "Contraction Hierarchies": "ch",
+                   "Dijkstra (cadenas contraídas)": "chains"}
+WAYPOINT_MIN_ZOOM = 0.4     # por debajo de este zoom los waypoints no se dibujan (el inicial es 0.41)
+VIEW_MARGIN = 20            # píxeles extra alrededor de la vista al recortar
+MOVE_THRESHOLD_PX = 4       # desplazamiento mínimo antes de empezar a mover un waypoint
+REFINE_DELAY_MS = 150       # espera tras el último zoom antes del remuestreo de calidad
+METRICS_REFRESH_MS = 1000   # refresco del resumen de métricas (con GPS_METRICS=1)
 
 # ------------------ GRAFO ------------------
-G = nx.Graph()
+# El motor de rutas es independiente de la interfaz; main.py es solo un cliente
+engine = RoutingEngine(backend=ROUTING_BACKEND)
 
 # ------------------ RUTAS INICIALES (VACÍAS) ------------------
-roads = []
+# Lista ordenada + índice no dirigido: "(a, b) in roads" cuesta O(1) en ambas direcciones
+roads = RoadStore()
+
+# ------------------ HISTORIAL ------------------
+# Deshacer/rehacer guarda solo los cambios de cada acción, con memoria acotada
+history = History()
+
+# ------------------ EDICIÓN ------------------
+# Toda edición (dibujo, movimiento, borrado, conexiones automáticas, deshacer/rehacer)
+# pasa por aquí: diccionarios, carreteras, pesos e índice espacial cambian en O(grado)
+network = NetworkStore(engine, original_cities, waypoints, all_nodes, roads, history)
+
+# Trazado real de las carreteras (road_drawings.json); se reemplaza al terminar la carga
+road_shapes = RoadShapes()
 
 # ------------------ ESTADO ------------------
 zoom = 0.41
 pan_x, pan_y = 50, 20
 ZOOM_MIN, ZOOM_MAX = 0.4, 2.5
-original_image = None
-map_img = None
+map_pyramid = None
+scene = None                # MapScene; se crea al terminar la carga inicial
+refine_job = None
 map_width = map_height = 0
 current_path = current_start = current_end = None
 show_waypoints = True
@@ -66,38 +82,9 @@ draw_mode = False
 selected_node = None
 dragging = False
 drag_start = (0, 0)
+moving_node = None          # waypoint que se está arrastrando
 
 # ------------------ LÓGICA ------------------
-def update_weights():
-    G.clear()
-    for node in all_nodes.keys():
-        G.add_node(node)
-    
-    ESCALA_KM = 7.0  
-    
-    for a, b in roads:
-        if a in all_nodes and b in all_nodes:
-            x1, y1 = all_nodes[a]
-            x2, y2 = all_nodes[b]
-            
-            # Calculamos la distancia en píxeles
-            dist_pixeles = math.hypot(x2 - x1, y2 - y1)
-            
-            # LA MAGIA: Convertimos píxeles a kilómetros reales
-            dist_km = dist_pixeles * ESCALA_KM
-            
-            G.add_edge(a, b, weight=dist_km)
-    G.clear()
-    for node in all_nodes.keys():
-        G.add_node(node)
-    
-    for a, b in roads:
-        if a in all_nodes and b in all_nodes:
-            x1, y1 = transform_coords(*all_nodes[a])
-            x2, y2 = transform_coords(*all_nodes[b])
-            dist = distance((x1, y1), (x2, y2))
-            G.add_edge(a, b, weight=dist)
-
 def transform_coords(x, y):
     x_z, y_z = x * zoom, y * zoom
     iw, ih = map_width * zoom, map_height * zoom
@@ -108,57 +95,60 @@ def inverse_transform_coords(sx, sy):
     mx, my = pan_x + (CANVAS_WIDTH - iw) // 2, pan_y + (CANVAS_HEIGHT - ih) // 2
     return (sx - mx) / zoom if zoom > 0 else 0, (sy - my) / zoom if zoom > 0 else 0
 
-def resize_map_image():
-    if original_image:
-        nw, nh = int(original_image.width * zoom), int(original_image.height * zoom)
-        return ImageTk.PhotoImage(original_image.resize((nw, nh), Image.Resampling.LANCZOS))
-    return None
-
-def load_configuration():
-    """Carga la configuración guardada desde la carpeta utils"""
-    global waypoints, roads, all_nodes
-    
-    try:
-        # 1. Limpiar datos actuales para cargar lo nuevo
-        waypoints.clear()
-        roads.clear()
-        
-        # 2. Cargar Posiciones de Nodos (Ciudades y Waypoints)
-        if os.path.exists(NODES_FILE):
-            with open(NODES_FILE, 'r') as f:
-                nodes_data = json.load(f)
-        
-            for city in original_cities:
-                if city in nodes_data:
-                    original_cities[city] = [nodes_data[city]["x"], nodes_data[city]["y"]]
-            
-            for node, data in nodes_data.items():
-                pos = [data["x"], data["y"]]
-                if data.get("type") == "waypoint":
-                    waypoints[node] = pos
-        
-        # 3. Cargar Carreteras (Conexiones)
-        if os.path.exists(ROADS_FILE):
-            with open(ROADS_FILE, 'r') as f:
-                roads_data = json.load(f)
-            roads = roads_data.get("roads", [])
-        
-        # 4. Reconstruir el diccionario total de nodos
-        all_nodes = {**original_cities, **waypoints}
-        
-        # 5. IMPORTANTE: Actualizar el grafo G y pesos
-        update_weights()
-        
+def finish_startup(resources):
+    """Segunda fase del arranque, ya en el hilo de Tk: escena, mapa y eventos"""
+    global road_shapes, map_pyramid, map_width, map_height, scene, refine_job
+    errors = resources["errors"]
+    if "network" in errors:
+        print(f"Error cargando los archivos: {errors['network']}")
+    else:
         print(f"Configuración cargada: {len(waypoints)} waypoints, {len(roads)} rutas")
-        if 'Maracaibo' in original_cities:
-            print(f"Maracaibo ubicado en: {original_cities['Maracaibo']}")
-        
-    except Exception as e:
-        print(f"Error cargando los archivos: {e}")
+    if "shapes" in errors:
+        print(f"Sin trazados de carreteras: {errors['shapes']}")
+    road_shapes = resources["shapes"]
+
+    scene = MapScene(canvas, margin=VIEW_MARGIN, shapes=road_shapes, colors={
+        "road": COLOR_ROAD, "path": COLOR_PATH, "waypoint": COLOR_WAYPOINT,
+        "city": COLOR_CITY, "selected": COLOR_SELECTED,
+    })
+    map_pyramid = resources["pyramid"]
+    if map_pyramid is not None:
+        # Los niveles que falten se generan en otro hilo; las teselas se decodifican al hacerse visibles
+        map_width, map_height = map_pyramid.width, map_pyramid.height
+        scene.set_tiles(TileLayer(canvas, map_pyramid, schedule=root.after))
+        print(f"Mapa cargado: {map_width}x{map_height}")
+    else:
+        print(f"Error: {errors.get('map')}")
+        messagebox.showerror("Error", f"No se pudo cargar el mapa: {errors.get('map')}")
+
+    # Los eventos que tocan la red se conectan cuando ya está cargada
+    canvas.bind("<MouseWheel>", do_zoom)
+    canvas.bind("<Button-1>", on_canvas_click)
+    canvas.bind("<B1-Motion>", on_canvas_drag)
+    canvas.bind("<ButtonRelease-1>", on_canvas_release)
+    canvas.bind("<Button-3>", on_canvas_click)  # Click derecho
+    root.bind("<Control-z>", undo_action)
+    root.bind("<Control-y>", redo_action)
+    calc_btn.config(state="normal")
+
+    constrain_pan()
+    redraw()
+    # La primera vista también pasa a alta calidad cuando se asienta
+    refine_job = root.after(REFINE_DELAY_MS, scene.refine)
+    ready = time.perf_counter() - STARTUP_START
+    metrics.record("startup_ready", ready)
+    steps = ", ".join(f"{name} {ms:.0f} ms" for name, ms in resources["timings"].items())
+    print(f"Arranque: ventana en {window_time * 1000:.0f} ms, red lista en {ready * 1000:.0f} ms ({steps})")
+    path_info.set(f"Listo en {ready:.1f} s")
+
+def on_startup_error(error):
+    print(f"Error: {error}")
+    path_info.set("No se pudo cargar la red")
+    messagebox.showerror("Error", f"No se pudo cargar la red: {error}")
 
 def constrain_pan():
     global pan_x, pan_y
-    if not original_image: return
+    if not map_pyramid: return
     iw, ih = map_width * zoom, map_height * zoom
     if iw >= CANVAS_WIDTH:
         lim = (iw - CANVAS_WIDTH) // 2
@@ -196,7 +186,7 @@ def start_drawing_from_node(node_name, x, y):
 
 def add_drawing_point(x, y):
     """Agrega un punto al dibujo en curso"""
-    global drawing_points, last_draw_point, drawing_line_id
+    global last_draw_point, drawing_line_id
     
     if last_draw_point and distance(last_draw_point, (x, y)) < 15:
         return False
@@ -214,410 +204,176 @@ def add_drawing_point(x, y):
         )
     return True
 
-def save_snapshot(action_name):
-    """Guarda un snapshot del estado actual"""
-    snapshot = {
-        "waypoints": waypoints.copy(),
-        "roads": roads.copy(),
-        "all_nodes": all_nodes.copy(),
-        "action": action_name,
-        "timestamp": datetime.datetime.now()
-    }
-    return snapshot
-
-def restore_snapshot(snapshot):
-    """Restaura un snapshot del estado"""
-    global waypoints, roads, all_nodes
-    
-    waypoints = snapshot["waypoints"].copy()
-    roads = snapshot["roads"].copy()
-    all_nodes = snapshot["all_nodes"].copy()
-    
-    # Actualizar datos
-    update_weights()
-    waypoint_count.set(f"📍 Waypoints: {len(waypoints)}")
-    road_count.set(f"🛣️  Rutas: {len(roads)}")
-    redraw()
-
 # ------------------ ALGORITMOS DE CONEXIÓN AUTOMÁTICA ------------------
+# La lógica vive en routing.autoconnect (sin Tk) para poder medirla y reutilizarla
 def find_nearest_waypoint(city_name, max_distance=100):
     """Encuentra el waypoint más cercano a una ciudad"""
-    if city_name not in original_cities:
-        return None
-    
-    city_pos = original_cities[city_name]
-    nearest = None
-    min_dist = float('inf')
-    
-    for wp_name, wp_pos in waypoints.items():
-        dist = distance(city_pos, wp_pos)
-        if dist < min_dist and dist < max_distance:
-            min_dist = dist
-            nearest = wp_name
-    
-    return nearest, min_dist if nearest else None
+    return autoconnect.find_nearest_waypoint(network, city_name, max_distance)
 
 def connect_cities_to_nearest_waypoints(max_distance=80):
     """Conecta cada ciudad a su waypoint más cercano"""
-    global roads
-    
-    # Guardar estado antes de la acción
-    old_roads = roads.copy()
-    
-    connections_made = 0
-    for city in original_cities.keys():
-        nearest_wp, dist = find_nearest_waypoint(city, max_distance)
-        if nearest_wp and dist is not None:
-            # Verificar si la conexión ya existe
-            if (city, nearest_wp) not in roads and (nearest_wp, city) not in roads:
-                roads.append((city, nearest_wp))
-                connections_made += 1
-                print(f"Conectado: {city} -> {nearest_wp} (distancia: {dist:.1f})")
-    
-    update_weights()
-    
-    if connections_made > 0:
-        # Guardar en historial
-        history.add_action("auto_connect_cities", {
-            "old_roads": old_roads,
-            "new_roads": roads.copy(),
-            "connections_made": connections_made
-        })
-    
-    return connections_made
+    return autoconnect.connect_cities_to_nearest_waypoints(network, max_distance)
 
 def find_k_nearest_neighbors(node, k=3, node_type="all", max_distance=150):
     """Encuentra los k vecinos más cercanos a un nodo"""
-    if node not in all_nodes:
-        return []
-    
-    node_pos = all_nodes[node]
-    neighbors = []
-    
-    for other_node, other_pos in all_nodes.items():
-        if other_node == node:
-            continue
-        
-        # Filtrar por tipo si es necesario
-        if node_type == "city" and other_node not in original_cities:
-            continue
-        elif node_type == "waypoint" and other_node not in waypoints:
-            continue
-        
-        dist = distance(node_pos, other_pos)
-        if dist < max_distance:
-            neighbors.append((dist, other_node))
-    
-    # Ordenar por distancia y tomar los k más cercanos
-    neighbors.sort(key=lambda x: x[0])
-    return neighbors[:k]
+    return autoconnect.find_k_nearest_neighbors(network, node, k, node_type, max_distance)
 
 def connect_waypoints_to_neighbors(k=3, max_distance=120):
     """Conecta cada waypoint a sus k vecinos más cercanos"""
-    global roads
-    
-    # Guardar estado antes de la acción
-    old_roads = roads.copy()
-    
-    connections_made = 0
-    for wp in waypoints.keys():
-        neighbors = find_k_nearest_neighbors(wp, k, "waypoint", max_distance)
-        for dist, neighbor in neighbors:
-            # Verificar si la conexión ya existe
-            if (wp, neighbor) not in roads and (neighbor, wp) not in roads:
-                roads.append((wp, neighbor))
-                connections_made += 1
-    
-    update_weights()
-    
-    if connections_made > 0:
-        # Guardar en historial
-        history.add_action("auto_connect_waypoints", {
-            "old_roads": old_roads,
-            "new_roads": roads.copy(),
-            "connections_made": connections_made
-        })
-    
-    return connections_made
+    return autoconnect.connect_waypoints_to_neighbors(network, k, max_distance)
 
-def build_minimum_spanning_tree():
+def build_minimum_spanning_tree(max_distance=200):
     """Construye un árbol de expansión mínimo para conectar todos los waypoints"""
-    global roads
-    
-    if len(waypoints) < 2:
-        return 0
-    
-    # Guardar estado antes de la acción
-    old_roads = roads.copy()
-    
-    # Crear un grafo temporal solo con waypoints
-    temp_graph = nx.Graph()
-    
-    # Agregar nodos
-    for wp in waypoints.keys():
-        temp_graph.add_node(wp)
-    
-    # Agregar aristas con peso de distancia
-    waypoint_list = list(waypoints.keys())
-    for i in range(len(waypoint_list)):
-        for j in range(i + 1, len(waypoint_list)):
-            wp1 = waypoint_list[i]
-            wp2 = waypoint_list[j]
-            dist = distance_between_nodes(wp1, wp2)
-            if dist < 200:  # Solo conectar si están relativamente cerca
-                temp_graph.add_edge(wp1, wp2, weight=dist)
-    
-    # Construir árbol de expansión mínimo
-    try:
-        mst = nx.minimum_spanning_tree(temp_graph)
-        
-        # Agregar las conexiones del MST a las rutas
-        connections_made = 0
-        for wp1, wp2 in mst.edges():
-            if (wp1, wp2) not in roads and (wp2, wp1) not in roads:
-                roads.append((wp1, wp2))
-                connections_made += 1
-        
-        update_weights()
-        
-        if connections_made > 0:
-            # Guardar en historial
-            history.add_action("build_mst", {
-                "old_roads": old_roads,
-                "new_roads": roads.copy(),
-                "connections_made": connections_made
-            })
-        
-        return connections_made
-    except:
-        return 0
+    return autoconnect.build_minimum_spanning_tree(network, max_distance)
 
 def smart_road_generation():
     """Generación inteligente de rutas siguiendo la lógica de carreteras"""
-    global roads
-    
-    # Guardar estado antes de la acción
-    old_roads = roads.copy()
-    
-    connections_made = 0
-    
-    # Paso 1: Conectar ciudades a waypoints cercanos
-    connections_made += connect_cities_to_nearest_waypoints(max_distance=100)
-    
-    # Paso 2: Conectar waypoints entre sí (vecinos cercanos)
-    connections_made += connect_waypoints_to_neighbors(k=3, max_distance=150)
-    
-    # Paso 3: Construir árbol de expansión mínimo para garantizar conectividad
-    connections_made += build_minimum_spanning_tree()
-    
-    # Paso 4: Conectar ciudades principales entre sí si están relativamente cerca
-    city_connections = 0
-    city_list = list(original_cities.keys())
-    for i in range(len(city_list)):
-        for j in range(i + 1, len(city_list)):
-            city1 = city_list[i]
-            city2 = city_list[j]
-            dist = distance_between_nodes(city1, city2)
-            
-            # Conectar ciudades si están relativamente cerca (ej: Caracas-La Guaira)
-            if dist < 80:
-                if (city1, city2) not in roads and (city2, city1) not in roads:
-                    roads.append((city1, city2))
-                    city_connections += 1
-                    print(f"Conectadas ciudades cercanas: {city1} -> {city2}")
-    
-    connections_made += city_connections
-    
-    update_weights()
-    
-    if connections_made > 0:
-        # Guardar en historial
-        history.add_action("smart_generation", {
-            "old_roads": old_roads,
-            "new_roads": roads.copy(),
-            "connections_made": connections_made,
-            "city_connections": city_connections
-        })
-    
-    return connections_made
+    return autoconnect.smart_road_generation(network)
 
 def select_node_at(x, y):
     """Selecciona un nodo en las coordenadas de pantalla (x, y)"""
-    global selected_node
-    
-    for node_name, pos in all_nodes.items():
-        sx, sy = transform_coords(*pos)
-        if math.hypot(x - sx, y - sy) < 15:
-            return node_name
-    return None
+    # Radio de 15 px de pantalla convertido a coordenadas del mapa
+    mx, my = inverse_transform_coords(x, y)
+    hit = engine.spatial_index().nearest(mx, my, max_distance=15 / zoom)
+    return hit[1] if hit else None
 
 # ------------------ ALGORITMO DE RUTA (DIJKSTRA) ------------------
 def find_path():
+    """Lanza la búsqueda en segundo plano; la interfaz sigue respondiendo mientras tanto"""
     global current_path, current_start, current_end
     
+    if scene is None:
+        path_info.set("Cargando red vial...")
+        return
+    
     s, e = start_var.get(), end_var.get()
-    if s and e and s != e:
-        try:
-            # --- 1. LIMPIEZA TOTAL (Visual y de Memoria) ---
-            current_path = None  # <--- ESTO ES LO MÁS IMPORTANTE
-            canvas.delete("path_layer") # Borra la línea azul
-            
-            # Si tu función redraw() usa current_path, al ser None ya no dibujará nada
-            redraw() 
-            
-            path_info.set("Iniciando nueva búsqueda...")
-            root.update() 
-            
-            update_weights()
-            
-            if s not in G.nodes() or e not in G.nodes():
-                messagebox.showerror("Error", "Ciudad no conectada.")
-                return
-
-            # --- 2. ANIMACIÓN DE EXPLORACIÓN ---
-            nodes_to_animate = list(G.nodes())[:30] 
-            for node in nodes_to_animate:
-                if node in all_nodes:
-                    x, y = transform_coords(*all_nodes[node])
-                    flash = canvas.create_oval(x-6, y-6, x+6, y+6, fill="#FF9800", outline="white", width=2)
-                    root.update_idletasks()
-                    canvas.after(100, lambda f=flash: canvas.delete(f))
-                    time.sleep(0.01)
-
-            # --- 3. CÁLCULO Y DIBUJO ---
-            path = nx.dijkstra_path(G, s, e, weight="weight")
-            
-            # NO asignamos a current_path todavía para que redraw() no la pinte antes de tiempo
-            temp_dist = 0
-            for i in range(len(path)-1):
-                n1, n2 = path[i], path[i+1]
-                x1, y1 = transform_coords(*all_nodes[n1])
-                x2, y2 = transform_coords(*all_nodes[n2])
-                
-                # Dibujamos el tramo actual
-                canvas.create_line(x1, y1, x2, y2, fill="#2196F3", width=5, tags="path_layer")
-                
-                temp_dist += distance(all_nodes[n1], all_nodes[n2])
-                path_info.set(f"Trazando: {temp_dist:.0f} km")
-                root.update()
-                time.sleep(0.04)
-
-            # --- 4. GUARDAR Y FINALIZAR ---
-            # Ahora sí guardamos la ruta oficial
-            current_path, current_start, current_end = path, s, e
-            
-            display_path = [n for n in path if n in original_cities]
-            path_info.set(f"Ruta: {' → '.join(display_path)} | {temp_dist:.0f} km")
-            
-            # El redraw final pone los nombres de las ciudades por encima
-            redraw() 
-
-        except nx.NetworkXNoPath:
-            messagebox.showerror("Error", "No hay conexión.")
-        except Exception as ex:
-            print(f"Error: {ex}")
-    else:
+    if not (s and e and s != e):
         messagebox.showwarning("Aviso", "Seleccione ciudades distintas")
+        return
+    
+    # Los pesos ya están precalculados en el motor; no se reconstruye el grafo
+    if not engine.has_node(s) or not engine.has_node(e):
+        messagebox.showerror("Error", "Ciudad no conectada.")
+        return
+    
+    # --- 1. LIMPIEZA (la consulta anterior, si sigue en curso, se descarta) ---
+    cancel_route()
+    current_path = current_start = current_end = None
+    redraw()
+    
+    # --- 2. CACHÉ: una ruta ya calculada con esta red se muestra al instante ---
+    algorithm = algorithm_var.get()
+    hit = engine.cached_route(s, e, ALGORITHM_NAMES.get(algorithm, "dijkstra"))
+    if hit:
+        show_route(s, e, algorithm, hit)
+        return
+    
+    # --- 3. CÁLCULO EN EL HILO DE RUTAS ---
+    path_info.set("Calculando ruta...")
+    route_worker.submit(s, e, ALGORITHM_NAMES.get(algorithm, "dijkstra"),
+                        lambda result: show_route(s, e, algorithm, result),
+                        on_route_error)
+
+def show_route(s, e, algorithm, result):
+    """Recibe el resultado en el hilo de Tk y lo dibuja (animado si está activado)"""
+    path, km, stats = result
+    cache = engine.cache_stats()
+    if stats and stats.get("cached"):
+        algorithm_label.config(text=f"{algorithm}: ruta en caché "
+                                    f"({cache['hits']} aciertos, {cache['misses']} fallos)")
+    elif stats and stats["settled"] == 0:
+        algorithm_label.config(text=f"{algorithm}: árbol de caminos desde {s} reutilizado")
+    elif stats and stats["settled"] is not None:
+        algorithm_label.config(text=f"{algorithm}: {stats['settled']} de {len(engine.nodes)} nodos explorados")
+    
+    def finish():
+        global current_path, current_start, current_end
+        canvas.delete("path_layer")
+        current_path, current_start, current_end = path, s, e
+        display_path = [n for n in path if n in original_cities]
+        path_info.set(f"Ruta: {' → '.join(display_path)} | {km:.0f} km")
+        redraw()
+    
+    if not animate_var.get() or len(path) < 2 or (stats and stats.get("cached")):
+        finish()
+        return
+    
+    # --- TRAZADO ANIMADO POR CUADROS ---
+    traced = [0.0]
+    
+    def draw_segment(i):
+        a, b = all_nodes[path[i]], all_nodes[path[i + 1]]
+        coords = []
+        for x, y in road_shapes.edge_points(path[i], path[i + 1], all_nodes):
+            coords.extend(transform_coords(x, y))
+        canvas.create_line(*coords, fill="#2196F3", width=5, capstyle="round",
+                           joinstyle="round", tags=("scene", "path_layer"))
+        metrics.count("canvas_items")
+        traced[0] += distance(a, b)
+        path_info.set(f"Trazando: {traced[0]:.0f} km")
+    
+    path_animator.start(len(path) - 1, draw_segment, finish)
+
+def on_route_error(error):
+    if isinstance(error, NoPathError):
+        path_info.set("")
+        messagebox.showerror("Error", "No hay conexión.")
+    else:
+        print(f"Error: {error}")
+
+def cancel_route(event=None):
+    """Cancela la consulta o animación en curso (p. ej. al cambiar origen o destino)"""
+    busy = route_worker.cancel() or path_animator.running
+    path_animator.stop()
+    canvas.delete("path_layer")
+    if busy and event is not None:
+        path_info.set("Consulta cancelada")
+
+def on_closing():
+    """Cierra la ventana sin dejar vivo el hilo de rutas"""
+    path_animator.stop()
+    route_worker.shutdown()
+    root.destroy()
         
 # ------------------ FUNCIONES DE DESHACER/REHACER ------------------
+ACTION_NAMES = {
+    "create_road": "creación de ruta",
+    "delete_road": "eliminación de ruta",
+    "draw_road": "carretera dibujada",
+    "move_node": "movimiento de nodo",
+    "load_config": "carga de configuración",
+    "auto_connect_cities": "conexión de ciudades",
+    "auto_connect_waypoints": "conexión de waypoints",
+    "build_mst": "árbol de expansión mínimo",
+    "smart_generation": "generación inteligente",
+    "delete_city_connections": "eliminación de conexiones de ciudad",
+    "delete_waypoint": "eliminación de waypoint",
+}
+
+def describe_action(action):
+    name = ACTION_NAMES.get(action["type"], action["type"])
+    return f"{name} ({len(action['delta'])} cambios)"
+
 def undo_action(event=None):
-    """Deshace la última acción"""
+    """Deshace la última acción aplicando su delta al revés"""
     if not history.can_undo():
         messagebox.showinfo("Deshacer", "No hay acciones para deshacer")
         return
     
-    action = history.undo()
-    if action:
-        apply_undo_action(action)
-        update_history_display()
+    action = history.undo(network)
+    path_info.set(f"Deshecho: {describe_action(action)}")
+    update_history_display()
+    redraw()
 
-def apply_redo_action(action):
-    """Aplica la acción de rehacer"""
-    global waypoints, roads, all_nodes
-    
-    action_type = action['type']
-    data = action['data']
-    
-    if action_type == "create_road":
-        # Rehacer creación de ruta
-        roads.clear()
-        roads.extend(data['new_roads'])
-        path_info.set(f"Rehecho: Ruta {data['node1']} → {data['node2']}")
-        
-    elif action_type == "delete_road":
-        # Rehacer eliminación de ruta
-        roads.clear()
-        roads.extend(data['new_roads'])
-        path_info.set(f"Rehecho: Eliminación de ruta {data['deleted_road'][0]} → {data['deleted_road'][1]}")
-        
-    elif action_type == "draw_road":
- 
-        waypoints = data['old_waypoints'].copy()
-        roads = data['old_roads'].copy()
-        all_nodes = data['old_all_nodes'].copy()
-        
-        # Luego recrear los waypoints y rutas
-        previous_node = data['start_node']
-        created_waypoints = []
-        
-        for i, wp_name in enumerate(data['created_waypoints']):
-            
-            if i < len(data['drawing_points']):
-                x, y = data['drawing_points'][i]
-                map_x, map_y = inverse_transform_coords(x, y)
-                waypoints[wp_name] = [map_x, map_y]
-                all_nodes[wp_name] = [map_x, map_y]
-                created_waypoints.append(wp_name)
-            
-            # Recrear rutas
-            if previous_node:
-                roads.append((previous_node, wp_name))
-                previous_node = wp_name
-        
-        if data['end_node'] and previous_node:
-            roads.append((previous_node, data['end_node']))
-        
-        path_info.set(f"Rehecho: Carretera con {len(created_waypoints)} waypoints")
-        
-    elif action_type == "move_node":
-        #movimiento de nodo
-        node_name = data['node_name']
-        all_nodes[node_name] = data['new_pos'].copy()
-        if node_name in waypoints:
-            waypoints[node_name] = data['new_pos'].copy()
-        elif node_name in original_cities:
-            original_cities[node_name] = data['new_pos'].copy()
-        path_info.set(f"Rehecho: Movimiento de {node_name}")
-        
-    elif action_type == "load_config":
-        #carga de configuración
-        waypoints = data['new_waypoints'].copy()
-        roads = data['new_roads'].copy()
-        all_nodes = data['new_all_nodes'].copy()
-        path_info.set(f"Rehecho: Carga de configuración")
-    
-    elif action_type in ["auto_connect_cities", "auto_connect_waypoints", "build_mst", "smart_generation"]:
-        #conexiones automáticas
-        roads.clear()
-        roads.extend(data['new_roads'])
-        path_info.set(f"Rehecho: Conexiones automáticas ({data.get('connections_made', 0)} rutas)")
-        
-    elif action_type == "delete_city_connections":
-        #eliminación de conexiones de ciudad
-        roads.clear()
-        roads.extend(data['new_roads'])
-        path_info.set(f"Rehecho: Eliminación de conexiones de {data['city']}")
-        
-    elif action_type == "delete_waypoint":
-        #eliminación de waypoint
-        waypoints = data['new_waypoints'].copy()
-        roads = data['new_roads'].copy()
-        all_nodes = data['new_all_nodes'].copy()
-        path_info.set(f"Rehecho: Eliminación de waypoint {data['waypoint_name']}")
+def redo_action(event=None):
+    """Rehace la acción deshecha aplicando de nuevo su delta"""
+    if not history.can_redo():
+        messagebox.showinfo("Rehacer", "No hay acciones para rehacer")
+        return
     
-    update_weights()
-    waypoint_count.set(f"📍 Waypoints: {len(waypoints)}")
-    road_count.set(f"🛣️  Rutas: {len(roads)}")
+    action = history.redo(network)
+    path_info.set(f"Rehecho: {describe_action(action)}")
+    update_history_display()
     redraw()
 
 def update_history_display():
@@ -626,7 +382,14 @@ def update_history_display():
     redo_btn.config(state="normal" if history.can_redo() else "disabled")
     
     # Actualizar información en la barra de estado
-    history_info.set(f"Historial: {len(history.history)} acciones | Deshacer: {'✓' if history.can_undo() else '✗'} | Rehacer: {'✓' if history.can_redo() else '✗'}")
+    history_info.set(f"Historial: {len(history.history)} acciones ({history.bytes // 1024} KB) | Deshacer: {'✓' if history.can_undo() else '✗'} | Rehacer: {'✓' if history.can_redo() else '✗'}")
+
+def update_metrics_display():
+    """Resumen móvil de la instrumentación junto al historial (solo si está activada)"""
+    metrics_info.set(metrics.status_text(
+        timers=("search", "update_weights", "redraw", "animation"),
+        counters=("nodes_settled", "edges_relaxed", "canvas_items", "cache_hits")))
+    root.after(METRICS_REFRESH_MS, update_metrics_display)
 
 def clear_history():
     """Limpia el historial"""
@@ -634,117 +397,47 @@ def clear_history():
     update_history_display()
     path_info.set("Historial limpiado")
 
+def view_offset():
+    """Posición en pantalla del origen del mapa"""
+    iw, ih = map_width * zoom, map_height * zoom
+    return pan_x + (CANVAS_WIDTH - iw) // 2, pan_y + (CANVAS_HEIGHT - ih) // 2
+
 def redraw():
-    canvas.delete("all")
-    if map_img:
-        ix, iy = pan_x + (CANVAS_WIDTH - map_img.width()) // 2, pan_y + (CANVAS_HEIGHT - map_img.height()) // 2
-        canvas.create_image(ix, iy, image=map_img, anchor="nw")
-    
-    # Dibujar carreteras existentes
-    if show_roads:
-        for a, b in roads:
-            if a in all_nodes and b in all_nodes:
-                x1, y1 = transform_coords(*all_nodes[a])
-                x2, y2 = transform_coords(*all_nodes[b])
-                
-                # Determinar color de la carretera
-                road_color = COLOR_ROAD
-                
-                # Dibujar carretera
-                canvas.create_line(x1, y1, x2, y2, 
-                                 fill=road_color, width=4, capstyle="round")
-    
-    # Dibujar waypoints
-    if show_waypoints:
-        for wp_name, (ox, oy) in waypoints.items():
-            x, y = transform_coords(ox, oy)
-            r = max(3, min(NODE_RADIUS * zoom * 0.7, 8))
-            
-            # Waypoint seleccionado
-            if selected_node == wp_name:
-                canvas.create_oval(x-r-2, y-r-2, x+r+2, y+r+2, 
-                                 fill=COLOR_SELECTED, outline="white", width=2)
-            
-            # Waypoint normal
-            canvas.create_oval(x-r, y-r, x+r, y+r, 
-                             fill=COLOR_WAYPOINT, outline="white", width=1)
-    
-    # Dibujar ciudades
-    for city, (ox, oy) in original_cities.items():
-        x, y = transform_coords(ox, oy)
-        r = max(5, min(NODE_RADIUS * zoom, 12))
-        
-        # Ciudad seleccionada
-        if selected_node == city:
-            canvas.create_oval(x-r-3, y-r-3, x+r+3, y+r+3, 
-                             fill=COLOR_SELECTED, outline="white", width=3)
-        
-        # Ciudad normal
-        canvas.create_oval(x-r, y-r, x+r, y+r, 
-                         fill=COLOR_CITY, outline="white", width=2)
-        
-        if zoom > 0.35:
-            f_size = int(9*zoom+5)
-           
-            offset_y = y-r-10
-           
-            if city == "Maracaibo" and y < 50:
-                offset_y = y + r + 15
-            
-            canvas.create_text(x+1, offset_y+1, text=city, 
-                             fill="white", font=("Segoe UI", f_size, "bold"))
-            canvas.create_text(x, offset_y, text=city, 
-                             fill="black", font=("Segoe UI", f_size, "bold"))
-    
-    # Dibujar ruta calculada
-    if current_path: 
-        draw_path()
+    """Actualiza la escena retenida: solo cambia lo que difiere del último cuadro"""
+    if scene is None:
+        # Aún se está cargando la red (ver finish_startup)
+        return
+    with metrics.timer("redraw"):
+        _redraw()
 
-def draw_path():
-    """Dibuja la ruta calculada EN COLOR AZUL para mejor visibilidad"""
-    path_points = []
+def _redraw():
+    w = canvas.winfo_width() if canvas.winfo_width() > 1 else CANVAS_WIDTH
+    h = canvas.winfo_height() if canvas.winfo_height() > 1 else CANVAS_HEIGHT
     
-    # Recolectar puntos de la ruta
-    for node in current_path:
-        if node in all_nodes:
-            x, y = transform_coords(*all_nodes[node])
-            path_points.append((x, y))
+    # Una edición (o deshacer) toca solo sus ítems; una carga recrea la escena
+    scene.sync(engine.graph, original_cities, network)
+    scene.set_layers(roads=show_roads,
+                     waypoints=show_waypoints and zoom >= WAYPOINT_MIN_ZOOM)
     
-    # Dibujar línea de ruta EN AZUL
-    if len(path_points) >= 2:
-        #dibujar una línea
-        for i in range(len(path_points) - 1):
-            x1, y1 = path_points[i]
-            x2, y2 = path_points[i + 1]
-            # Línea de fondo blanca
-            canvas.create_line(x1, y1, x2, y2, 
-                             fill="white", width=10, capstyle="round")
-            # Línea principal AZUL
-            canvas.create_line(x1, y1, x2, y2, 
-                             fill=COLOR_PATH, width=8, capstyle="round")
-    
-    # Resaltar origen y destino
-    for c, col in [(current_start, "#2ecc71"), (current_end, "#e74c3c")]:
-        if c in all_nodes:
-            x, y = transform_coords(*all_nodes[c])
-            canvas.create_oval(x-15, y-15, x+15, y+15, 
-                             fill=col, outline="white", width=4)
-            # Texto para origen/destino
-            label = "" if c == current_start else ""
-            canvas.create_text(x, y-25, text=label, 
-                             fill="white", font=("Segoe UI", 10, "bold"),
-                             anchor="center")
+    # Pan = canvas.move; zoom = recolocar lo visible con su nivel de detalle
+    scene.set_view(zoom, view_offset(), (w, h))
+    scene.select(selected_node)
+    scene.set_path(current_path, current_start, current_end)
 
 # ------------------ MANEJADORES DE EVENTOS LIMPIOS ------------------
 
 def on_canvas_click(event):
-    global selected_node, dragging, drag_start
+    global selected_node, dragging, drag_start, moving_node
     
     # Intentar seleccionar una ciudad o waypoint para la ruta
     node = select_node_at(event.x, event.y)
     
     if node:
         selected_node = node
+        # Un waypoint se puede arrastrar a otra posición (ver on_canvas_drag)
+        if node in network.waypoints:
+            moving_node = node
+            drag_start = (event.x, event.y)
         path_info.set(f"Seleccionado: {node}")
         redraw()
     else:
@@ -755,7 +448,20 @@ def on_canvas_click(event):
         redraw()
 
 def on_canvas_drag(event):
-    global pan_x, pan_y, dragging, drag_start
+    global pan_x, pan_y, drag_start
+    
+    if moving_node:
+        # Los temblores del clic no cuentan como movimiento
+        if drag_start is not None:
+            if distance(drag_start, (event.x, event.y)) < MOVE_THRESHOLD_PX:
+                return
+            drag_start = None
+        # Todos los movimientos de un arrastre forman una sola acción del historial
+        with history.action("move_node", {"node": moving_node}, coalesce_key=moving_node):
+            network.move_node(moving_node, list(inverse_transform_coords(event.x, event.y)))
+        update_history_display()
+        redraw()
+        return
     
     # Permite mover el mapa de Venezuela
     if dragging:
@@ -768,11 +474,14 @@ def on_canvas_drag(event):
         redraw()
 
 def on_canvas_release(event):
-    global dragging
+    global dragging, moving_node
     dragging = False
+    moving_node = None
+    # Un arrastre nuevo no se combina con el anterior en el historial
+    history.seal()
 
 def do_zoom(event):
-    global zoom, pan_x, pan_y, map_img
+    global zoom, pan_x, pan_y, refine_job
     factor = ZOOM_STEP if event.delta > 0 else 1 / ZOOM_STEP
     ox, oy = inverse_transform_coords(event.x, event.y)
     new_z = max(ZOOM_MIN, min(ZOOM_MAX, zoom * factor))
@@ -782,8 +491,11 @@ def do_zoom(event):
         pan_x -= (nx_s - event.x)
         pan_y -= (ny_s - event.y)
         constrain_pan()
-        map_img = resize_map_image()
+        # Teselas rápidas mientras la rueda gira; calidad alta cuando se detiene
         redraw()
+        if refine_job:
+            root.after_cancel(refine_job)
+        refine_job = root.after(REFINE_DELAY_MS, scene.refine)
 
 # ------------------ INTERFAZ MEJORADA ------------------
 root = tk.Tk()
@@ -816,11 +528,25 @@ end_var = tk.StringVar()
 cb_end = ttk.Combobox(sidebar, textvariable=end_var, 
                      values=sorted(list(original_cities.keys())), 
                      state="readonly", height=15)
-cb_end.pack(fill="x", pady=(5, 20))
+cb_end.pack(fill="x", pady=(5, 15))
 cb_end.set("Maracaibo")
 
+ttk.Label(sidebar, text="Algoritmo:").pack(anchor="w")
+algorithm_var = tk.StringVar()
+cb_algorithm = ttk.Combobox(sidebar, textvariable=algorithm_var, 
+                           values=list(ALGORITHM_NAMES.keys()), 
+                           state="readonly", height=15)
+cb_algorithm.pack(fill="x", pady=(5, 20))
+cb_algorithm.set("Dijkstra")
+
+animate_var = tk.BooleanVar(value=True)
+tk.Checkbutton(sidebar, text="Animar trazado", variable=animate_var,
+               bg=COLOR_SIDEBAR, fg=COLOR_TEXT, selectcolor=COLOR_BG,
+               activebackground=COLOR_SIDEBAR, activeforeground=COLOR_TEXT).pack(anchor="w", pady=(0, 10))
+
 # Botón para calcular ruta con información del algoritmo
-ttk.Button(sidebar, text="🚗 CALCULAR RUTA (DIJKSTRA)", command=find_path).pack(fill="x", ipady=10, pady=(0, 10))
+calc_btn = ttk.Button(sidebar, text="🚗 CALCULAR RUTA", command=find_path, state="disabled")
+calc_btn.pack(fill="x", ipady=10, pady=(0, 10))
 
 # Botones de control
 waypoint_btn = ttk.Button(sidebar, text="OCULTAR WAYPOINTS", command=toggle_waypoints)
@@ -829,6 +555,14 @@ waypoint_btn.pack(fill="x", ipady=8, pady=(0, 5))
 road_btn = ttk.Button(sidebar, text="OCULTAR CARRETERAS", command=toggle_roads)
 road_btn.pack(fill="x", ipady=8, pady=(0, 5))
 
+# Deshacer / rehacer
+history_frame = ttk.Frame(sidebar)
+history_frame.pack(fill="x", pady=(10, 0))
+undo_btn = ttk.Button(history_frame, text="↶ DESHACER", command=undo_action, state="disabled")
+undo_btn.pack(side="left", fill="x", expand=True, padx=(0, 3))
+redo_btn = ttk.Button(history_frame, text="↷ REHACER", command=redo_action, state="disabled")
+redo_btn.pack(side="left", fill="x", expand=True, padx=(3, 0))
+
 # Estadísticas
 stats_frame = ttk.Frame(sidebar)
 stats_frame.pack(fill="x", pady=(10, 0))
@@ -844,34 +578,34 @@ info_frame.pack(side="bottom", fill="x", padx=10, pady=5)
 path_info = tk.StringVar(value="")
 tk.Label(info_frame, textvariable=path_info, bg=COLOR_BG, fg=COLOR_PATH,  # Ahora usa COLOR_PATH (azul)
         font=("Segoe UI", 10, "bold")).pack(side="left")
+history_info = tk.StringVar(value="")
+tk.Label(info_frame, textvariable=history_info, bg=COLOR_BG, fg="#888",
+        font=("Segoe UI", 9)).pack(side="right")
+metrics_info = tk.StringVar(value="")
+if metrics.enabled:
+    tk.Label(info_frame, textvariable=metrics_info, bg=COLOR_BG, fg="#888",
+            font=("Segoe UI", 8)).pack(side="right", padx=(0, 15))
 
 # Canvas
 canvas = tk.Canvas(root, bg="#F0F0F0", highlightthickness=0)
 canvas.pack(side="right", fill="both", expand=True)
+route_worker = RouteWorker(engine, root.after)
+path_animator = PathAnimator(root.after, root.after_cancel)
+cb_start.bind("<<ComboboxSelected>>", cancel_route)
+cb_end.bind("<<ComboboxSelected>>", cancel_route)
 
 # --- INICIALIZACIÓN ---
-try:
-    original_image = Image.open(MAP_IMAGE)
-    map_width, map_height = original_image.width, original_image.height
-    map_img = resize_map_image()
-    print(f"Mapa cargado: {map_width}x{map_height}")
-    print(f"Waypoints cargados: {len(waypoints)}")
-    print(f"Maracaibo ubicado en: {original_cities['Maracaibo']}")
-except Exception as e:
-    print(f"Error: {e}")
-    messagebox.showerror("Error", f"No se pudo cargar el mapa: {e}")
-
-# Cargar configuración si existe
-load_configuration()
-update_weights()
-
-
-# Eventos del mouse
-canvas.bind("<MouseWheel>", do_zoom)
-canvas.bind("<Button-1>", on_canvas_click)
-canvas.bind("<B1-Motion>", on_canvas_drag)
-canvas.bind("<ButtonRelease-1>", on_canvas_release)
-canvas.bind("<Button-3>", on_canvas_click)  # Click derecho
-
-redraw()
+# La ventana se muestra vacía de inmediato; red, trazados y mapa se cargan en un
+# hilo y finish_startup completa la escena (la red se construye una sola vez)
+root.update_idletasks()
+window_time = time.perf_counter() - STARTUP_START
+metrics.record("startup_window", window_time)
+path_info.set("Cargando red vial...")
+StartupLoader(root.after).start(lambda progress: load_resources(network, MAP_IMAGE, progress, zoom=zoom),
+                                on_done=finish_startup, on_progress=path_info.set,
+                                on_error=on_startup_error)
+
+if metrics.enabled:
+    update_metrics_display()
+root.protocol("WM_DELETE_WINDOW", on_closing)
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,5 @@
+# Motor de rutas de Venezuela, utilizable sin la interfaz gráfica
+from routing.errors import RoutingError, NodeNotFoundError, NoPathError
+from routing.engine import RoutingEngine
+from routing.roads import RoadStore
+from routing.store import NetworkStore
@@ -0,0 +1,148 @@
+# autoconnect.py
+# Generación automática de carreteras sobre una NetworkStore (sin interfaz gráfica)
+from contextlib import contextmanager
+
+from data.geometry import ESCALA_KM, Coordinates
+from routing.mst import minimum_spanning_forest
+
+
+@contextmanager
+def _action(network, action_type, data=None):
+    """Acción del historial de la red, o un diccionario suelto si no hay historial"""
+    if network.history is None:
+        yield dict(data or {})
+        return
+    with network.history.action(action_type, data) as info:
+        yield info
+
+
+def find_nearest_waypoint(network, city_name, max_distance=100):
+    """Encuentra el waypoint más cercano a una ciudad"""
+    if city_name not in network.cities:
+        return None
+
+    # El índice espacial trabaja en píxeles del mapa; max_distance viene en km
+    city_pos = network.cities[city_name]
+    hit = network.engine.spatial_index().nearest(city_pos[0], city_pos[1],
+                                                 max_distance=max_distance / ESCALA_KM,
+                                                 accept=lambda n: n in network.waypoints)
+    if hit is None:
+        return None, None
+    return hit[1], hit[0] * ESCALA_KM
+
+
+def connect_cities_to_nearest_waypoints(network, max_distance=80):
+    """Conecta cada ciudad a su waypoint más cercano"""
+    # Todas las distancias ciudad×waypoint en un solo bloque vectorizado
+    coords = Coordinates(network.nodes)
+    cities = list(network.cities.keys())
+    nearest_rows, dists = coords.nearest(coords.rows(cities), coords.rows(network.waypoints), max_distance)
+
+    connections_made = 0
+    with _action(network, "auto_connect_cities") as info:
+        for city, row, dist in zip(cities, nearest_rows, dists):
+            if row >= 0:
+                nearest_wp = coords.names[row]
+                # Verificar si la conexión ya existe
+                if network.add_edge(city, nearest_wp):
+                    connections_made += 1
+                    print(f"Conectado: {city} -> {nearest_wp} (distancia: {dist:.1f})")
+        info["connections_made"] = connections_made
+
+    return connections_made
+
+
+def find_k_nearest_neighbors(network, node, k=3, node_type="all", max_distance=150):
+    """Encuentra los k vecinos más cercanos a un nodo"""
+    if node not in network.nodes:
+        return []
+
+    node_pos = network.nodes[node]
+
+    # Filtrar por tipo si es necesario
+    def accept(other_node):
+        if other_node == node:
+            return False
+        if node_type == "city":
+            return other_node in network.cities
+        if node_type == "waypoint":
+            return other_node in network.waypoints
+        return True
+
+    neighbors = network.engine.spatial_index().k_nearest(node_pos[0], node_pos[1], k,
+                                                         max_distance / ESCALA_KM, accept)
+    return [(dist * ESCALA_KM, other_node) for dist, other_node in neighbors]
+
+
+def connect_waypoints_to_neighbors(network, k=3, max_distance=120):
+    """Conecta cada waypoint a sus k vecinos más cercanos"""
+    connections_made = 0
+    with _action(network, "auto_connect_waypoints") as info:
+        for wp in list(network.waypoints.keys()):
+            neighbors = find_k_nearest_neighbors(network, wp, k, "waypoint", max_distance)
+            for dist, neighbor in neighbors:
+                # Verificar si la conexión ya existe
+                if network.add_edge(wp, neighbor):
+                    connections_made += 1
+        info["connections_made"] = connections_made
+
+    return connections_made
+
+
+def build_minimum_spanning_tree(network, max_distance=200):
+    """Construye un árbol de expansión mínimo para conectar todos los waypoints"""
+    if len(network.waypoints) < 2:
+        return 0
+
+    # Bosque de expansión mínimo con aristas candidatas dispersas (O(n) en vez de n²)
+    tree, components = minimum_spanning_forest(network.waypoints, max_distance / ESCALA_KM)
+    if components > 1:
+        print(f"MST: {components} grupos de waypoints sin conexión a menos de {max_distance} km")
+
+    # Agregar las conexiones del MST a las rutas
+    connections_made = 0
+    with _action(network, "build_mst", {"components": components}) as info:
+        for wp1, wp2, _ in tree:
+            if network.add_edge(wp1, wp2):
+                connections_made += 1
+        info["connections_made"] = connections_made
+
+    return connections_made
+
+
+def smart_road_generation(network):
+    """Generación inteligente de rutas siguiendo la lógica de carreteras"""
+    # Los pasos registran sus cambios dentro de esta acción: se deshace todo junto
+    with _action(network, "smart_generation") as info:
+        connections_made, city_connections = _smart_road_generation_steps(network)
+        info["connections_made"] = connections_made
+        info["city_connections"] = city_connections
+
+    return connections_made
+
+
+def _smart_road_generation_steps(network):
+    connections_made = 0
+
+    # Paso 1: Conectar ciudades a waypoints cercanos
+    connections_made += connect_cities_to_nearest_waypoints(network, max_distance=100)
+
+    # Paso 2: Conectar waypoints entre sí (vecinos cercanos)
+    connections_made += connect_waypoints_to_neighbors(network, k=3, max_distance=150)
+
+    # Paso 3: Construir árbol de expansión mínimo para garantizar conectividad
+    connections_made += build_minimum_spanning_tree(network)
+
+    # Paso 4: Conectar ciudades principales entre sí si están relativamente cerca
+    city_connections = 0
+    coords = Coordinates(network.cities)
+
+    # Conectar ciudades si están relativamente cerca (ej: Caracas-La Guaira)
+    for i, j, dist in zip(*coords.pairs_within(80)):
+        city1, city2 = coords.names[i], coords.names[j]
+        if network.add_edge(city1, city2):
+            city_connections += 1
+            print(f"Conectadas ciudades cercanas: {city1} -> {city2}")
+
+    connections_made += city_connections
+    return connections_made, city_connections
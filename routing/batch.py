@@ -0,0 +1,207 @@
+# batch.py
+# Consultas de ruta por lotes: lee pares origen/destino y escribe distancia y camino
+#
+# Uso: python -m routing.batch [entrada] [-o salida] [--workers N] [--algorithm dijkstra|astar|ch]
+#                               [--ch jerarquia.json]
+#      La entrada puede ser CSV (columnas origin,destination) o JSONL
+#      ({"origin": ..., "destination": ...}); sin archivo se lee de stdin. Las líneas
+#      ilegibles salen como registros con error y el lote continúa.
+import argparse
+import csv
+import io
+import itertools
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from routing.engine import ALGORITHMS, RoutingEngine
+from routing.errors import RoutingError
+from routing.loader import CH_FILE, NODES_FILE, ROADS_FILE, SNAPSHOT_FILE, derived_file
+from routing.snapshot import ensure_snapshot
+
+# Consultas por tarea enviada a un proceso trabajador
+CHUNK_SIZE = 256
+# Tareas en vuelo por trabajador; acota la memoria sin importar el tamaño de la entrada
+MAX_PENDING_PER_WORKER = 4
+
+ORIGIN_KEYS = ("origin", "origen", "src")
+DESTINATION_KEYS = ("destination", "destino", "dst")
+
+_worker_engine = None
+_worker_algorithm = None
+
+
+# ------------------ ENTRADA ------------------
+def _pick(record, keys):
+    for key in keys:
+        if key in record:
+            return record[key]
+    return None
+
+
+def read_queries(stream, fmt):
+    """Genera (origen, destino, error) línea por línea, sin cargar el archivo completo;
+    error describe una línea que no se pudo leer (None si está bien)"""
+    if fmt != "jsonl":
+        for record in csv.DictReader(stream):
+            yield _pick(record, ORIGIN_KEYS), _pick(record, DESTINATION_KEYS), None
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as ex:
+            yield None, None, f"{type(ex).__name__}: {ex} (línea {number})"
+            continue
+        if not isinstance(record, dict):
+            yield None, None, f"ValueError: se esperaba un objeto JSON (línea {number})"
+            continue
+        yield _pick(record, ORIGIN_KEYS), _pick(record, DESTINATION_KEYS), None
+
+
+def detect_format(path, explicit):
+    if explicit:
+        return explicit
+    if path and path.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return "csv"
+
+
+# ------------------ CÁLCULO ------------------
+def _init_worker(snapshot_file, algorithm, ch_file):
+    global _worker_engine, _worker_algorithm
+    # Todos los trabajadores comparten las páginas del snapshot mapeado en memoria
+    _worker_engine = RoutingEngine.from_snapshot(snapshot_file)
+    _worker_algorithm = algorithm
+    if algorithm == "ch":
+        _worker_engine.prepare_ch(ch_file, save=False)
+
+
+def _solve_chunk(queries):
+    """Resuelve un bloque de consultas; los errores se devuelven por línea"""
+    results = []
+    for query in queries:
+        origin, destination = query[0], query[1]
+        if len(query) > 2 and query[2]:
+            results.append((None, None, query[2]))
+            continue
+        try:
+            path, km = _worker_engine.route(origin, destination, _worker_algorithm)
+            results.append((km, path, None))
+        except RoutingError as ex:
+            results.append((None, None, f"{type(ex).__name__}: {ex}"))
+    return results
+
+
+def _chunks(queries, size):
+    while True:
+        chunk = list(itertools.islice(queries, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def solve_stream(queries, nodes_file=NODES_FILE, roads_file=ROADS_FILE,
+                 algorithm="dijkstra", workers=1, ch_file=None, snapshot_file=None):
+    """Genera (origen, destino, km, camino, error) en el orden de entrada
+
+    queries son pares (origen, destino) o ternas de read_queries con su error de lectura.
+    Sin ch_file ni snapshot_file se usan los de utils/ para la red de la aplicación y
+    archivos propios (ver loader.derived_file) para cualquier otra.
+    """
+    if workers < 1:
+        raise ValueError(f"workers debe ser al menos 1 (se recibió {workers})")
+    snapshot_file = snapshot_file or derived_file(SNAPSHOT_FILE, nodes_file, roads_file)
+    ch_file = ch_file or derived_file(CH_FILE, nodes_file, roads_file)
+    ensure_snapshot(nodes_file, roads_file, snapshot_file)
+    if algorithm == "ch":
+        # Se prepara una vez en el proceso principal para que los trabajadores solo la lean
+        RoutingEngine.from_snapshot(snapshot_file).prepare_ch(ch_file)
+
+    chunks = _chunks(queries, CHUNK_SIZE)
+    initargs = (snapshot_file, algorithm, ch_file)
+
+    if workers == 1:
+        _init_worker(*initargs)
+        for chunk in chunks:
+            for query, result in zip(chunk, _solve_chunk(chunk)):
+                yield tuple(query[:2]) + result
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=initargs) as pool:
+        pending = deque()
+        max_pending = workers * MAX_PENDING_PER_WORKER
+        for chunk in itertools.chain(chunks, [None]):
+            if chunk is not None:
+                pending.append((chunk, pool.submit(_solve_chunk, chunk)))
+            # Se emite en orden y se frena la lectura cuando hay demasiadas tareas en vuelo
+            while pending and (chunk is None or len(pending) >= max_pending):
+                done_chunk, future = pending.popleft()
+                for query, result in zip(done_chunk, future.result()):
+                    yield tuple(query[:2]) + result
+
+
+# ------------------ SALIDA ------------------
+def write_results(results, out, fmt):
+    if fmt == "jsonl":
+        for origin, destination, km, path, error in results:
+            row = {"origin": origin, "destination": destination, "km": km, "path": path}
+            if error:
+                row["error"] = error
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return
+
+    writer = csv.writer(out)
+    writer.writerow(["origin", "destination", "km", "path", "error"])
+    for origin, destination, km, path, error in results:
+        writer.writerow([origin, destination, "" if km is None else f"{km:.3f}",
+                         "" if path is None else " > ".join(path), error or ""])
+
+
+def _positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"debe ser al menos 1: {text}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consultas de ruta por lotes (CSV o JSONL)")
+    parser.add_argument("input", nargs="?", help="archivo de entrada (por defecto: stdin)")
+    parser.add_argument("-o", "--output", help="archivo de salida (por defecto: stdout)")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"))
+    parser.add_argument("--output-format", choices=("csv", "jsonl"))
+    parser.add_argument("--workers", type=_positive_int, default=1, help="procesos trabajadores")
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="dijkstra")
+    parser.add_argument("--nodes", default=NODES_FILE, help="archivo node_positions.json")
+    parser.add_argument("--roads", default=ROADS_FILE, help="archivo roads_config.json")
+    parser.add_argument("--snapshot",
+                        help="snapshot binario compartido por los trabajadores (se regenera si los JSON "
+                             "cambian; por defecto utils/network.bin solo para la red de la aplicación)")
+    parser.add_argument("--ch",
+                        help="jerarquía de contracción para --algorithm ch (se regenera si la red cambia; "
+                             "por defecto la de utils/ solo para la red de la aplicación)")
+    args = parser.parse_args(argv)
+
+    in_fmt = detect_format(args.input, args.input_format)
+    out_fmt = args.output_format or (detect_format(args.output, None) if args.output else in_fmt)
+
+    src = open(args.input, 'r', newline='', encoding='utf-8') if args.input else \
+        io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        results = solve_stream(read_queries(src, in_fmt), args.nodes, args.roads,
+                               args.algorithm, args.workers, ch_file=args.ch, snapshot_file=args.snapshot)
+        write_results(results, out, out_fmt)
+    finally:
+        if args.input:
+            src.close()
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
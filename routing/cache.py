@@ -0,0 +1,72 @@
+# cache.py
+# Caché LRU con estadísticas de aciertos y fallos
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Diccionario con capacidad fija que descarta lo usado hace más tiempo
+
+    Se comparte entre el hilo de Tk y el de rutas: cada operación va bajo un candado.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = OrderedDict()
+        self.hits = self.misses = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key):
+        with self._lock:
+            value = self.data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.capacity:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.data.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.data), "capacity": self.capacity}
+
+
+class RouteCache(LRUCache):
+    """Rutas por (origen, destino, algoritmo), válidas solo para una versión de la red"""
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.version = None
+
+    def validate(self, version):
+        """Vacía la caché si la red cambió desde que se guardaron las rutas"""
+        with self._lock:
+            if version != self.version:
+                self.clear()
+                self.version = version
+
+    def put(self, key, value, version=None):
+        """Con version, solo se guarda si la caché sigue siendo de esa versión (un
+        resultado calculado en otro hilo mientras se editaba la red se descarta)"""
+        with self._lock:
+            if version is None or version == self.version:
+                super().put(key, value)
+
+    def stats(self):
+        return {**super().stats(), "version": self.version}
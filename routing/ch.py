@@ -0,0 +1,224 @@
+# ch.py
+# Jerarquías de contracción (Contraction Hierarchies) sobre CSRGraph
+import heapq
+import json
+from array import array
+
+from routing.errors import NoPathError
+
+INF = float('inf')
+
+# Límite de nodos asentados en cada búsqueda de testigos; si se alcanza se
+# agrega el atajo, lo que nunca rompe la corrección (solo agrega aristas)
+WITNESS_SETTLE_LIMIT = 60
+
+
+def _witness_distance(adj, src, skip, targets, limit):
+    """Distancias desde src sin pasar por skip, acotadas por limit"""
+    dist = {src: 0.0}
+    heap = [(0.0, src)]
+    pending = set(targets)
+    settled = 0
+    while heap and pending and settled < WITNESS_SETTLE_LIMIT:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        if d > limit:
+            break
+        pending.discard(u)
+        settled += 1
+        for v, (w, _) in adj[u].items():
+            if v == skip:
+                continue
+            nd = d + w
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+def _shortcuts(adj, v):
+    """Atajos (u, w, peso) necesarios al contraer v"""
+    nbrs = list(adj[v].items())
+    result = []
+    for i, (u, (wu, _)) in enumerate(nbrs):
+        rest = nbrs[i + 1:]
+        if not rest:
+            break
+        limit = wu + max(wv for _, (wv, _) in rest)
+        dist = _witness_distance(adj, u, v, [w for w, _ in rest], limit)
+        for w, (wv, _) in rest:
+            via = wu + wv
+            if dist.get(w, INF) > via:
+                result.append((u, w, via))
+    return result
+
+
+class ContractionHierarchy:
+    """Grafo ascendente: cada nodo guarda solo las aristas hacia nodos de mayor rango"""
+
+    def __init__(self, fingerprint, names, rank, up_offsets, up_targets, up_weights, up_middle):
+        self.fingerprint = fingerprint
+        self.names = names
+        self.rank = rank
+        self.up_offsets = up_offsets
+        self.up_targets = up_targets
+        self.up_weights = up_weights
+        # Nodo intermedio de cada atajo (-1 si es una carretera original)
+        self.up_middle = up_middle
+        self._middle = None
+
+    # ------------------ PREPROCESAMIENTO ------------------
+    @classmethod
+    def build(cls, csr):
+        """Contrae los nodos en orden de diferencia de aristas (con actualización perezosa)"""
+        n = len(csr)
+        adj = [{} for _ in range(n)]
+        for u in range(n):
+            for v, w in csr.neighbors(u):
+                if v != u and w < adj[u].get(v, (INF, -1))[0]:
+                    adj[u][v] = (w, -1)
+
+        deleted = [0] * n
+
+        def priority(v):
+            return len(_shortcuts(adj, v)) - len(adj[v]) + deleted[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        rank = array('i', [0] * n)
+        up = [None] * n
+        order = 0
+
+        while heap:
+            _, v = heapq.heappop(heap)
+            # Actualización perezosa: si su prioridad empeoró, se reinserta
+            p = priority(v)
+            if heap and p > heap[0][0]:
+                heapq.heappush(heap, (p, v))
+                continue
+
+            for u, w, via in _shortcuts(adj, v):
+                if via < adj[u].get(w, (INF, -1))[0]:
+                    adj[u][w] = (via, v)
+                    adj[w][u] = (via, v)
+
+            rank[v] = order
+            order += 1
+            up[v] = adj[v]
+            for u in adj[v]:
+                del adj[u][v]
+                deleted[u] += 1
+            adj[v] = {}
+
+        up_offsets = array('i', [0])
+        up_targets = array('i')
+        up_weights = array('d')
+        up_middle = array('i')
+        for v in range(n):
+            for u, (w, mid) in up[v].items():
+                up_targets.append(u)
+                up_weights.append(w)
+                up_middle.append(mid)
+            up_offsets.append(len(up_targets))
+
+        return cls(csr.fingerprint(), list(csr.names), rank,
+                   up_offsets, up_targets, up_weights, up_middle)
+
+    def shortcut_count(self):
+        return sum(1 for m in self.up_middle if m >= 0)
+
+    # ------------------ DISCO ------------------
+    def save(self, path):
+        data = {
+            "fingerprint": self.fingerprint,
+            "names": self.names,
+            "rank": self.rank.tolist(),
+            "up_offsets": self.up_offsets.tolist(),
+            "up_targets": self.up_targets.tolist(),
+            "up_weights": self.up_weights.tolist(),
+            "up_middle": self.up_middle.tolist(),
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(data["fingerprint"], data["names"], array('i', data["rank"]),
+                   array('i', data["up_offsets"]), array('i', data["up_targets"]),
+                   array('d', data["up_weights"]), array('i', data["up_middle"]))
+
+    # ------------------ CONSULTA ------------------
+    def query(self, src, dst):
+        """Búsqueda bidireccional ascendente; devuelve (distancia, camino de ids, nodos asentados)"""
+        offsets, targets, weights = self.up_offsets, self.up_targets, self.up_weights
+        dist = ({src: 0.0}, {dst: 0.0})
+        pred = ({}, {})
+        heaps = ([(0.0, src)], [(0.0, dst)])
+        best, meet = (0.0, src) if src == dst else (INF, -1)
+        settled = 0
+
+        while True:
+            # Se avanza por el lado con la menor clave mientras pueda mejorar best
+            side = -1
+            for i in (0, 1):
+                if heaps[i] and heaps[i][0][0] < best and (side < 0 or heaps[i][0][0] < heaps[side][0][0]):
+                    side = i
+            if side < 0:
+                break
+
+            d, u = heapq.heappop(heaps[side])
+            if d > dist[side][u]:
+                continue
+            settled += 1
+            other = dist[1 - side].get(u)
+            if other is not None and d + other < best:
+                best, meet = d + other, u
+
+            mine, prev = dist[side], pred[side]
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                nd = d + weights[k]
+                if nd < mine.get(v, INF):
+                    mine[v] = nd
+                    prev[v] = u
+                    heapq.heappush(heaps[side], (nd, v))
+
+        if meet < 0:
+            raise NoPathError(f"No hay conexión entre {self.names[src]} y {self.names[dst]}")
+
+        forward = [meet]
+        while forward[-1] != src:
+            forward.append(pred[0][forward[-1]])
+        forward.reverse()
+        backward = [meet]
+        while backward[-1] != dst:
+            backward.append(pred[1][backward[-1]])
+
+        ids = forward + backward[1:]
+        return best, self._unpack(ids), settled
+
+    def _unpack(self, ids):
+        """Reemplaza cada atajo por la secuencia original de waypoints"""
+        if self._middle is None:
+            self._middle = {}
+            for v in range(len(self.names)):
+                for k in range(self.up_offsets[v], self.up_offsets[v + 1]):
+                    self._middle[v, self.up_targets[k]] = self.up_middle[k]
+
+        path = [ids[0]]
+        stack = []
+        for a, b in zip(ids, ids[1:]):
+            stack.append((a, b))
+            while stack:
+                u, v = stack.pop()
+                low, high = (u, v) if self.rank[u] < self.rank[v] else (v, u)
+                mid = self._middle[low, high]
+                if mid < 0:
+                    path.append(v)
+                else:
+                    stack.append((mid, v))
+                    stack.append((u, mid))
+        return path
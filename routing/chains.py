@@ -0,0 +1,199 @@
+# chains.py
+# Contracción de cadenas de grado 2: grafo de cruces con aristas que recuerdan sus waypoints
+import heapq
+from array import array
+
+from routing.errors import NoPathError
+
+INF = float('inf')
+
+
+class ChainGraph:
+    """Grafo reducido de una CSRGraph: solo quedan los nodos de grado distinto de 2
+
+    Cada cadena de waypoints de grado 2 entre dos cruces se reemplaza por una arista
+    con el peso total; la cadena guarda sus ids interiores (en la CSR original) y las
+    distancias acumuladas, para expandir la ruta y para consultas que empiezan o
+    terminan en mitad de una cadena. Los ids de entrada y salida son los de la CSR.
+    """
+
+    def __init__(self, csr):
+        self.csr = csr
+        n = len(csr)
+        offsets, targets, weights = csr.offsets, csr.targets, csr.weights
+        degree = [offsets[i + 1] - offsets[i] for i in range(n)]
+
+        # Cruces renumerados 0..m-1
+        self.junctions = array('i', (i for i in range(n) if degree[i] != 2))
+        local = {v: j for j, v in enumerate(self.junctions)}
+        self.local = local
+
+        # Cadena k: extremos a -> b (ids CSR), interiores de a hacia b y distancia
+        # acumulada desde a hasta cada interior; total es el peso de a a b
+        self.chain_a, self.chain_b, self.chain_nodes, self.chain_cum, self.chain_total = [], [], [], [], []
+        # Posición de cada waypoint interior: id CSR -> (cadena, índice)
+        self.position = {}
+        nbrs = [[] for _ in self.junctions]
+
+        for a in self.junctions:
+            for k in range(offsets[a], offsets[a + 1]):
+                v, w = targets[k], weights[k]
+                if degree[v] != 2:
+                    # Arista directa entre cruces: se registra una vez por par
+                    if a < v:
+                        self._add_chain(a, v, [], [], w, local, nbrs)
+                    continue
+                if v in self.position:
+                    continue
+                prev, cur, total = a, v, w
+                interior, cum = [], []
+                while degree[cur] == 2:
+                    interior.append(cur)
+                    cum.append(total)
+                    start = offsets[cur]
+                    nxt = start if targets[start] != prev else start + 1
+                    prev, cur = cur, targets[nxt]
+                    total += weights[nxt]
+                chain = self._add_chain(a, cur, interior, cum, total, local, nbrs)
+                for index, node in enumerate(interior):
+                    self.position[node] = (chain, index)
+
+        # Adyacencia reducida en CSR; ref = 2 * cadena + (0 de a a b, 1 de b a a)
+        self.offsets = array('i', [0])
+        self.targets = array('i')
+        self.weights = array('d')
+        self.refs = array('i')
+        for lst in nbrs:
+            for j, w, ref in lst:
+                self.targets.append(j)
+                self.weights.append(w)
+                self.refs.append(ref)
+            self.offsets.append(len(self.targets))
+
+    def _add_chain(self, a, b, interior, cum, total, local, nbrs):
+        k = len(self.chain_a)
+        self.chain_a.append(a)
+        self.chain_b.append(b)
+        self.chain_nodes.append(interior)
+        self.chain_cum.append(cum)
+        self.chain_total.append(total)
+        # Un lazo (a == b) nunca forma parte de un camino mínimo
+        if a != b and b in local:
+            nbrs[local[a]].append((local[b], total, 2 * k))
+            nbrs[local[b]].append((local[a], total, 2 * k + 1))
+        return k
+
+    def __len__(self):
+        return len(self.junctions)
+
+    def edge_count(self):
+        return len(self.targets) // 2
+
+    def contains(self, node):
+        """True si la consulta puede responderse aquí (cruce o interior de una cadena)"""
+        return node in self.local or node in self.position
+
+    # ------------------ CONSULTA ------------------
+    def _anchors(self, node):
+        """{cruce local: (distancia, hacia "a" o "b")} desde node hasta los extremos de su cadena"""
+        if node in self.local:
+            return {self.local[node]: (0.0, None)}
+        chain, index = self.position[node]
+        d_a = self.chain_cum[chain][index]
+        d_b = self.chain_total[chain] - d_a
+        anchors = {}
+        for end, d, side in ((self.chain_a[chain], d_a, "a"), (self.chain_b[chain], d_b, "b")):
+            j = self.local[end]
+            if j not in anchors or d < anchors[j][0]:
+                anchors[j] = (d, side)
+        return anchors
+
+    def _walk(self, node, side):
+        """Ids desde node (interior) hasta el extremo side de su cadena, extremo incluido"""
+        chain, index = self.position[node]
+        nodes = self.chain_nodes[chain]
+        if side == "a":
+            return nodes[index::-1] + [self.chain_a[chain]]
+        return nodes[index:] + [self.chain_b[chain]]
+
+    def query(self, src, dst):
+        """Dijkstra sobre los cruces; devuelve (distancia, camino de ids CSR, cruces asentados)"""
+        if src == dst:
+            return 0.0, [src], 1
+        sources, goals = self._anchors(src), self._anchors(dst)
+
+        # Origen y destino en la misma cadena: el tramo directo es un candidato
+        best, best_goal, direct = INF, -1, None
+        if src not in self.local and dst not in self.local:
+            (cs, i), (cd, j) = self.position[src], self.position[dst]
+            if cs == cd:
+                cum = self.chain_cum[cs]
+                nodes = self.chain_nodes[cs]
+                best = abs(cum[i] - cum[j])
+                direct = nodes[i:j + 1] if i <= j else nodes[j:i + 1][::-1]
+
+        offsets, targets, weights, refs = self.offsets, self.targets, self.weights, self.refs
+        m = len(self.junctions)
+        dist = [INF] * m
+        pred = [-1] * m
+        pred_ref = [-1] * m
+        done = bytearray(m)
+        counter = 0
+        heap = []
+        for j, (d, _) in sources.items():
+            dist[j] = d
+            counter += 1
+            heap.append((d, counter, j))
+        heapq.heapify(heap)
+        push, pop = heapq.heappush, heapq.heappop
+        settled = 0
+
+        while heap:
+            d, _, u = pop(heap)
+            if d >= best:
+                break
+            if done[u]:
+                continue
+            done[u] = 1
+            settled += 1
+            goal = goals.get(u)
+            if goal is not None and d + goal[0] < best:
+                best, best_goal = d + goal[0], u
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                nd = d + weights[k]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    pred_ref[v] = refs[k]
+                    counter += 1
+                    push(heap, (nd, counter, v))
+
+        if best == INF:
+            raise NoPathError(f"No hay conexión entre {self.csr.names[src]} y {self.csr.names[dst]}")
+        if best_goal < 0:
+            return best, direct, settled
+        return best, self._expand(src, dst, sources, goals, pred, pred_ref, best_goal), settled
+
+    def _expand(self, src, dst, sources, goals, pred, pred_ref, goal):
+        """Camino completo de ids CSR: tramo inicial, cadenas recorridas y tramo final"""
+        # Los predecesores terminan en el extremo inicial por el que salió el camino
+        refs = []
+        u = goal
+        while pred[u] >= 0:
+            refs.append(pred_ref[u])
+            u = pred[u]
+        refs.reverse()
+
+        side = sources[u][1]
+        path = self._walk(src, side) if side else [src]
+        for ref in refs:
+            chain, backward = divmod(ref, 2)
+            nodes = self.chain_nodes[chain]
+            path.extend(nodes[::-1] if backward else nodes)
+            path.append(self.chain_a[chain] if backward else self.chain_b[chain])
+
+        side = goals[goal][1]
+        if side:
+            path.extend(self._walk(dst, side)[-2::-1])
+        return path
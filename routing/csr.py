@@ -0,0 +1,65 @@
+# csr.py
+# Representación compacta del grafo (Compressed Sparse Row) con ids enteros
+import hashlib
+from array import array
+
+
+class CSRGraph:
+    """Grafo inmutable: los vecinos del nodo i son targets[offsets[i]:offsets[i + 1]]"""
+
+    def __init__(self, names, offsets, targets, weights, xs, ys):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.xs = xs
+        self.ys = ys
+
+    @classmethod
+    def from_road_graph(cls, graph):
+        """Compila un RoadGraph; los vecinos quedan en el mismo orden que en networkx"""
+        names = list(graph.adj)
+        index = {name: i for i, name in enumerate(names)}
+        nbrs = [[] for _ in names]
+        # Se reproduce la secuencia de add_edge que usa el backend networkx para
+        # que los empates entre caminos de igual longitud se resuelvan igual
+        for a, b, w in graph.edges():
+            i, j = index[a], index[b]
+            nbrs[i].append((j, w))
+            nbrs[j].append((i, w))
+
+        offsets = array('i', [0])
+        targets = array('i')
+        weights = array('d')
+        for lst in nbrs:
+            for j, w in lst:
+                targets.append(j)
+                weights.append(w)
+            offsets.append(len(targets))
+
+        xs = array('d', (graph.pos[name][0] for name in names))
+        ys = array('d', (graph.pos[name][1] for name in names))
+        return cls(names, offsets, targets, weights, xs, ys)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def edge_count(self):
+        return len(self.targets) // 2
+
+    def fingerprint(self):
+        """Huella de la red (nombres, topología y pesos) para validar datos precalculados"""
+        h = hashlib.sha1()
+        h.update("\0".join(self.names).encode("utf-8"))
+        for arr in (self.offsets, self.targets, self.weights):
+            h.update(arr.tobytes())
+        return h.hexdigest()
+
+    def neighbors(self, i):
+        """Pares (vecino, peso) del nodo con id i"""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return zip(self.targets[start:end], self.weights[start:end])
@@ -0,0 +1,372 @@
+# engine.py
+# Motor de rutas sin dependencias de Tkinter ni PIL
+import math
+import os
+
+from data.geometry import ESCALA_KM
+from routing.cache import RouteCache
+from routing.ch import ContractionHierarchy
+from routing.chains import ChainGraph
+from routing.csr import CSRGraph
+from routing.errors import NodeNotFoundError, NoPathError
+from routing.graph import RoadGraph
+from routing.loader import CH_FILE, NODES_FILE, ROADS_FILE, SNAPSHOT_FILE, load_network
+from routing.metrics import metrics
+from routing.search import INF, astar, dijkstra, shortest_path_tree, tree_path
+
+BACKENDS = ("csr", "networkx")
+ALGORITHMS = ("dijkstra", "astar", "ch", "chains")
+ROUTE_CACHE_SIZE = 256
+# Árboles de caminos mínimos (uno por origen) que se conservan para consultas uno-a-muchos
+TREE_CACHE_SIZE = 8
+
+
+class RoutingEngine:
+    """Carga la red vial una sola vez y responde consultas de ruta más corta"""
+
+    def __init__(self, nodes=None, roads=None, cities=None, backend="csr", algorithm="dijkstra",
+                 route_cache=ROUTE_CACHE_SIZE, tree_cache=TREE_CACHE_SIZE, ch_file=CH_FILE):
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+        self._check_algorithm(algorithm)
+        self.backend = backend
+        self.algorithm = algorithm
+        # Jerarquía precalculada en disco (None: siempre se construye en memoria)
+        self.ch_file = ch_file
+        # Estadísticas de la última búsqueda: algoritmo, nodos asentados y si vino de caché
+        self.last_search = None
+        # Con un snapshot binario el grafo editable solo se construye si se necesita
+        self._graph = RoadGraph()
+        self.cities = {}
+        # Estructuras derivadas de self.graph, recompiladas de forma perezosa cuando
+        # cambia la versión; ambas usan el mismo orden de aristas (graph.edges()).
+        # Cada una guarda la versión leída antes de compilarla: si una edición llega
+        # mientras tanto (las rutas se calculan en otro hilo) queda marcada como vieja
+        self._csr = None
+        self._csr_version = -1
+        self._nx = None
+        self._nx_version = -1
+        self._ch = None
+        self._ch_version = -1
+        self._chains = None
+        self._chains_version = -1
+        # ((ruta, mtime), huella) del último archivo de jerarquía leído
+        self._ch_seen = None
+        # Rutas recientes; cualquier cambio de versión de la red las invalida
+        self._routes = RouteCache(route_cache)
+        # Árboles (distancias, predecesores) por origen; al repetir origen se reutilizan
+        self._trees = RouteCache(tree_cache)
+        self._last_origin = None
+        if nodes is not None:
+            self.load(nodes, roads or [], cities)
+
+    @classmethod
+    def from_files(cls, nodes_file=NODES_FILE, roads_file=ROADS_FILE, backend="csr", **options):
+        """Construye el motor a partir de node_positions.json y roads_config.json"""
+        cities, waypoints, roads = load_network(nodes_file, roads_file)
+        return cls({**cities, **waypoints}, roads, cities, backend, **options)
+
+    @classmethod
+    def from_snapshot(cls, path=SNAPSHOT_FILE, backend="csr", **options):
+        """Construye el motor desde un snapshot binario mapeado en memoria (ver routing.snapshot)"""
+        from routing.snapshot import Snapshot
+
+        snap = Snapshot(path)
+        csr = snap.csr()
+        engine = cls(backend=backend, **options)
+        engine._graph = None
+        engine._csr, engine._csr_version = csr, 0
+        engine.cities = {csr.names[i]: [csr.xs[i], csr.ys[i]] for i in snap.city_ids()}
+        return engine
+
+    @property
+    def graph(self):
+        """RoadGraph editable; si el motor viene de un snapshot se reconstruye aquí"""
+        if self._graph is None:
+            self._graph = RoadGraph.from_csr(self._csr)
+        return self._graph
+
+    @property
+    def nodes(self):
+        return self.graph.pos
+
+    @property
+    def version(self):
+        return self._graph.version if self._graph is not None else 0
+
+    def load(self, nodes, roads, cities=None):
+        """Reemplaza la red completa y calcula los pesos una sola vez"""
+        if cities is not None:
+            self.cities = cities
+        if self._graph is None:
+            self._graph = RoadGraph()
+        with metrics.timer("load_network"):
+            self._graph.load(nodes, roads)
+
+    def sync(self, nodes, roads, cities=None):
+        """Actualiza la red aplicando solo los nodos y carreteras que cambiaron"""
+        if cities is not None:
+            self.cities = cities
+        with metrics.timer("update_weights"):
+            return self.graph.sync(nodes, roads)
+
+    # ------------------ EDICIÓN INCREMENTAL ------------------
+    def add_node(self, node, pos):
+        self.graph.add_node(node, pos)
+
+    def move_node(self, node, pos):
+        self.graph.move_node(node, pos)
+
+    def remove_node(self, node):
+        self.graph.remove_node(node)
+
+    def add_edge(self, a, b):
+        return self.graph.add_edge(a, b)
+
+    def remove_edge(self, a, b):
+        self.graph.remove_edge(a, b)
+
+    # ------------------ CONSULTAS ------------------
+    def _networkx(self):
+        # networkx se importa solo si se usa ese backend (arranque en milisegundos)
+        import networkx as nx
+
+        version = self.graph.version
+        if self._nx is None or self._nx_version != version:
+            with metrics.timer("compile_networkx"):
+                g = nx.Graph()
+                g.add_nodes_from(self.graph.adj)
+                g.add_weighted_edges_from(self.graph.edges(), weight="weight")
+            self._nx, self._nx_version = g, version
+        return self._nx
+
+    def csr(self):
+        """Grafo compacto correspondiente a la versión actual de la red"""
+        version = self.version
+        if self._csr is None or self._csr_version != version:
+            with metrics.timer("compile_csr"):
+                csr = CSRGraph.from_road_graph(self.graph)
+            self._csr, self._csr_version = csr, version
+        return self._csr
+
+    def prepare_ch(self, path=CH_FILE, save=True):
+        """Carga la jerarquía de contracción desde disco, o la construye si la red cambió"""
+        csr = self.csr()
+        # La jerarquía vale para la versión de la CSR de la que sale
+        version = self._csr_version
+        ch = self._load_ch(path, csr.fingerprint())
+        if ch is None:
+            with metrics.timer("build_ch"):
+                ch = ContractionHierarchy.build(csr)
+            if path and save:
+                ch.save(path)
+        self._ch, self._ch_version = ch, version
+        return ch
+
+    def _load_ch(self, path, fingerprint):
+        """Jerarquía guardada en path si corresponde a la huella; un archivo que ya se leyó
+        y no coincidía no se vuelve a leer mientras no cambie"""
+        if not path or not os.path.exists(path):
+            return None
+        stamp = (path, os.path.getmtime(path))
+        if self._ch_seen is not None and self._ch_seen[0] == stamp and self._ch_seen[1] != fingerprint:
+            return None
+        ch = ContractionHierarchy.load(path)
+        self._ch_seen = (stamp, ch.fingerprint)
+        return ch if ch.fingerprint == fingerprint else None
+
+    def contraction_hierarchy(self):
+        """Jerarquía vigente: la de ch_file si la red coincide con ella; si no (red editada)
+        se reconstruye en memoria sin tocar el disco"""
+        if self._ch is None or self._ch_version != self.version:
+            self.prepare_ch(self.ch_file, save=False)
+        return self._ch
+
+    def chain_graph(self):
+        """Grafo de cruces con las cadenas de grado 2 contraídas, recompilado por versión"""
+        if self._chains is None or self._chains_version != self.version:
+            csr = self.csr()
+            version = self._csr_version
+            with metrics.timer("compile_chains"):
+                chains = ChainGraph(csr)
+            self._chains, self._chains_version = chains, version
+        return self._chains
+
+    def spatial_index(self):
+        """Índice espacial de nodos, actualizado con cada edición incremental"""
+        return self.graph.spatial_index()
+
+    def has_node(self, node):
+        if self._graph is None:
+            return node in self._csr
+        return node in self._graph
+
+    def _check(self, *nodes):
+        for node in nodes:
+            if not self.has_node(node):
+                raise NodeNotFoundError(node)
+
+    @staticmethod
+    def _check_algorithm(algorithm):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Algoritmo desconocido: {algorithm} (opciones: {', '.join(ALGORITHMS)})")
+
+    def _route_networkx(self, src, dst, algorithm):
+        import networkx as nx
+
+        g = self._networkx()
+        try:
+            if algorithm == "astar":
+                pos = self.graph.pos
+
+                def heuristic(u, v):
+                    return math.hypot(pos[u][0] - pos[v][0], pos[u][1] - pos[v][1]) * ESCALA_KM
+
+                path = nx.astar_path(g, src, dst, heuristic=heuristic, weight="weight")
+                return path, nx.path_weight(g, path, "weight")
+            length, path = nx.single_source_dijkstra(g, src, dst, weight="weight")
+            return path, length
+        except nx.NetworkXNoPath:
+            raise NoPathError(f"No hay conexión entre {src} y {dst}") from None
+
+    def shortest_path_tree(self, origin):
+        """(distancias, predecesores) por id de la CSR desde origin, reutilizados por versión"""
+        self._check(origin)
+        self._trees.validate(self.version)
+        tree = self._trees.get(origin)
+        if tree is None:
+            csr = self.csr()
+            stats = {} if metrics.enabled else None
+            with metrics.timer("search_tree"):
+                tree = shortest_path_tree(csr, csr.index[origin], stats)
+            if stats:
+                metrics.count("edges_relaxed", stats["relaxed"])
+            self._trees.put(origin, tree, self._csr_version)
+        return tree
+
+    def routes_from(self, origin, targets=None):
+        """{destino: (camino, km)} desde origin con una sola búsqueda; None si no hay conexión
+
+        Sin targets se responde para todas las ciudades.
+        """
+        dist, pred = self.shortest_path_tree(origin)
+        csr = self.csr()
+        src = csr.index[origin]
+        result = {}
+        for target in (self.cities if targets is None else targets):
+            self._check(target)
+            dst = csr.index[target]
+            if dist[dst] == INF:
+                result[target] = None
+            else:
+                result[target] = ([csr.names[i] for i in tree_path(pred, src, dst)], dist[dst])
+        return result
+
+    def distances_from(self, origin, targets=None):
+        """{destino: km} desde origin (todas las ciudades si no se indica); None si no hay conexión"""
+        dist, _ = self.shortest_path_tree(origin)
+        index = self.csr().index
+        result = {}
+        for target in (self.cities if targets is None else targets):
+            self._check(target)
+            km = dist[index[target]]
+            result[target] = None if km == INF else km
+        return result
+
+    def cached_route(self, src, dst, algorithm=None):
+        """(camino, km, estadísticas) si la ruta ya está en caché para la red actual, o None"""
+        algorithm = algorithm or self.algorithm
+        self._routes.validate(self.version)
+        key = (src, dst, algorithm)
+        hit = self._routes.get(key) if key in self._routes else None
+        if hit is None:
+            return None
+        metrics.count("cache_hits")
+        path, length, settled = hit
+        return list(path), length, {"algorithm": algorithm, "settled": settled, "cached": True}
+
+    def cache_stats(self):
+        """Aciertos, fallos y ocupación de la caché de rutas"""
+        return self._routes.stats()
+
+    def route(self, src, dst, algorithm=None):
+        """Devuelve (camino, distancia en km) entre src y dst"""
+        path, length, self.last_search = self.route_with_stats(src, dst, algorithm)
+        return path, length
+
+    def route_with_stats(self, src, dst, algorithm=None):
+        """(camino, km, estadísticas) sin pasar por last_search, para usar desde otro hilo"""
+        algorithm = algorithm or self.algorithm
+        self._check_algorithm(algorithm)
+        version = self.version
+        self._routes.validate(version)
+        key = (src, dst, algorithm)
+        hit = self._routes.get(key)
+        if hit is not None:
+            metrics.count("cache_hits")
+            path, length, settled = hit
+            return list(path), length, {"algorithm": algorithm, "settled": settled, "cached": True}
+
+        metrics.count("cache_misses")
+        with metrics.timer("search"):
+            path, length, settled = self._search(src, dst, algorithm)
+        if settled:
+            metrics.count("nodes_settled", settled)
+        self._routes.put(key, (tuple(path), length, settled), version)
+        return path, length, {"algorithm": algorithm, "settled": settled, "cached": False}
+
+    def _search(self, src, dst, algorithm):
+        """(camino, km, nodos asentados) calculados sin pasar por la caché"""
+        self._check(src, dst)
+
+        if algorithm == "ch":
+            csr = self.csr()
+            length, ids, settled = self.contraction_hierarchy().query(csr.index[src], csr.index[dst])
+            return [csr.names[i] for i in ids], length, settled
+
+        if algorithm == "chains":
+            csr = self.csr()
+            chains = self.chain_graph()
+            s, d = csr.index[src], csr.index[dst]
+            # Un ciclo aislado de waypoints de grado 2 no tiene cruces: se usa la CSR completa
+            if chains.contains(s) and chains.contains(d):
+                length, ids, settled = chains.query(s, d)
+                return [csr.names[i] for i in ids], length, settled
+            length, ids, settled = dijkstra(csr, s, d)
+            return [csr.names[i] for i in ids], length, settled
+
+        if self.backend == "networkx":
+            # networkx no expone cuántos nodos asienta
+            path, length = self._route_networkx(src, dst, algorithm)
+            return path, length, None
+
+        csr = self.csr()
+        if algorithm == "dijkstra":
+            # Origen repetido (p. ej. origen fijo y varios destinos): se usa el árbol
+            # completo desde ese origen y las siguientes consultas solo lo recorren
+            self._trees.validate(self.version)
+            repeated = src == self._last_origin
+            self._last_origin = src
+            if self._trees.capacity and (repeated or src in self._trees):
+                fresh = src not in self._trees
+                dist, pred = self.shortest_path_tree(src)
+                s, d = csr.index[src], csr.index[dst]
+                if dist[d] == INF:
+                    raise NoPathError(f"No hay conexión entre {src} y {dst}")
+                settled = sum(1 for x in dist if x != INF) if fresh else 0
+                return [csr.names[i] for i in tree_path(pred, s, d)], dist[d], settled
+
+        search = astar if algorithm == "astar" else dijkstra
+        stats = {} if metrics.enabled else None
+        length, ids, settled = search(csr, csr.index[src], csr.index[dst], stats)
+        if stats:
+            metrics.count("edges_relaxed", stats["relaxed"])
+        return [csr.names[i] for i in ids], length, settled
+
+    def shortest_path(self, src, dst, algorithm=None):
+        """Lista de nodos de la ruta más corta entre src y dst"""
+        return self.route(src, dst, algorithm)[0]
+
+    def distance(self, src, dst, algorithm=None):
+        """Distancia en km de la ruta más corta entre src y dst"""
+        return self.route(src, dst, algorithm)[1]
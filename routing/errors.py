@@ -0,0 +1,14 @@
+# errors.py
+# Excepciones del motor de rutas
+
+
+class RoutingError(Exception):
+    """Error base del motor de rutas"""
+
+
+class NodeNotFoundError(RoutingError, KeyError):
+    """El nodo solicitado no existe en la red"""
+
+
+class NoPathError(RoutingError):
+    """No existe conexión entre el origen y el destino"""
@@ -0,0 +1,149 @@
+# graph.py
+# Grafo vial con pesos precalculados en coordenadas del mapa (independientes del zoom)
+from data.ciudades import distance
+from routing.spatial import GridIndex
+
+
+def edge_key(a, b):
+    """Clave no dirigida de una carretera"""
+    return (a, b) if a <= b else (b, a)
+
+
+class RoadGraph:
+    """Lista de adyacencia {nodo: {vecino: km}} que se actualiza de forma incremental"""
+
+    def __init__(self):
+        self.pos = {}
+        self.adj = {}
+        # Aumenta con cada cambio; permite invalidar estructuras derivadas
+        self.version = 0
+        # Índice espacial: se crea al primer uso y luego se mantiene al día
+        self._spatial = None
+
+    @classmethod
+    def from_csr(cls, csr):
+        """Reconstruye el grafo editable a partir de un CSRGraph (p. ej. de un snapshot)"""
+        graph = cls()
+        for i, name in enumerate(csr.names):
+            graph.pos[name] = (csr.xs[i], csr.ys[i])
+            graph.adj[name] = {csr.names[j]: w for j, w in csr.neighbors(i)}
+        return graph
+
+    def __contains__(self, node):
+        return node in self.adj
+
+    def __len__(self):
+        return len(self.adj)
+
+    def edge_count(self):
+        return sum(len(nbrs) for nbrs in self.adj.values()) // 2
+
+    def edges(self):
+        """Recorre cada carretera una sola vez como (a, b, km)"""
+        seen = set()
+        for a, nbrs in self.adj.items():
+            seen.add(a)
+            for b, w in nbrs.items():
+                if b not in seen:
+                    yield a, b, w
+
+    def spatial_index(self):
+        """GridIndex sobre las posiciones de los nodos"""
+        if self._spatial is None:
+            self._spatial = GridIndex()
+            self._spatial.rebuild(self.pos)
+        return self._spatial
+
+    def neighbors(self, node):
+        return self.adj[node]
+
+    def weight(self, a, b):
+        return self.adj[a][b]
+
+    # ------------------ MUTACIONES ------------------
+    def add_node(self, node, pos):
+        if node in self.adj:
+            return self.move_node(node, pos)
+        self.pos[node] = (pos[0], pos[1])
+        self.adj[node] = {}
+        if self._spatial is not None:
+            self._spatial.insert(node, pos)
+        self.version += 1
+        return {}
+
+    def move_node(self, node, pos):
+        """Mueve un nodo y recalcula solo los pesos de sus carreteras"""
+        pos = (pos[0], pos[1])
+        if self.pos.get(node) == pos:
+            return self.adj[node]
+        self.pos[node] = pos
+        if self._spatial is not None:
+            self._spatial.move(node, pos)
+        nbrs = self.adj[node]
+        for other in nbrs:
+            w = distance(pos, self.pos[other])
+            nbrs[other] = w
+            self.adj[other][node] = w
+        self.version += 1
+        return nbrs
+
+    def remove_node(self, node):
+        for other in self.adj.pop(node, {}):
+            del self.adj[other][node]
+        self.pos.pop(node, None)
+        if self._spatial is not None:
+            self._spatial.remove(node)
+        self.version += 1
+
+    def add_edge(self, a, b):
+        """Agrega la carretera a-b y devuelve su peso (None si no es válida)"""
+        if a == b or a not in self.adj or b not in self.adj:
+            return None
+        w = distance(self.pos[a], self.pos[b])
+        if self.adj[a].get(b) != w:
+            self.adj[a][b] = w
+            self.adj[b][a] = w
+            self.version += 1
+        return w
+
+    def remove_edge(self, a, b):
+        if b in self.adj.get(a, {}):
+            del self.adj[a][b]
+            del self.adj[b][a]
+            self.version += 1
+
+    # ------------------ CARGA ------------------
+    def load(self, nodes, roads):
+        """Reemplaza la red completa"""
+        self.pos = {node: (p[0], p[1]) for node, p in nodes.items()}
+        self.adj = {node: {} for node in nodes}
+        for a, b in roads:
+            if a != b and a in self.adj and b in self.adj:
+                w = distance(self.pos[a], self.pos[b])
+                self.adj[a][b] = w
+                self.adj[b][a] = w
+        self._spatial = None
+        self.version += 1
+
+    def sync(self, nodes, roads):
+        """Aplica solo las diferencias respecto a (nodes, roads); devuelve el número de cambios"""
+        start = self.version
+
+        for node in [n for n in self.adj if n not in nodes]:
+            self.remove_node(node)
+        for node, p in nodes.items():
+            if node in self.adj:
+                self.move_node(node, p)
+            else:
+                self.add_node(node, p)
+
+        wanted = {edge_key(a, b) for a, b in roads
+                  if a != b and a in self.adj and b in self.adj}
+        for a, b, _ in list(self.edges()):
+            if edge_key(a, b) not in wanted:
+                self.remove_edge(a, b)
+        for a, b in wanted:
+            if b not in self.adj[a]:
+                self.add_edge(a, b)
+
+        return self.version - start
@@ -0,0 +1,229 @@
+# history.py
+# Historial de deshacer/rehacer guardado como diferencias (deltas) con memoria acotada
+import datetime
+from contextlib import contextmanager
+
+from routing.graph import edge_key
+
+MAX_ACTIONS = 200
+# Tope aproximado de memoria del historial (ver Delta.size_bytes)
+MAX_BYTES = 4 * 1024 * 1024
+# Estimación por cambio registrado: nombres, tupla de posición y contenedor
+CHANGE_BYTES = 160
+
+
+class Delta:
+    """Cambios de una acción: nodos creados/eliminados/movidos y carreteras agregadas/quitadas
+
+    Los registros se compensan entre sí (crear y luego borrar lo mismo no deja
+    rastro), así una acción ocupa memoria proporcional a lo que realmente cambió.
+    """
+
+    def __init__(self):
+        self.added_nodes = {}      # nombre -> (pos, tipo)
+        self.removed_nodes = {}    # nombre -> (pos, tipo)
+        self.moved_nodes = {}      # nombre -> (pos anterior, pos nueva)
+        self.added_roads = {}      # clave no dirigida -> entrada (a, b) agregada
+        self.removed_roads = {}    # clave no dirigida -> entradas (a, b) quitadas (con repeticiones)
+
+    def __len__(self):
+        return (len(self.added_nodes) + len(self.removed_nodes) + len(self.moved_nodes)
+                + len(self.added_roads) + len(self.removed_roads))
+
+    def size_bytes(self):
+        return len(self) * CHANGE_BYTES
+
+    # ------------------ REGISTRO ------------------
+    def add_node(self, name, pos, kind):
+        if name in self.removed_nodes:
+            old, old_kind = self.removed_nodes.pop(name)
+            if tuple(old) != tuple(pos):
+                self.moved_nodes[name] = (tuple(old), tuple(pos))
+            return
+        self.added_nodes[name] = (tuple(pos), kind)
+
+    def remove_node(self, name, pos, kind):
+        if name in self.added_nodes:
+            del self.added_nodes[name]
+            return
+        if name in self.moved_nodes:
+            pos = self.moved_nodes.pop(name)[0]
+        self.removed_nodes[name] = (tuple(pos), kind)
+
+    def move_node(self, name, old, new):
+        if name in self.added_nodes:
+            self.added_nodes[name] = (tuple(new), self.added_nodes[name][1])
+            return
+        first = self.moved_nodes.get(name, (tuple(old), None))[0]
+        if first == tuple(new):
+            self.moved_nodes.pop(name, None)
+        else:
+            self.moved_nodes[name] = (first, tuple(new))
+
+    def add_road(self, a, b):
+        key = edge_key(a, b)
+        if self.removed_roads.pop(key, None) is None:
+            self.added_roads[key] = (a, b)
+
+    def remove_road(self, a, b, entries=None):
+        """entries: las apariciones quitadas de la lista de carreteras (por defecto solo (a, b))"""
+        key = edge_key(a, b)
+        if self.added_roads.pop(key, None) is None:
+            self.removed_roads[key] = list(entries or [(a, b)])
+
+    def _removed_entries(self):
+        return [road for entries in self.removed_roads.values() for road in entries]
+
+    def merge(self, other):
+        """Agrega al final los cambios de other (aplicado después de self)"""
+        for name, (pos, kind) in other.added_nodes.items():
+            self.add_node(name, pos, kind)
+        for name, (old, new) in other.moved_nodes.items():
+            self.move_node(name, old, new)
+        for a, b in other.added_roads.values():
+            self.add_road(a, b)
+        for (a, b), entries in other.removed_roads.items():
+            self.remove_road(a, b, entries)
+        for name, (pos, kind) in other.removed_nodes.items():
+            self.remove_node(name, pos, kind)
+
+    # ------------------ APLICACIÓN ------------------
+    def apply(self, network, reverse=False):
+        """Rehace (o deshace con reverse=True) los cambios sobre network
+
+        network es un routing.store.NetworkStore (o algo con su misma interfaz de edición).
+        """
+        if not reverse:
+            for name, (pos, kind) in self.added_nodes.items():
+                network.add_node(name, pos, kind)
+            for name, (_, new) in self.moved_nodes.items():
+                network.move_node(name, new)
+            for a, b in self.added_roads.values():
+                network.add_edge(a, b)
+            network.remove_edges(self.removed_roads)
+            for name in self.removed_nodes:
+                network.remove_node(name)
+            return
+
+        for name, (pos, kind) in self.removed_nodes.items():
+            network.add_node(name, pos, kind)
+        network.remove_edges(self.added_roads)
+        for road in self._removed_entries():
+            network.restore_edge(road)
+        for name, (old, _) in self.moved_nodes.items():
+            network.move_node(name, old)
+        for name in self.added_nodes:
+            network.remove_node(name)
+
+
+class History:
+    """Pila de acciones {"type", "data", "delta", "timestamp"} con tope de memoria
+
+    Las ediciones se registran dentro de action(tipo): acciones anidadas (p. ej.
+    la generación inteligente que llama a las conexiones automáticas) se funden
+    en una sola entrada. Movimientos consecutivos del mismo nodo se combinan hasta
+    que se llama a seal() (al soltar el ratón).
+    """
+
+    def __init__(self, max_actions=MAX_ACTIONS, max_bytes=MAX_BYTES):
+        self.max_actions = max_actions
+        self.max_bytes = max_bytes
+        self.history = []
+        self.position = 0
+        self.bytes = 0
+        # Delta abierto de la acción en curso (None fuera de action())
+        self.delta = None
+        self._depth = 0
+        self._open = None
+        self._sealed = True
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.history)
+
+    def clear(self):
+        self.history.clear()
+        self.position = 0
+        self.bytes = 0
+        self._sealed = True
+
+    def seal(self):
+        """Cierra la acción actual para que el siguiente movimiento no se combine con ella"""
+        self._sealed = True
+
+    @contextmanager
+    def action(self, action_type, data=None, coalesce_key=None):
+        """Registra en una sola entrada las ediciones hechas dentro del bloque"""
+        if self._depth == 0:
+            self.delta = Delta()
+            self._open = {"type": action_type, "data": dict(data or {}), "key": coalesce_key}
+        elif data:
+            self._open["data"].update(data)
+        self._depth += 1
+        try:
+            yield self._open["data"]
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                delta, entry = self.delta, self._open
+                self.delta = self._open = None
+                if len(delta):
+                    self.add_action(entry["type"], entry["data"], delta, entry["key"])
+
+    def add_action(self, action_type, data, delta, coalesce_key=None):
+        """Agrega una acción ya calculada; con coalesce_key se combina con la anterior
+        si es del mismo tipo y clave y no se selló"""
+        # Una acción nueva descarta lo que se podía rehacer
+        for dropped in self.history[self.position:]:
+            self.bytes -= dropped["delta"].size_bytes()
+        del self.history[self.position:]
+
+        last = self.history[-1] if self.history else None
+        if (coalesce_key is not None and not self._sealed and last is not None
+                and last["type"] == action_type and last.get("key") == coalesce_key):
+            self.bytes -= last["delta"].size_bytes()
+            last["delta"].merge(delta)
+            last["data"].update(data)
+            last["timestamp"] = datetime.datetime.now()
+            self.bytes += last["delta"].size_bytes()
+        else:
+            self.history.append({
+                "type": action_type,
+                "data": data,
+                "delta": delta,
+                "key": coalesce_key,
+                "timestamp": datetime.datetime.now(),
+            })
+            self.bytes += delta.size_bytes()
+        self._sealed = coalesce_key is None
+        self.position = len(self.history)
+        self._trim()
+
+    def _trim(self):
+        # Se descartan las acciones más antiguas; siempre queda al menos la última
+        while len(self.history) > 1 and (len(self.history) > self.max_actions or self.bytes > self.max_bytes):
+            oldest = self.history.pop(0)
+            self.bytes -= oldest["delta"].size_bytes()
+            self.position -= 1
+
+    def undo(self, network):
+        """Deshace la última acción sobre network y la devuelve (o None)"""
+        if not self.can_undo():
+            return None
+        self.position -= 1
+        action = self.history[self.position]
+        action["delta"].apply(network, reverse=True)
+        self._sealed = True
+        return action
+
+    def redo(self, network):
+        """Rehace la siguiente acción sobre network y la devuelve (o None)"""
+        if not self.can_redo():
+            return None
+        action = self.history[self.position]
+        action["delta"].apply(network)
+        self.position += 1
+        self._sealed = True
+        return action
@@ -0,0 +1,79 @@
+# loader.py
+# Lectura de la red vial desde los archivos JSON de la carpeta utils
+import os
+import sys
+import json
+import hashlib
+import tempfile
+
+
+def resource_path(relative_path):
+    """ Obtiene la ruta absoluta de los recursos, compatible con PyInstaller """
+    try:
+        # Carpeta temporal de PyInstaller
+        base_path = sys._MEIPASS
+    except Exception:
+        # Carpeta raíz del proyecto (un nivel arriba de routing/)
+        base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_path, relative_path)
+
+
+NODES_FILE = resource_path(os.path.join("utils", "node_positions.json"))
+ROADS_FILE = resource_path(os.path.join("utils", "roads_config.json"))
+# Trazado a mano de las carreteras (polilíneas), ver routing.shapes
+DRAWINGS_FILE = resource_path(os.path.join("utils", "road_drawings.json"))
+# Jerarquía de contracción precalculada (se genera con RoutingEngine.prepare_ch)
+CH_FILE = resource_path(os.path.join("utils", "contraction_hierarchy.json"))
+# Red compilada a formato binario (se genera con python -m routing.snapshot build)
+SNAPSHOT_FILE = resource_path(os.path.join("utils", "network.bin"))
+# Matriz de distancias entre ciudades (se genera con python -m routing.matrix)
+MATRIX_FILE = resource_path(os.path.join("utils", "city_matrix.json"))
+
+
+def files_hash(*paths):
+    """Huella del contenido de los archivos de la red; cambia si se edita cualquiera"""
+    h = hashlib.sha1()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def derived_file(shared_path, nodes_file=NODES_FILE, roads_file=ROADS_FILE):
+    """Archivo derivado de una red (snapshot, jerarquía, matriz): shared_path para la red
+    de la aplicación; para otros JSON, uno propio en la carpeta temporal que no pisa el
+    compartido de utils/"""
+    def same(a, b):
+        return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+    if same(nodes_file, NODES_FILE) and same(roads_file, ROADS_FILE):
+        return shared_path
+    key = "\0".join(os.path.abspath(p) for p in (nodes_file, roads_file))
+    root, ext = os.path.splitext(os.path.basename(shared_path))
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"gps_venezuela_{root}_{digest}{ext}")
+
+
+def load_network(nodes_file=NODES_FILE, roads_file=ROADS_FILE):
+    """Lee nodos y carreteras y devuelve (ciudades, waypoints, carreteras)"""
+    cities, waypoints, roads = {}, {}, []
+
+    if os.path.exists(nodes_file):
+        with open(nodes_file, 'r') as f:
+            nodes_data = json.load(f)
+
+        for node, data in nodes_data.items():
+            pos = [data["x"], data["y"]]
+            if data.get("type") == "waypoint":
+                waypoints[node] = pos
+            else:
+                cities[node] = pos
+
+    if os.path.exists(roads_file):
+        with open(roads_file, 'r') as f:
+            roads_data = json.load(f)
+        roads = [tuple(road) for road in roads_data.get("roads", [])]
+
+    return cities, waypoints, roads
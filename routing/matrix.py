@@ -0,0 +1,155 @@
+# matrix.py
+# Matriz de distancias y caminos entre todas las ciudades, con caché en disco
+#
+# Uso: python -m routing.matrix [--workers N] [--refresh] [--format table|json|csv] [-o archivo]
+#                                [--snapshot red.bin]
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from routing.engine import RoutingEngine
+from routing.loader import MATRIX_FILE, NODES_FILE, ROADS_FILE, SNAPSHOT_FILE, derived_file, files_hash
+from routing.snapshot import ensure_snapshot
+
+# Motor cargado una sola vez por proceso trabajador
+_worker_engine = None
+
+
+def _init_worker(snapshot_file):
+    global _worker_engine
+    _worker_engine = RoutingEngine.from_snapshot(snapshot_file)
+
+
+def _city_row(origin):
+    """Una sola búsqueda desde origin responde todas las ciudades de destino"""
+    engine = _worker_engine
+    routes = engine.routes_from(origin, sorted(engine.cities))
+
+    distances, paths = [], []
+    for city, route in routes.items():
+        distances.append(route[1] if route else None)
+        paths.append(route[0] if route else None)
+    return distances, paths
+
+
+def load_cities(nodes_file):
+    with open(nodes_file, 'r') as f:
+        nodes_data = json.load(f)
+    return [node for node, data in nodes_data.items() if data.get("type") != "waypoint"]
+
+
+def compute_city_matrix(nodes_file=NODES_FILE, roads_file=ROADS_FILE, workers=None,
+                        snapshot_file=None):
+    """Calcula la matriz ciudad×ciudad repartiendo un origen por tarea entre procesos
+
+    Sin snapshot_file se usa utils/network.bin solo para la red de la aplicación; otras
+    redes tienen su propio snapshot (ver loader.derived_file).
+    """
+    snapshot_file = snapshot_file or derived_file(SNAPSHOT_FILE, nodes_file, roads_file)
+    cities = sorted(load_cities(nodes_file))
+    ensure_snapshot(nodes_file, roads_file, snapshot_file)
+    if workers == 1:
+        _init_worker(snapshot_file)
+        rows = [_city_row(city) for city in cities]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(snapshot_file,)) as pool:
+            rows = list(pool.map(_city_row, cities))
+
+    return {
+        "hash": files_hash(nodes_file, roads_file),
+        "cities": cities,
+        "distances": [row[0] for row in rows],
+        "paths": [row[1] for row in rows],
+    }
+
+
+def city_matrix(nodes_file=NODES_FILE, roads_file=ROADS_FILE, cache_file=MATRIX_FILE,
+                workers=None, refresh=False, snapshot_file=None):
+    """Devuelve la matriz desde la caché si los archivos de la red no cambiaron
+
+    cache_file=MATRIX_FILE con otra red usa una caché propia en lugar de la de utils/;
+    None o "" la desactiva.
+    """
+    if cache_file == MATRIX_FILE:
+        cache_file = derived_file(MATRIX_FILE, nodes_file, roads_file)
+    current = files_hash(nodes_file, roads_file)
+    if cache_file and not refresh and os.path.exists(cache_file):
+        with open(cache_file, 'r') as f:
+            cached = json.load(f)
+        if cached.get("hash") == current:
+            return cached
+
+    matrix = compute_city_matrix(nodes_file, roads_file, workers, snapshot_file)
+    if cache_file:
+        with open(cache_file, 'w') as f:
+            json.dump(matrix, f, ensure_ascii=False)
+    return matrix
+
+
+# ------------------ SALIDA ------------------
+def write_table(matrix, out):
+    cities = matrix["cities"]
+    width = max(len(c) for c in cities)
+    out.write(" " * width + " | " + " | ".join(c[:8].rjust(8) for c in cities) + "\n")
+    for city, row in zip(cities, matrix["distances"]):
+        cells = ("-".rjust(8) if d is None else f"{d:8.0f}" for d in row)
+        out.write(city.ljust(width) + " | " + " | ".join(cells) + "\n")
+
+
+def write_csv(matrix, out):
+    writer = csv.writer(out)
+    writer.writerow(["origen", "destino", "km", "camino"])
+    cities = matrix["cities"]
+    for i, origin in enumerate(cities):
+        for j, dest in enumerate(cities):
+            if i == j:
+                continue
+            d, path = matrix["distances"][i][j], matrix["paths"][i][j]
+            writer.writerow([origin, dest, "" if d is None else f"{d:.3f}",
+                             "" if path is None else " > ".join(path)])
+
+
+def _positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"debe ser al menos 1: {text}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Matriz de distancias entre todas las ciudades")
+    parser.add_argument("--nodes", default=NODES_FILE, help="archivo node_positions.json")
+    parser.add_argument("--roads", default=ROADS_FILE, help="archivo roads_config.json")
+    parser.add_argument("--cache", default=MATRIX_FILE, help="archivo de caché ('' para desactivarla)")
+    parser.add_argument("--workers", type=_positive_int, default=None,
+                        help="procesos trabajadores (por defecto: CPUs)")
+    parser.add_argument("--snapshot",
+                        help="snapshot binario compartido por los trabajadores (se regenera si los JSON "
+                             "cambian; por defecto utils/network.bin solo para la red de la aplicación)")
+    parser.add_argument("--refresh", action="store_true", help="recalcular aunque la caché sea válida")
+    parser.add_argument("--format", choices=("table", "json", "csv"), default="table")
+    parser.add_argument("-o", "--output", help="archivo de salida (por defecto: stdout)")
+    args = parser.parse_args(argv)
+
+    matrix = city_matrix(args.nodes, args.roads, args.cache or None, args.workers, args.refresh,
+                         args.snapshot)
+
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump(matrix, out, ensure_ascii=False, indent=2)
+        elif args.format == "csv":
+            write_csv(matrix, out)
+        else:
+            write_table(matrix, out)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# metrics.py
+# Instrumentación ligera: temporizadores con nombre, contadores y ganchos de muestreo
+#
+# Se activa con la variable de entorno GPS_METRICS=1 (o metrics.enable()); con
+# GPS_METRICS_FILE=ruta.jsonl además se guarda cada muestra como una línea JSON.
+# Apagada, cada punto instrumentado cuesta una consulta a metrics.enabled.
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+ENV_VAR = "GPS_METRICS"
+FILE_ENV_VAR = "GPS_METRICS_FILE"
+# Muestras por temporizador que conserva el resumen móvil
+WINDOW = 200
+
+_OFF = nullcontext()
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Resumen en memoria de tiempos (ventana móvil por nombre) y contadores acumulados
+
+    Los ganchos (add_hook) reciben cada muestra como diccionario
+    {"t", "kind", "name", "value"}; el volcado a JSON lines es uno de ellos.
+    Se puede usar desde el hilo de rutas: las escrituras van bajo un candado.
+    """
+
+    def __init__(self, enabled=False, window=WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.timers = {}     # nombre -> deque de segundos
+        self.counters = {}   # nombre -> total
+        self.hooks = []
+        self._lock = threading.Lock()
+        self._file = None
+
+    @classmethod
+    def from_env(cls, environ=os.environ):
+        metrics = cls(enabled=environ.get(ENV_VAR, "") not in ("", "0"))
+        path = environ.get(FILE_ENV_VAR)
+        if path:
+            metrics.enable(dump_path=path)
+        return metrics
+
+    def enable(self, dump_path=None):
+        """Activa la instrumentación; con dump_path añade cada muestra a ese archivo JSONL"""
+        self.enabled = True
+        if dump_path and self._file is None:
+            self._file = open(dump_path, "a", encoding="utf-8")
+            self.add_hook(self._dump)
+
+    def disable(self):
+        self.enabled = False
+        if self._file is not None:
+            self.hooks.remove(self._dump)
+            self._file.close()
+            self._file = None
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def _dump(self, sample):
+        self._file.write(json.dumps(sample) + "\n")
+        self._file.flush()
+
+    def _emit(self, kind, name, value):
+        sample = {"t": round(time.time(), 3), "kind": kind, "name": name, "value": value}
+        for hook in self.hooks:
+            hook(sample)
+
+    # ------------------ REGISTRO ------------------
+    def timer(self, name):
+        """with metrics.timer("redraw"): ... (no hace nada si está apagada)"""
+        return _Timer(self, name) if self.enabled else _OFF
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self.timers.get(name)
+            if samples is None:
+                samples = self.timers[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            if self.hooks:
+                self._emit("timer", name, round(seconds * 1000, 3))
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+            if self.hooks:
+                self._emit("counter", name, n)
+
+    # ------------------ RESUMEN ------------------
+    def summary(self):
+        """{"timers": {nombre: {n, last_ms, mean_ms, p95_ms, max_ms}}, "counters": {...}}"""
+        with self._lock:
+            timers = {}
+            for name, samples in self.timers.items():
+                ordered = sorted(samples)
+                timers[name] = {
+                    "n": len(ordered),
+                    "last_ms": round(samples[-1] * 1000, 2),
+                    "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+                    "max_ms": round(ordered[-1] * 1000, 2),
+                }
+            return {"timers": timers, "counters": dict(self.counters)}
+
+    def status_text(self, timers=(), counters=()):
+        """Línea corta para la barra de estado: último y promedio de cada temporizador"""
+        summary = self.summary()
+        parts = []
+        for name in timers:
+            t = summary["timers"].get(name)
+            if t:
+                parts.append(f"{name} {t['last_ms']:.1f} ms (prom. {t['mean_ms']:.1f})")
+        for name in counters:
+            if name in summary["counters"]:
+                parts.append(f"{name} {summary['counters'][name]}")
+        return " | ".join(parts)
+
+
+# Instancia compartida por el motor, la escena y la interfaz
+metrics = Metrics.from_env()
@@ -0,0 +1,153 @@
+# mst.py
+# Árbol (bosque) de expansión mínimo euclidiano con aristas candidatas dispersas
+import math
+
+from routing.spatial import GridIndex
+
+INF = float('inf')
+
+# Con conos de 45° (< 60°) el vecino más cercano por cono incluye todas las aristas
+# del árbol de expansión mínimo euclidiano (grafo de Yao); son a lo sumo 8n candidatas
+CONES = 8
+# Anillos de la cuadrícula que se revisan por nodo antes de recurrir a la búsqueda
+# entre grupos (ver minimum_spanning_forest)
+CANDIDATE_RINGS = 3
+
+
+class UnionFind:
+    """Conjuntos disjuntos con compresión de caminos y unión por tamaño"""
+
+    def __init__(self, items=()):
+        self.parent = {}
+        self.size = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        """Une los conjuntos de a y b; devuelve False si ya estaban unidos"""
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        return True
+
+    def components(self):
+        return sum(1 for item, parent in self.parent.items() if item == parent)
+
+
+def _cone(dx, dy):
+    """Cono de 45° de la dirección (dx, dy), igual que int((atan2(dy, dx) + pi) / (pi / 4))
+    salvo en los bordes, con comparaciones en vez de atan2"""
+    ax, ay = abs(dx), abs(dy)
+    if dy < 0:
+        if dx < 0:
+            return 0 if ax > ay else 1
+        return 2 if ax < ay else 3
+    if dx > 0:
+        return 4 if ax > ay else 5
+    return 6 if ax < ay else 7
+
+
+def _cone_neighbors(sources, points, index, max_distance=INF, max_rings=None, accept=None):
+    """Por cada nodo de sources: (nodo, [(distancia, vecino)] por cono, completa)
+
+    completa es False si la búsqueda se cortó en max_rings con algún cono aún
+    mejorable; accept(nodo, otro) filtra los vecinos admitidos.
+    """
+    limit = max_distance * max_distance
+    for name in sources:
+        x, y = points[name]
+        # Distancias al cuadrado hasta el final (mismo orden, sin raíces)
+        best = [(INF, None)] * CONES
+        complete = False
+        rings = 0
+        for reach, buckets in index.rings(x, y, max_rings):
+            rings += 1
+            for bucket in buckets:
+                for other, (px, py) in bucket.items():
+                    dx, dy = px - x, py - y
+                    d2 = dx * dx + dy * dy
+                    if d2 >= limit or other == name or other not in points:
+                        continue
+                    cone = _cone(dx, dy)
+                    if (d2, other) < best[cone] and (accept is None or accept(name, other)):
+                        best[cone] = (d2, other)
+            # Se detiene cuando ningún nodo sin revisar puede mejorar algún cono
+            if reach >= max_distance or all(d2 <= reach * reach for d2, _ in best):
+                complete = True
+                break
+        else:
+            # Sin más anillos: completa si se salió de la zona ocupada antes del tope
+            complete = max_rings is None or rings < max_rings
+        yield name, [(math.sqrt(d2), other) for d2, other in best], complete
+
+
+def _add_edges(edges, name, best):
+    for d, other in best:
+        if other is not None:
+            a, b = (name, other) if name <= other else (other, name)
+            edges.add((d, a, b))
+
+
+def _kruskal(forest, tree, edges, n):
+    for d, a, b in edges:
+        if forest.union(a, b):
+            tree.append((a, b, d))
+            if len(tree) == n - 1:
+                return
+
+
+def minimum_spanning_forest(points, max_distance=INF, index=None):
+    """Kruskal sobre las candidatas de Yao; devuelve ([(a, b, distancia)], componentes)
+
+    Es el mismo bosque que el MST del grafo con todas las aristas más cortas que
+    max_distance, pero sin evaluar los n² pares. Las distancias están en píxeles del mapa.
+
+    Primero se buscan candidatas solo en CANDIDATE_RINGS anillos: en nodos alineados
+    sobre una carretera los conos laterales quedan vacíos y, sin tope, cada uno
+    revisaría todo el disco de radio max_distance. Hasta el alcance garantizado del
+    tope el bosque ya es exacto; si quedan varios grupos, los nodos con búsqueda cortada
+    la continúan aceptando solo nodos de otros grupos (dentro de un grupo la arista
+    cerraría un ciclo de aristas más cortas).
+    """
+    if index is None:
+        index = GridIndex()
+        index.rebuild(points)
+    reach = (CANDIDATE_RINGS - 1) * index.cell_size
+    forest = UnionFind(points)
+    tree = []
+    edges = set()
+    cut = []
+    for name, best, complete in _cone_neighbors(points, points, index, max_distance, CANDIDATE_RINGS):
+        _add_edges(edges, name, best)
+        if not complete:
+            cut.append(name)
+    edges = sorted(edges)
+    near = [e for e in edges if e[0] <= reach]
+    _kruskal(forest, tree, near, len(points))
+
+    if forest.components() > 1:
+        far = set(edges[len(near):])
+        if cut:
+            group = {name: forest.find(name) for name in points}
+            for name, best, _ in _cone_neighbors(cut, points, index, max_distance,
+                                                 accept=lambda a, b: group[a] != group[b]):
+                _add_edges(far, name, best)
+        _kruskal(forest, tree, sorted(far), len(points))
+    return tree, forest.components()
@@ -0,0 +1,101 @@
+# roads.py
+# Lista de carreteras con índice no dirigido para consultas de pertenencia en O(1)
+from routing.graph import edge_key
+
+
+class RoadStore:
+    """Lista ordenada de carreteras (a, b) + conjunto no dirigido + adyacencia por nodo"""
+
+    def __init__(self, roads=()):
+        self._roads = []
+        # Las carreteras repetidas en roads_config.json se cuentan, no se descartan
+        self._count = {}
+        self._adj = {}
+        self.extend(roads)
+
+    # ------------------ INTERFAZ DE LISTA ------------------
+    def __iter__(self):
+        return iter(self._roads)
+
+    def __len__(self):
+        return len(self._roads)
+
+    def __getitem__(self, i):
+        return self._roads[i]
+
+    def __contains__(self, road):
+        """Pertenencia sin importar la dirección: (a, b) in roads equivale a (b, a) in roads"""
+        return edge_key(road[0], road[1]) in self._count
+
+    def __repr__(self):
+        return f"RoadStore({self._roads!r})"
+
+    def copy(self):
+        """Copia de la lista (para historial y snapshots)"""
+        return list(self._roads)
+
+    def append(self, road):
+        a, b = road[0], road[1]
+        self._roads.append((a, b))
+        key = edge_key(a, b)
+        n = self._count.get(key, 0)
+        self._count[key] = n + 1
+        if n == 0:
+            self._adj.setdefault(a, set()).add(b)
+            self._adj.setdefault(b, set()).add(a)
+
+    def extend(self, roads):
+        for road in roads:
+            self.append(road)
+
+    def clear(self):
+        self._roads.clear()
+        self._count.clear()
+        self._adj.clear()
+
+    def replace(self, roads):
+        """Reemplaza todo el contenido (deshacer/rehacer, carga de configuración)"""
+        self.clear()
+        self.extend(roads)
+
+    # ------------------ CONSULTAS INDEXADAS ------------------
+    def has(self, a, b):
+        return edge_key(a, b) in self._count
+
+    def add(self, a, b):
+        """Agrega (a, b) solo si no existe en ninguna dirección; devuelve True si se agregó"""
+        if a == b or self.has(a, b):
+            return False
+        self.append((a, b))
+        return True
+
+    def neighbors(self, node):
+        return self._adj.get(node, set())
+
+    def discard_all(self, keys):
+        """Quita en una sola pasada todas las apariciones de las carreteras con esas
+        claves no dirigidas; devuelve las entradas eliminadas"""
+        keys = {k for k in keys if k in self._count}
+        if not keys:
+            return []
+        kept, removed = [], []
+        for road in self._roads:
+            (removed if edge_key(road[0], road[1]) in keys else kept).append(road)
+        self._roads = kept
+        for a, b in removed:
+            self._forget(a, b)
+        return removed
+
+    def _forget(self, a, b):
+        key = edge_key(a, b)
+        n = self._count[key] - 1
+        if n:
+            self._count[key] = n
+            return
+        del self._count[key]
+        for x, y in ((a, b), (b, a)):
+            nbrs = self._adj.get(x)
+            if nbrs is not None:
+                nbrs.discard(y)
+                if not nbrs:
+                    del self._adj[x]
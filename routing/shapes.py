@@ -0,0 +1,105 @@
+# shapes.py
+# Trazado real de las carreteras (utils/road_drawings.json) enlazado a las aristas del grafo
+import json
+import math
+
+from routing.graph import edge_key
+from routing.loader import DRAWINGS_FILE
+
+# Distancia máxima (px del mapa) entre un extremo de la polilínea y su nodo
+SNAP_DISTANCE = 1.0
+
+
+def douglas_peucker(points, tolerance):
+    """Simplifica una polilínea conservando los vértices a más de tolerance de la cuerda"""
+    n = len(points)
+    if n <= 2 or tolerance <= 0:
+        return list(points)
+    keep = bytearray(n)
+    keep[0] = keep[n - 1] = 1
+    t2 = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[first]
+        bx, by = points[last]
+        dx, dy = bx - ax, by - ay
+        length2 = dx * dx + dy * dy
+        worst, worst_d2 = -1, t2
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length2 == 0:
+                d2 = (px - ax) ** 2 + (py - ay) ** 2
+            else:
+                cross = dx * (py - ay) - dy * (px - ax)
+                d2 = cross * cross / length2
+            if d2 > worst_d2:
+                worst, worst_d2 = i, d2
+        if worst >= 0:
+            keep[worst] = 1
+            stack.append((first, worst))
+            stack.append((worst, last))
+    return [p for p, k in zip(points, keep) if k]
+
+
+class RoadShapes:
+    """Polilíneas dibujadas a mano asociadas a la carretera (a, b) que representan
+
+    Una polilínea se enlaza a una arista si sus extremos caen sobre dos nodos
+    conectados. Las aristas sin dibujo (o cuyos nodos se movieron desde que se
+    dibujó) se trazan como una recta entre sus nodos.
+    """
+
+    def __init__(self, polylines=()):
+        self.polylines = [[(float(x), float(y)) for x, y in line] for line in polylines]
+        self.shapes = {}
+
+    @classmethod
+    def from_file(cls, path=DRAWINGS_FILE):
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def link(self, graph, snap=SNAP_DISTANCE):
+        """Asocia cada polilínea a la arista del grafo cuyos extremos coinciden; devuelve
+        cuántas quedaron enlazadas"""
+        spatial = graph.spatial_index()
+        self.shapes.clear()
+        for line in self.polylines:
+            if len(line) < 2:
+                continue
+            start = spatial.nearest(*line[0], max_distance=snap)
+            end = spatial.nearest(*line[-1], max_distance=snap)
+            if start is None or end is None:
+                continue
+            a, b = start[1], end[1]
+            if a == b or b not in graph.adj.get(a, ()):
+                continue
+            key = edge_key(a, b)
+            # Se guarda orientada de key[0] a key[1]
+            self.shapes[key] = line if a == key[0] else line[::-1]
+        return len(self.shapes)
+
+    def edge_points(self, a, b, pos):
+        """Puntos de a hacia b: el dibujo si sigue siendo válido, si no la recta"""
+        key = edge_key(a, b)
+        line = self.shapes.get(key)
+        pa, pb = pos[a], pos[b]
+        if line is not None:
+            first, last = (line[0], line[-1]) if a == key[0] else (line[-1], line[0])
+            if (math.hypot(first[0] - pa[0], first[1] - pa[1]) <= SNAP_DISTANCE
+                    and math.hypot(last[0] - pb[0], last[1] - pb[1]) <= SNAP_DISTANCE):
+                return line if a == key[0] else line[::-1]
+        return [tuple(pa), tuple(pb)]
+
+    def path_points(self, path, pos):
+        """Polilínea completa de una ruta (lista de nodos) siguiendo los dibujos"""
+        points = []
+        for a, b in zip(path, path[1:]):
+            seg = self.edge_points(a, b, pos)
+            points.extend(seg[1:] if points else seg)
+        if not points and path:
+            points.append(tuple(pos[path[0]]))
+        return points
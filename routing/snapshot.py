@@ -0,0 +1,167 @@
+# snapshot.py
+# Formato binario de la red para arranque rápido con mmap
+#
+# Uso: python -m routing.snapshot build [-o utils/network.bin]
+#      python -m routing.snapshot info [archivo]
+#
+# Estructura (little-endian, cada sección alineada a 8 bytes):
+#   cabecera | xs f64[n] | ys f64[n] | offsets i32[n+1] | targets i32[m] | weights f64[m]
+#            | name_offsets u32[n+1] | kinds u8[n] | nombres utf-8
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from routing.csr import CSRGraph
+from routing.graph import RoadGraph
+from routing.loader import NODES_FILE, ROADS_FILE, SNAPSHOT_FILE, files_hash, load_network
+
+MAGIC = b"VZRT"
+FORMAT_VERSION = 1
+# magic, versión, nodos, entradas de adyacencia, bytes de nombres, hash de los JSON
+HEADER = struct.Struct("<4sIIII40s")
+
+KIND_WAYPOINT = 0
+KIND_CITY = 1
+
+
+class SnapshotError(Exception):
+    """El archivo no es un snapshot válido para esta versión"""
+
+
+def _pad(size):
+    return (size + 7) & ~7
+
+
+def _sections(n, m, names_len):
+    """Desplazamiento y tamaño de cada sección después de la cabecera"""
+    layout = [("xs", 8 * n), ("ys", 8 * n), ("offsets", 4 * (n + 1)),
+              ("targets", 4 * m), ("weights", 8 * m), ("name_offsets", 4 * (n + 1)),
+              ("kinds", n), ("names", names_len)]
+    result = {}
+    pos = _pad(HEADER.size)
+    for name, size in layout:
+        result[name] = (pos, size)
+        pos = _pad(pos + size)
+    return result, pos
+
+
+# ------------------ ESCRITURA ------------------
+def write_snapshot(csr, cities, path, source_hash=""):
+    """Guarda un CSRGraph y el conjunto de ciudades en formato binario"""
+    if sys.byteorder != "little":
+        raise SnapshotError("El formato binario requiere una plataforma little-endian")
+
+    encoded = [name.encode("utf-8") for name in csr.names]
+    name_offsets = array('I', [0])
+    for raw in encoded:
+        name_offsets.append(name_offsets[-1] + len(raw))
+    names = b"".join(encoded)
+    kinds = bytes(KIND_CITY if name in cities else KIND_WAYPOINT for name in csr.names)
+
+    n, m = len(csr), len(csr.targets)
+    sections, total = _sections(n, m, len(names))
+    data = {"xs": csr.xs, "ys": csr.ys, "offsets": csr.offsets, "targets": csr.targets,
+            "weights": csr.weights, "name_offsets": name_offsets, "kinds": kinds, "names": names}
+
+    buf = bytearray(total)
+    HEADER.pack_into(buf, 0, MAGIC, FORMAT_VERSION, n, m, len(names), source_hash.encode("ascii"))
+    for name, (offset, size) in sections.items():
+        raw = data[name] if isinstance(data[name], bytes) else bytes(data[name])
+        buf[offset:offset + size] = raw
+
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(buf)
+    os.replace(tmp, path)
+
+
+def build_snapshot(nodes_file=NODES_FILE, roads_file=ROADS_FILE, path=SNAPSHOT_FILE):
+    """Compila los JSON de la red a un snapshot binario"""
+    cities, waypoints, roads = load_network(nodes_file, roads_file)
+    graph = RoadGraph()
+    graph.load({**cities, **waypoints}, roads)
+    write_snapshot(CSRGraph.from_road_graph(graph), cities, path, files_hash(nodes_file, roads_file))
+    return path
+
+
+# ------------------ LECTURA ------------------
+class Snapshot:
+    """Vista de solo lectura sobre un snapshot mapeado en memoria (páginas compartidas)"""
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mm)
+
+        if len(view) < HEADER.size:
+            raise SnapshotError(f"Snapshot truncado: {path}")
+        magic, version, n, m, names_len, source_hash = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise SnapshotError(f"Formato de snapshot no soportado: {path}")
+        sections, total = _sections(n, m, names_len)
+        if len(view) < total:
+            raise SnapshotError(f"Snapshot truncado: {path}")
+
+        self.path = path
+        self.source_hash = source_hash.decode("ascii").rstrip("\0")
+        self._view = view
+        self._sections = sections
+
+    def _section(self, name, fmt):
+        offset, size = self._sections[name]
+        raw = self._view[offset:offset + size]
+        return raw.cast(fmt) if fmt != 'B' else raw
+
+    def csr(self):
+        """CSRGraph cuyos arreglos apuntan directamente a las páginas del archivo"""
+        name_offsets = self._section("name_offsets", 'I')
+        blob = self._section("names", 'B')
+        names = [str(blob[name_offsets[i]:name_offsets[i + 1]], "utf-8")
+                 for i in range(len(name_offsets) - 1)]
+        return CSRGraph(names, self._section("offsets", 'i'), self._section("targets", 'i'),
+                        self._section("weights", 'd'), self._section("xs", 'd'),
+                        self._section("ys", 'd'))
+
+    def city_ids(self):
+        kinds = self._section("kinds", 'B')
+        return [i for i, kind in enumerate(kinds) if kind == KIND_CITY]
+
+
+def ensure_snapshot(nodes_file=NODES_FILE, roads_file=ROADS_FILE, path=SNAPSHOT_FILE):
+    """Regenera el snapshot solo si no existe o si los JSON cambiaron"""
+    current = files_hash(nodes_file, roads_file)
+    if os.path.exists(path):
+        try:
+            if Snapshot(path).source_hash == current:
+                return path
+        except SnapshotError:
+            pass
+    return build_snapshot(nodes_file, roads_file, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot binario de la red vial")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="compilar node_positions.json y roads_config.json")
+    build.add_argument("--nodes", default=NODES_FILE)
+    build.add_argument("--roads", default=ROADS_FILE)
+    build.add_argument("-o", "--output", default=SNAPSHOT_FILE)
+    info = sub.add_parser("info", help="mostrar el contenido de un snapshot")
+    info.add_argument("path", nargs="?", default=SNAPSHOT_FILE)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        path = build_snapshot(args.nodes, args.roads, args.output)
+        print(f"Snapshot escrito: {path} ({os.path.getsize(path)} bytes)")
+    else:
+        snap = Snapshot(args.path)
+        csr = snap.csr()
+        print(f"{args.path}: {len(csr)} nodos, {csr.edge_count()} carreteras, "
+              f"{len(snap.city_ids())} ciudades, hash {snap.source_hash}")
+
+
+if __name__ == "__main__":
+    main()
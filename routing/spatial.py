@@ -0,0 +1,230 @@
+# spatial.py
+# Índice espacial de cuadrícula uniforme para buscar nodos por posición
+import heapq
+import math
+
+INF = float('inf')
+
+# Lado de cada celda en píxeles del mapa original
+CELL_SIZE = 32.0
+
+
+class GridIndex:
+    """Cuadrícula {celda: {nodo: (x, y)}}; insertar, mover y borrar cuestan O(1)"""
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.pos = {}
+        # Extremos ocupados, para no expandir anillos más allá de la red
+        self._bounds = None
+
+    def __len__(self):
+        return len(self.pos)
+
+    def __contains__(self, name):
+        return name in self.pos
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    # ------------------ MUTACIONES ------------------
+    def insert(self, name, pos):
+        if name in self.pos:
+            self.remove(name)
+        x, y = pos[0], pos[1]
+        cell = self._cell(x, y)
+        self.cells.setdefault(cell, {})[name] = (x, y)
+        self.pos[name] = (x, y)
+        if self._bounds is None:
+            self._bounds = [cell[0], cell[1], cell[0], cell[1]]
+        else:
+            b = self._bounds
+            b[0], b[1] = min(b[0], cell[0]), min(b[1], cell[1])
+            b[2], b[3] = max(b[2], cell[0]), max(b[3], cell[1])
+
+    def move(self, name, pos):
+        self.insert(name, pos)
+
+    def remove(self, name):
+        old = self.pos.pop(name, None)
+        if old is None:
+            return
+        cell = self._cell(*old)
+        bucket = self.cells[cell]
+        del bucket[name]
+        if not bucket:
+            del self.cells[cell]
+
+    def rebuild(self, nodes):
+        self.cells.clear()
+        self.pos.clear()
+        self._bounds = None
+        for name, pos in nodes.items():
+            self.insert(name, pos)
+
+    # ------------------ CONSULTAS ------------------
+    def _ring(self, cx, cy, r):
+        """Celdas ocupadas a distancia de Chebyshev exactamente r de (cx, cy)"""
+        cells = self.cells
+        if r == 0:
+            if (cx, cy) in cells:
+                yield cells[cx, cy]
+            return
+        for dx in range(-r, r + 1):
+            for dy in (-r, r):
+                bucket = cells.get((cx + dx, cy + dy))
+                if bucket:
+                    yield bucket
+        for dy in range(-r + 1, r):
+            for dx in (-r, r):
+                bucket = cells.get((cx + dx, cy + dy))
+                if bucket:
+                    yield bucket
+
+    def _max_ring(self, cx, cy):
+        if self._bounds is None:
+            return -1
+        x0, y0, x1, y1 = self._bounds
+        return max(cx - x0, x1 - cx, cy - y0, y1 - cy)
+
+    def rings(self, x, y, max_rings=None):
+        """Anillos de celdas ocupadas alrededor de (x, y), del más cercano al más lejano
+
+        Produce (alcance, celdas): tras revisar los anillos hasta este, cualquier nodo
+        aún no visto está a distancia >= alcance. Termina al salir de la zona ocupada
+        o tras max_rings anillos.
+        """
+        cx, cy = self._cell(x, y)
+        limit = self._max_ring(cx, cy)
+        if max_rings is not None:
+            limit = min(limit, max_rings - 1)
+        for r in range(limit + 1):
+            yield r * self.cell_size, self._ring(cx, cy, r)
+
+    def within(self, x, y, radius, accept=None):
+        """Nodos a distancia < radius de (x, y) como [(distancia, nodo)] ordenada"""
+        x0, y0 = self._cell(x - radius, y - radius)
+        x1, y1 = self._cell(x + radius, y + radius)
+        found = []
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for name, (px, py) in cells.get((cx, cy), {}).items():
+                    d = math.hypot(px - x, py - y)
+                    if d < radius and (accept is None or accept(name)):
+                        found.append((d, name))
+        found.sort()
+        return found
+
+    def in_rect(self, x0, y0, x1, y1):
+        """Nodos dentro del rectángulo [x0, x1] × [y0, y1]"""
+        c0, r0 = self._cell(x0, y0)
+        c1, r1 = self._cell(x1, y1)
+        found = []
+        for bucket in _cells_in_range(self.cells, c0, r0, c1, r1):
+            for name, (px, py) in bucket.items():
+                if x0 <= px <= x1 and y0 <= py <= y1:
+                    found.append(name)
+        return found
+
+    def k_nearest(self, x, y, k, max_distance=INF, accept=None):
+        """Los k nodos más cercanos a (x, y) con distancia < max_distance, expandiendo anillos"""
+        if k <= 0:
+            return []
+        # Montículo de máximos (distancias negadas) con los k mejores candidatos
+        best = []
+        for reach, buckets in self.rings(x, y):
+            for bucket in buckets:
+                for name, (px, py) in bucket.items():
+                    d = math.hypot(px - x, py - y)
+                    if d >= max_distance or (accept is not None and not accept(name)):
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, name))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, name))
+            # Cualquier nodo fuera de los anillos revisados está al menos a reach
+            if reach >= max_distance or (len(best) == k and -best[0][0] <= reach):
+                break
+        return sorted((-d, name) for d, name in best)
+
+    def nearest(self, x, y, max_distance=INF, accept=None):
+        """(distancia, nodo) más cercano a (x, y), o None"""
+        result = self.k_nearest(x, y, 1, max_distance, accept)
+        return result[0] if result else None
+
+
+def _cells_in_range(cells, c0, r0, c1, r1):
+    """Contenido de las celdas ocupadas dentro del rango; si el rango es mayor que la
+    cuadrícula (vista muy alejada) se recorren las celdas ocupadas en su lugar"""
+    if (c1 - c0 + 1) * (r1 - r0 + 1) > len(cells):
+        for (cx, cy), bucket in cells.items():
+            if c0 <= cx <= c1 and r0 <= cy <= r1:
+                yield bucket
+        return
+    for cx in range(c0, c1 + 1):
+        for cy in range(r0, r1 + 1):
+            bucket = cells.get((cx, cy))
+            if bucket:
+                yield bucket
+
+
+class SegmentIndex:
+    """Cuadrícula de segmentos: cada clave (p. ej. una polilínea) se registra en las
+    celdas que cubren las cajas de sus segmentos"""
+
+    def __init__(self, cell_size=CELL_SIZE * 2):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.keys = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _cells_of(self, points):
+        size = self.cell_size
+        found = set()
+        for (x1, y1), (x2, y2) in zip(points, points[1:]):
+            c0, r0 = int(math.floor(min(x1, x2) / size)), int(math.floor(min(y1, y2) / size))
+            c1, r1 = int(math.floor(max(x1, x2) / size)), int(math.floor(max(y1, y2) / size))
+            for cx in range(c0, c1 + 1):
+                for cy in range(r0, r1 + 1):
+                    found.add((cx, cy))
+        return found
+
+    def insert(self, key, points):
+        if key in self.keys:
+            self.remove(key)
+        cells = self._cells_of(points)
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(key)
+        self.keys[key] = cells
+
+    def remove(self, key):
+        for cell in self.keys.pop(key, ()):
+            bucket = self.cells[cell]
+            bucket.discard(key)
+            if not bucket:
+                del self.cells[cell]
+
+    def clear(self):
+        self.cells.clear()
+        self.keys.clear()
+
+    def touches(self, key, x0, y0, x1, y1):
+        """Si key saldría en query_rect(x0, y0, x1, y1), sin recorrer las demás claves"""
+        size = self.cell_size
+        c0, r0 = int(math.floor(x0 / size)), int(math.floor(y0 / size))
+        c1, r1 = int(math.floor(x1 / size)), int(math.floor(y1 / size))
+        return any(c0 <= cx <= c1 and r0 <= cy <= r1 for cx, cy in self.keys.get(key, ()))
+
+    def query_rect(self, x0, y0, x1, y1):
+        """Claves con algún segmento en celdas que tocan el rectángulo"""
+        size = self.cell_size
+        c0, r0 = int(math.floor(x0 / size)), int(math.floor(y0 / size))
+        c1, r1 = int(math.floor(x1 / size)), int(math.floor(y1 / size))
+        found = set()
+        for bucket in _cells_in_range(self.cells, c0, r0, c1, r1):
+            found |= bucket
+        return found
@@ -0,0 +1,147 @@
+# store.py
+# Red editable: diccionarios de nodos, lista de carreteras y motor de rutas, siempre en sintonía
+from collections import deque
+
+from routing.graph import edge_key
+from routing.roads import RoadStore
+
+# Cambios que se recuerdan para las vistas incrementales (ver NetworkStore.changes_since)
+MAX_CHANGES = 50000
+
+
+class NetworkStore:
+    """Punto único de edición de la red; cada operación es O(grado)
+
+    Mantiene juntos los diccionarios de ciudades, waypoints y nodos (se modifican en
+    el lugar, así quien los comparta ve los cambios), la lista de carreteras y el
+    motor de rutas, cuyo grafo actualiza pesos, adyacencia e índice espacial.
+    Si hay un historial con una acción abierta, cada cambio queda registrado en su delta.
+    Cada cambio se anota además en un registro con número de revisión, así una vista
+    (gui.scene.MapScene) actualiza solo los nodos y carreteras afectados.
+    """
+
+    def __init__(self, engine, cities=None, waypoints=None, nodes=None, roads=None, history=None):
+        self.engine = engine
+        self.cities = cities if cities is not None else {}
+        self.waypoints = waypoints if waypoints is not None else {}
+        self.nodes = nodes if nodes is not None else {**self.cities, **self.waypoints}
+        self.roads = roads if roads is not None else RoadStore()
+        self.history = history
+        # Registro de cambios: (revisión, "node" o "road", nombre o clave no dirigida)
+        self.revision = 0
+        self._changes = deque(maxlen=MAX_CHANGES)
+        # Revisión de la última carga completa y versión del grafo tras el último cambio propio
+        self._reset = 0
+        self._version = engine.version
+
+    def _delta(self):
+        return self.history.delta if self.history is not None else None
+
+    def _changed(self, kind, key):
+        self.revision += 1
+        self._changes.append((self.revision, kind, key))
+        self._version = self.engine.version
+
+    def changes_since(self, revision):
+        """(revisión actual, cambios) desde revision; cambios es ({nodos}, {claves de
+        carreteras}), o None si hay que reconstruir todo: hubo una carga completa, el
+        registro ya no llega tan atrás o el grafo se modificó sin pasar por aquí"""
+        if (revision < self._reset or self.engine.version != self._version
+                or (self._changes and self._changes[0][0] > revision + 1)):
+            return self.revision, None
+        nodes, roads = set(), set()
+        for rev, kind, key in reversed(self._changes):
+            if rev <= revision:
+                break
+            (nodes if kind == "node" else roads).add(key)
+        return self.revision, (nodes, roads)
+
+    def load(self, cities, waypoints, roads):
+        """Reemplaza la red completa (carga de configuración); el motor se reconstruye una vez"""
+        for city, pos in cities.items():
+            self.cities[city] = pos
+        self.waypoints.clear()
+        self.waypoints.update(waypoints)
+        self.nodes.clear()
+        self.nodes.update(self.cities)
+        self.nodes.update(self.waypoints)
+        self.roads.replace(roads)
+        self.engine.load(self.nodes, self.roads, self.cities)
+        self.revision += 1
+        self._reset = self.revision
+        self._changes.clear()
+        self._version = self.engine.version
+
+    def kind(self, name):
+        return "waypoint" if name in self.waypoints else "city"
+
+    # ------------------ NODOS ------------------
+    def add_node(self, name, pos, kind="waypoint"):
+        """Agrega un waypoint o una ciudad"""
+        (self.waypoints if kind == "waypoint" else self.cities)[name] = list(pos)
+        self.nodes[name] = list(pos)
+        self.engine.add_node(name, list(pos))
+        self._changed("node", name)
+        delta = self._delta()
+        if delta is not None:
+            delta.add_node(name, pos, kind)
+
+    def move_node(self, name, pos):
+        """Mueve un nodo; solo se recalculan los pesos de sus carreteras"""
+        old = self.nodes[name]
+        for nodes in (self.nodes, self.waypoints, self.cities):
+            if name in nodes:
+                nodes[name] = list(pos)
+        self.engine.move_node(name, list(pos))
+        self._changed("node", name)
+        delta = self._delta()
+        if delta is not None:
+            delta.move_node(name, old, pos)
+
+    def remove_node(self, name):
+        """Elimina un nodo junto con sus carreteras"""
+        self.remove_edges([edge_key(name, nbr) for nbr in list(self.roads.neighbors(name))])
+        kind = self.kind(name)
+        pos = self.nodes.pop(name)
+        (self.waypoints if kind == "waypoint" else self.cities).pop(name, None)
+        self.engine.remove_node(name)
+        self._changed("node", name)
+        delta = self._delta()
+        if delta is not None:
+            delta.remove_node(name, pos, kind)
+
+    # ------------------ CARRETERAS ------------------
+    def add_edge(self, a, b):
+        """Agrega la carretera (a, b) si no existe en ninguna dirección; True si se agregó"""
+        if a not in self.nodes or b not in self.nodes or not self.roads.add(a, b):
+            return False
+        self.engine.add_edge(a, b)
+        self._changed("road", edge_key(a, b))
+        delta = self._delta()
+        if delta is not None:
+            delta.add_road(a, b)
+        return True
+
+    def remove_edge(self, a, b):
+        """Quita la carretera (a, b) en ambas direcciones; devuelve las entradas eliminadas"""
+        return self.remove_edges([edge_key(a, b)])
+
+    def remove_edges(self, keys):
+        """Quita varias carreteras (claves no dirigidas) con una sola pasada por la lista"""
+        removed = self.roads.discard_all(keys)
+        by_key = {}
+        for a, b in removed:
+            by_key.setdefault(edge_key(a, b), []).append((a, b))
+        delta = self._delta()
+        for key, entries in by_key.items():
+            self.engine.remove_edge(*key)
+            self._changed("road", key)
+            if delta is not None:
+                delta.remove_road(key[0], key[1], entries)
+        return removed
+
+    def restore_edge(self, road):
+        """Vuelve a poner una entrada de carretera tal cual, repeticiones incluidas (deshacer)"""
+        self.roads.append(road)
+        self.engine.add_edge(*road)
+        self._changed("road", edge_key(road[0], road[1]))